@@ -2,14 +2,41 @@
 Flask API Server for Locale
 Provides REST endpoints for location evaluation
 """
-from flask import Flask, request, jsonify
+import json
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from locale_backend import evaluate_location, reverse_geocode, autocomplete_places, CRITERIA_MAP, GOOGLE_API_KEY
+from locale_backend import (evaluate_location, iter_evaluation, reverse_geocode, autocomplete_places,
+                            criteria_list, start_snapshot_refresher, GOOGLE_API_KEY)
+from locale_batch import parse_batch_request, run_batch
+from locale_compare import compare_locations, parse_compare_request
+from locale_metrics import collect_timings, registry
+from locale_payload import (COMPRESS_MIN_BYTES, apply_shape, compress, negotiate_encoding, parse_evaluation_request,
+                            parse_fields, parse_limit, parse_previous_radius, parse_shape, radius_diff,
+                            shape_amenity, shape_comparison)
+from locale_quota import track_usage
+from locale_search import parse_search_request, search_region
 
 app = Flask(__name__)
+app.json.compact = True  # no pretty-printing, even under debug=True
 CORS(app)  # Enable CORS for frontend requests
 
 
+@app.after_request
+def compress_response(response):
+    """gzip/brotli-encode JSON responses above COMPRESS_MIN_BYTES when the client accepts it"""
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or response.mimetype != 'application/json' or 'Content-Encoding' in response.headers):
+        return response
+    body = response.get_data()
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None or len(body) < COMPRESS_MIN_BYTES:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -25,15 +52,7 @@ def get_config():
 @app.route('/api/criteria', methods=['GET'])
 def get_criteria():
     """Get list of available criteria"""
-    criteria_list = [
-        {
-            'key': key,
-            'label': key.replace('_', ' ').title(),
-            'description': f"Count of {key.replace('_', ' ')} within radius"
-        }
-        for key in CRITERIA_MAP.keys()
-    ]
-    return jsonify({'criteria': criteria_list})
+    return jsonify({'criteria': criteria_list()})
 
 
 @app.route('/api/autocomplete', methods=['GET'])
@@ -62,6 +81,12 @@ def reverse_geocode_endpoint():
     return jsonify({'address': address})
 
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: stage and upstream latency histograms, errors, cache hit ratios"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/api/evaluate', methods=['POST'])
 def evaluate():
     """
@@ -73,26 +98,176 @@ def evaluate():
         "radius_miles": 3,
         "criteria": ["grocery_stores", "restaurants", "coffee_shops"]
     }
+
+    The response includes a 'usage' block counting the upstream calls (and
+    billable Google calls) the evaluation made. With "timings": true it also
+    includes per-stage and per-upstream-call durations.
+
+    Optional shaping: "fields" (e.g. ["name", "distance"]) and "limit" trim
+    each criterion's place list; "format": "compact" returns one
+    de-duplicated columnar place table referenced by index.
+
+    After a radius change, "previous_radius_miles" returns only the places
+    added and removed per criterion relative to that radius. Both radii are
+    normally answered from the places fetched for the first evaluation.
     """
     data = request.get_json()
     
     if not data or 'location' not in data:
         return jsonify({'error': 'Location is required'}), 400
-    
-    location = data['location']
-    radius_miles = float(data.get('radius_miles', 3))
-    selected_criteria = data.get('criteria')  # None = all criteria
-    custom_amenities = data.get('custom_amenities', [])  # Custom place types
-    restaurant_min_rating = float(data.get('restaurant_min_rating', 0))  # Minimum rating for restaurants
+    try:
+        shape = parse_shape(data)
+        previous_radius = parse_previous_radius(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    result = evaluate_location(location, radius_miles, selected_criteria, custom_amenities, restaurant_min_rating)
+    args = parse_evaluation_request(data)
+    with track_usage() as usage, collect_timings() as timings:
+        result = evaluate_location(**args)
+        if previous_radius is not None and 'error' not in result:
+            previous = evaluate_location(**{**args, 'radius_miles': previous_radius})
     
     if 'error' in result:
         return jsonify(result), 404
     
+    if previous_radius is not None:
+        result = radius_diff(previous, result, shape['fields'])
+    else:
+        result = apply_shape(result, **shape)
+    # Upstream calls this request made (cache hits and shared results cost none)
+    result = {**result, 'usage': usage.report()}
+    if data.get('timings'):
+        result['timings'] = timings.report()
     return jsonify(result)
 
 
+@app.route('/api/evaluate/stream', methods=['POST'])
+def evaluate_stream():
+    """
+    Evaluate a location, streaming each section as Server-Sent Events
+
+    Takes the same body as /api/evaluate. Emits a 'location' event as soon as
+    geocoding finishes, then one 'amenity', 'climate' and 'transportation'
+    event per lookup as it completes, and a final 'done' event carrying the
+    upstream usage report. An unknown
+    location produces a single 'error' event. "fields" and "limit" trim the
+    place list of each 'amenity' event as in /api/evaluate.
+    """
+    data = request.get_json()
+
+    if not data or 'location' not in data:
+        return jsonify({'error': 'Location is required'}), 400
+    try:
+        fields, limit = parse_fields(data.get('fields')), parse_limit(data.get('limit'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    args = parse_evaluation_request(data)
+
+    def generate():
+        with track_usage() as usage:
+            for event, payload in iter_evaluation(**args):
+                if event == 'amenity' and (fields is not None or limit is not None):
+                    payload = {**payload, 'data': shape_amenity(payload['data'], fields, limit)}
+                if event == 'done':
+                    payload = {**payload, 'usage': usage.report()}
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@app.route('/api/evaluate/batch', methods=['POST'])
+def evaluate_batch():
+    """
+    Evaluate many locations, streaming one JSON line per location as it completes
+
+    Request body:
+    {
+        "locations": ["Austin, TX", {"id": "hq", "location": "Denver, CO", "radius_miles": 5}],
+        "radius_miles": 3,
+        "criteria": ["grocery_stores", "coffee_shops"]
+    }
+    Top-level fields are defaults for entries that do not set their own.
+    """
+    try:
+        items = parse_batch_request(request.get_json())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    def generate():
+        for record in run_batch(items):
+            yield json.dumps(record) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/search', methods=['POST'])
+def search():
+    """
+    Find places in a region that meet amenity and climate thresholds
+
+    Request body:
+    {
+        "bbox": [30.1, -97.95, 30.5, -97.6],
+        "amenities": [{"criterion": "coffee_shops", "min_count": 3, "within_miles": 1},
+                      {"criterion": "parks", "within_miles": 1}],
+        "climate": [{"metric": "summer_temp", "max": 85}],
+        "cell_miles": 0.5,
+        "limit": 20,
+        "budget": 200
+    }
+    Returns ranked candidate points with their counts, search stats and usage.
+    """
+    try:
+        args = parse_search_request(request.get_json())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        with track_usage() as usage:
+            result = search_region(**args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({**result, 'usage': usage.report()})
+
+
+@app.route('/api/compare', methods=['POST'])
+def compare():
+    """
+    Compare several locations side by side
+
+    Request body:
+    {
+        "locations": ["Austin, TX", "Denver, CO", "Raleigh, NC"],
+        "radius_miles": 3,
+        "criteria": ["grocery_stores", "coffee_shops", "parks"]
+    }
+    Takes the same options as /api/evaluate. Returns one table whose rows are
+    aligned with 'locations': per-criterion counts with scores and ranks,
+    climate metrics, airport distances and an overall rank. With
+    "details": true each location's evaluation is included, shaped by
+    "fields", "limit" and "format" as in /api/evaluate.
+    """
+    data = request.get_json()
+    try:
+        args = parse_compare_request(data)
+        shape = parse_shape(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        with track_usage() as usage:
+            result = compare_locations(**args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({**shape_comparison(result, shape), 'usage': usage.report()})
+
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
@@ -108,7 +283,13 @@ if __name__ == '__main__':
     print("Endpoints:")
     print("  GET  /api/health     - Health check")
     print("  GET  /api/criteria   - Get available criteria")
+    print("  GET  /api/metrics    - Prometheus metrics")
     print("  POST /api/evaluate   - Evaluate location")
+    print("  POST /api/evaluate/stream - Evaluate location (Server-Sent Events)")
+    print("  POST /api/evaluate/batch  - Evaluate many locations (JSON lines)")
+    print("  POST /api/search     - Find areas meeting amenity/climate thresholds")
+    print("  POST /api/compare    - Compare several locations side by side")
     print("\nServer running on http://localhost:5001")
 
+    start_snapshot_refresher()
     app.run(debug=True, host='0.0.0.0', port=5001)
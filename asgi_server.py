@@ -0,0 +1,247 @@
+"""
+ASGI API Server for Locale
+Async serving mode: evaluate, autocomplete and reverse-geocode await
+locale_async lookups instead of pinning a thread per request, so one process
+can hold hundreds of concurrent evaluations. Same endpoints and responses as
+api_server.py.
+
+Run with:
+    uvicorn asgi_server:app --host 0.0.0.0 --port 5001
+"""
+import json
+import contextlib
+
+from starlette.applications import Starlette
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+import locale_async
+from locale_backend import GOOGLE_API_KEY, criteria_list, start_snapshot_refresher
+from locale_batch import parse_batch_request, run_batch
+from locale_compare import compare_locations, parse_compare_request
+from locale_metrics import collect_timings, registry
+from locale_payload import (COMPRESS_MIN_BYTES, apply_shape, compress, negotiate_encoding, parse_evaluation_request,
+                            parse_fields, parse_limit, parse_previous_radius, parse_shape, radius_diff,
+                            shape_amenity, shape_comparison)
+from locale_quota import track_usage
+from locale_search import parse_search_request, search_region
+
+
+async def _json_body(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def _json(request, payload, status_code: int = 200) -> JSONResponse:
+    """JSONResponse, gzip/brotli-encoded above COMPRESS_MIN_BYTES when the client accepts it"""
+    response = JSONResponse(payload, status_code=status_code)
+    encoding = negotiate_encoding(request.headers.get('accept-encoding'))
+    if status_code == 200 and encoding is not None and len(response.body) >= COMPRESS_MIN_BYTES:
+        response.body = compress(response.body, encoding)
+        response.headers['Content-Encoding'] = encoding
+        response.headers['Content-Length'] = str(len(response.body))
+        response.headers.add_vary_header('Accept-Encoding')
+    return response
+
+
+async def health_check(request):
+    """Health check endpoint"""
+    return JSONResponse({'status': 'ok'})
+
+
+async def get_config(request):
+    """Get configuration including Maps API key for frontend"""
+    return JSONResponse({'mapsApiKey': GOOGLE_API_KEY})
+
+
+async def get_criteria(request):
+    """Get list of available criteria"""
+    return JSONResponse({'criteria': criteria_list()})
+
+
+async def autocomplete(request):
+    """Get address autocomplete suggestions"""
+    input_text = request.query_params.get('input', '').strip()
+    if not input_text or len(input_text) < 2:
+        return JSONResponse({'suggestions': []})
+    session_token = request.query_params.get('session_token')
+    suggestions = await locale_async.autocomplete_places(input_text, session_token)
+    return JSONResponse({'suggestions': suggestions})
+
+
+async def reverse_geocode_endpoint(request):
+    """Convert lat/lng to a formatted address for current-location detection."""
+    try:
+        lat = float(request.query_params.get('lat'))
+        lng = float(request.query_params.get('lng'))
+    except (TypeError, ValueError):
+        return JSONResponse({'error': 'lat and lng query parameters are required'}, status_code=400)
+
+    address = await locale_async.reverse_geocode(lat, lng)
+    if not address:
+        return JSONResponse({'error': 'Could not resolve coordinates to an address'}, status_code=404)
+    return JSONResponse({'address': address})
+
+
+async def metrics(request):
+    """Prometheus metrics: stage and upstream latency histograms, errors, cache hit ratios"""
+    return PlainTextResponse(registry.render(), media_type='text/plain; version=0.0.4')
+
+
+async def evaluate(request):
+    """Evaluate a location (same body as api_server's /api/evaluate)"""
+    data = await _json_body(request)
+
+    if not data or 'location' not in data:
+        return JSONResponse({'error': 'Location is required'}, status_code=400)
+    try:
+        shape = parse_shape(data)
+        previous_radius = parse_previous_radius(data)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    args = parse_evaluation_request(data)
+    with track_usage() as usage, collect_timings() as timings:
+        result = await locale_async.evaluate_location(**args)
+        if previous_radius is not None and 'error' not in result:
+            previous = await locale_async.evaluate_location(**{**args, 'radius_miles': previous_radius})
+
+    if 'error' in result:
+        return JSONResponse(result, status_code=404)
+
+    if previous_radius is not None:
+        result = radius_diff(previous, result, shape['fields'])
+    else:
+        result = apply_shape(result, **shape)
+    result = {**result, 'usage': usage.report()}
+    if data.get('timings'):
+        result['timings'] = timings.report()
+    return _json(request, result)
+
+
+async def evaluate_stream(request):
+    """Evaluate a location, streaming each section as Server-Sent Events"""
+    data = await _json_body(request)
+
+    if not data or 'location' not in data:
+        return JSONResponse({'error': 'Location is required'}, status_code=400)
+    try:
+        fields, limit = parse_fields(data.get('fields')), parse_limit(data.get('limit'))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    args = parse_evaluation_request(data)
+
+    async def generate():
+        with track_usage() as usage:
+            async for event, payload in locale_async.iter_evaluation(**args):
+                if event == 'amenity' and (fields is not None or limit is not None):
+                    payload = {**payload, 'data': shape_amenity(payload['data'], fields, limit)}
+                if event == 'done':
+                    payload = {**payload, 'usage': usage.report()}
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    return StreamingResponse(generate(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+async def evaluate_batch(request):
+    """Evaluate many locations as JSON lines; the batch runner keeps its own thread pool"""
+    try:
+        items = parse_batch_request(await _json_body(request))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    def generate():
+        for record in run_batch(items):
+            yield json.dumps(record) + '\n'
+
+    return StreamingResponse(iterate_in_threadpool(generate()), media_type='application/x-ndjson',
+                             headers={'X-Accel-Buffering': 'no'})
+
+
+async def search(request):
+    """Find areas meeting amenity/climate thresholds; the grid scan runs on the upstream thread pool"""
+    try:
+        args = parse_search_request(await _json_body(request))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    def run():
+        with track_usage() as usage:
+            return {**search_region(**args), 'usage': usage.report()}
+
+    try:
+        return _json(request, await run_in_threadpool(run))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+
+async def compare(request):
+    """Compare several locations side by side; the evaluations run on worker threads"""
+    data = await _json_body(request)
+    try:
+        args = parse_compare_request(data)
+        shape = parse_shape(data)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    def run():
+        with track_usage() as usage:
+            return {**shape_comparison(compare_locations(**args), shape), 'usage': usage.report()}
+
+    try:
+        return _json(request, await run_in_threadpool(run))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+
+async def http_error(request, exc):
+    if exc.status_code == 404:
+        return JSONResponse({'error': 'Endpoint not found'}, status_code=404)
+    return JSONResponse({'error': exc.detail}, status_code=exc.status_code)
+
+
+async def internal_error(request, exc):
+    return JSONResponse({'error': 'Internal server error'}, status_code=500)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    start_snapshot_refresher()
+    yield
+    await locale_async.upstream.aclose()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/health', health_check, methods=['GET']),
+        Route('/api/config', get_config, methods=['GET']),
+        Route('/api/criteria', get_criteria, methods=['GET']),
+        Route('/api/autocomplete', autocomplete, methods=['GET']),
+        Route('/api/reverse-geocode', reverse_geocode_endpoint, methods=['GET']),
+        Route('/api/metrics', metrics, methods=['GET']),
+        Route('/api/evaluate', evaluate, methods=['POST']),
+        Route('/api/evaluate/stream', evaluate_stream, methods=['POST']),
+        Route('/api/evaluate/batch', evaluate_batch, methods=['POST']),
+        Route('/api/search', search, methods=['POST']),
+        Route('/api/compare', compare, methods=['POST']),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    exception_handlers={HTTPException: http_error, 500: internal_error},
+    lifespan=lifespan,
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("Starting Locale API server (async)...")
+    print("\nServer running on http://localhost:5001")
+    uvicorn.run(app, host='0.0.0.0', port=5001)
@@ -0,0 +1,235 @@
+"""
+Offline benchmark for the evaluation path
+Drives evaluate_location (in process) or a running server's /api/evaluate at
+a fixed concurrency against the stub upstream, and times _build_place_list
+and get_climate_data directly. Reports throughput, p50/p95/p99 latency and
+upstream calls per evaluation, and can fail on regression against a saved
+baseline.
+
+    python bench/run_bench.py --evaluations 200 --concurrency 8 --latency-ms 80
+    python bench/run_bench.py --json bench_result.json
+    python bench/run_bench.py --baseline bench_result.json --tolerance 0.2
+    python bench/run_bench.py --target http://localhost:5001 --stub-url http://127.0.0.1:8765
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from stub_upstream import StubUpstream, serve, stub_env  # noqa: E402
+
+DEFAULT_LOCATIONS = [
+    'Austin, TX', 'Denver, CO', 'Portland, OR', 'Raleigh, NC', 'Boise, ID', 'Madison, WI',
+    'Asheville, NC', 'Tucson, AZ', 'Burlington, VT', 'Ann Arbor, MI', 'Chattanooga, TN',
+    'Santa Fe, NM', 'Spokane, WA', 'Savannah, GA', 'Boulder, CO', 'Richmond, VA',
+]
+RADII = [1, 3, 5]
+
+# Metrics compared against a baseline, and whether higher is better
+COMPARED = {'throughput_per_s': True, 'p95_ms': False, 'upstream_calls_per_eval': False}
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def workload(n: int, locations, criteria, seed: int = 0) -> list:
+    """n evaluation argument dicts cycling through locations and radii."""
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        items.append({
+            'location': locations[i % len(locations)],
+            'radius_miles': RADII[(i // len(locations)) % len(RADII)],
+            'selected_criteria': criteria,
+            'custom_amenities': ['Starbucks'] if rng.random() < 0.25 else [],
+        })
+    return items
+
+
+def run_evaluations(items, concurrency: int, evaluate):
+    """Run evaluate(item) -> upstream calls for every item; returns (latencies, calls, wall seconds)."""
+    latencies, calls = [], []
+
+    def one(item):
+        start = time.perf_counter()
+        n = evaluate(item)
+        return time.perf_counter() - start, n
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, n in pool.map(one, items):
+            latencies.append(latency)
+            calls.append(n)
+    return latencies, calls, time.perf_counter() - start
+
+
+def backend_evaluator():
+    from locale_backend import evaluate_location
+    from locale_quota import track_usage
+
+    def evaluate(item):
+        with track_usage() as usage:
+            evaluate_location(**item)
+        return sum(usage.report()['upstream_calls'].values())
+    return evaluate
+
+
+def http_evaluator(base_url: str):
+    session = requests.Session()
+
+    def evaluate(item):
+        body = {
+            'location': item['location'],
+            'radius_miles': item['radius_miles'],
+            'criteria': item['selected_criteria'],
+            'custom_amenities': item['custom_amenities'],
+        }
+        response = session.post(f"{base_url.rstrip('/')}/api/evaluate", json=body, timeout=60)
+        usage = response.json().get('usage', {})
+        return sum(usage.get('upstream_calls', {}).values())
+    return evaluate
+
+
+def micro_benchmarks(repeat: int = 200) -> dict:
+    """Per-call microseconds for _build_place_list and a warm get_climate_data."""
+    from locale_backend import _build_place_list, climate_store, get_climate_data
+
+    rng = random.Random(1)
+    results = {}
+    for n in (20, 200, 2000):
+        places = [{
+            'displayName': {'text': f'Place {i}'},
+            'location': {'latitude': 30.27 + rng.uniform(-0.1, 0.1), 'longitude': -97.74 + rng.uniform(-0.1, 0.1)},
+            'rating': 4.2,
+            'googleMapsUri': 'https://maps.google.com/?cid=1',
+        } for i in range(n)]
+        runs = max(5, repeat * 20 // n)
+        start = time.perf_counter()
+        for _ in range(runs):
+            _build_place_list(places, 30.27, -97.74, 5)
+        results[f'build_place_list_{n}_us'] = round((time.perf_counter() - start) / runs * 1e6, 1)
+
+    get_climate_data(30.27, -97.74)  # fill the store or cache for this cell
+    start = time.perf_counter()
+    for _ in range(repeat):
+        get_climate_data(30.27, -97.74)
+    key = 'climate_store_hit_us' if climate_store is not None else 'climate_cache_hit_us'
+    results[key] = round((time.perf_counter() - start) / repeat * 1e6, 1)
+    return results
+
+
+def summarize(latencies, calls, wall: float) -> dict:
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        'evaluations': len(latencies),
+        'throughput_per_s': round(len(latencies) / wall, 2) if wall else 0.0,
+        'mean_ms': round(statistics.mean(ms), 1) if ms else 0.0,
+        'p50_ms': round(percentile(ms, 50), 1),
+        'p95_ms': round(percentile(ms, 95), 1),
+        'p99_ms': round(percentile(ms, 99), 1),
+        'upstream_calls_per_eval': round(sum(calls) / len(calls), 2) if calls else 0.0,
+    }
+
+
+def regressions(result: dict, baseline: dict, tolerance: float) -> list:
+    """Metrics that moved the wrong way by more than tolerance (a fraction)."""
+    found = []
+    for metric, higher_is_better in COMPARED.items():
+        old, new = baseline.get(metric), result.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            found.append(f'{metric}: {old} -> {new} ({change:+.0%})')
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark evaluations against a stub upstream.')
+    parser.add_argument('--target', default='backend',
+                        help="'backend' to call evaluate_location in process, or a server URL")
+    parser.add_argument('--evaluations', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--criteria', help='comma-separated criteria (defaults to all)')
+    parser.add_argument('--locations', help='file with one location per line')
+    parser.add_argument('--stub-url', help='use an already running stub instead of starting one')
+    parser.add_argument('--fixtures', nargs='*', default=[], help='JSONL fixtures for the started stub')
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--jitter-ms', type=float, default=30)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--cache', action='store_true', help='keep the response cache on (default: cold runs)')
+    parser.add_argument('--quota', action='store_true', help='keep upstream rate limits on')
+    parser.add_argument('--json', metavar='PATH', help='write the results as JSON (usable as a baseline)')
+    parser.add_argument('--baseline', metavar='PATH', help='exit non-zero if results regress against this JSON')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args(argv)
+
+    stub = None
+    stub_url = args.stub_url
+    if stub_url is None:
+        stub = StubUpstream(args.fixtures, args.latency_ms, args.jitter_ms, args.error_rate)
+        stub_url = serve(stub).url
+
+    if args.target == 'backend':
+        # Settings are read at import time, so set them before importing the backend
+        os.environ.update(stub_env(stub_url))
+        os.environ.setdefault('GOOGLE_MAPS_API_KEY', 'bench')
+        os.environ['LOCALE_CLIMATE_STORE'] = os.path.join(tempfile.mkdtemp(), 'climate.sqlite3')
+        if not args.cache:
+            os.environ['LOCALE_CACHE_BACKEND'] = 'none'
+        if not args.quota:
+            for endpoint in ('PLACES_NEARBY', 'PLACES_TEXT', 'GEOCODE', 'AUTOCOMPLETE', 'OPEN_METEO'):
+                os.environ[f'LOCALE_QUOTA_{endpoint}_QPS'] = '0'
+        evaluate = backend_evaluator()
+    else:
+        evaluate = http_evaluator(args.target)
+
+    locations = DEFAULT_LOCATIONS
+    if args.locations:
+        with open(args.locations) as f:
+            locations = [line.strip() for line in f if line.strip()]
+    criteria = [c.strip() for c in args.criteria.split(',')] if args.criteria else None
+    items = workload(args.evaluations, locations, criteria)
+
+    latencies, calls, wall = run_evaluations(items, args.concurrency, evaluate)
+    result = summarize(latencies, calls, wall)
+    result['concurrency'] = args.concurrency
+    if stub is not None:
+        result['stub_requests'] = stub.stats()
+    if args.target == 'backend':
+        result['micro'] = micro_benchmarks()
+
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(result, json.load(f), args.tolerance)
+        if found:
+            print('Regressions:\n  ' + '\n  '.join(found), file=sys.stderr)
+            sys.exit(1)
+        print('No regressions against baseline', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
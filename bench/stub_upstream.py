@@ -0,0 +1,336 @@
+"""
+Stub upstream for benchmarks
+Serves the Google Geocoding, Places (nearby and text search), Autocomplete and
+Open-Meteo archive endpoints from recorded fixtures, with configurable
+injected latency and error rate. Requests without a recording get a
+deterministic synthetic response: places come from a fixed pseudo-random
+field, so overlapping searches see the same places, as with the real API.
+
+    python bench/stub_upstream.py --port 8765 --latency-ms 80 --error-rate 0.01
+    python bench/stub_upstream.py --fixtures bench/fixtures/*.jsonl
+
+Record fixtures by proxying to the real APIs (needs GOOGLE_MAPS_API_KEY in the
+backend's environment, which it sends with each request):
+
+    python bench/stub_upstream.py --record bench/fixtures/recorded.jsonl
+
+Point the backend at the stub with stub_env() (run_bench.py does this).
+"""
+import sys
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import functools
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+# endpoint -> (path served by the stub, backend setting, real URL)
+ENDPOINTS = {
+    'places_nearby': ('/v1/places:searchNearby', 'LOCALE_PLACES_NEARBY_URL',
+                      'https://places.googleapis.com/v1/places:searchNearby'),
+    'places_text': ('/v1/places:searchText', 'LOCALE_PLACES_TEXT_URL',
+                    'https://places.googleapis.com/v1/places:searchText'),
+    'geocode': ('/maps/api/geocode/json', 'LOCALE_GEOCODING_URL',
+                'https://maps.googleapis.com/maps/api/geocode/json'),
+    'autocomplete': ('/maps/api/place/autocomplete/json', 'LOCALE_AUTOCOMPLETE_URL',
+                     'https://maps.googleapis.com/maps/api/place/autocomplete/json'),
+    'open_meteo': ('/v1/archive', 'LOCALE_METEO_URL', 'https://archive-api.open-meteo.com/v1/archive'),
+}
+_BY_PATH = {path: endpoint for endpoint, (path, _, _) in ENDPOINTS.items()}
+
+# Request fields that do not change the response
+_IGNORED_PARAMS = {'key', 'sessiontoken'}
+
+# Synthetic place field: places per type per 0.01-degree cell (~1 km²)
+FIELD_CELL_DEGREES = 0.01
+DEFAULT_DENSITY = 1.5
+TYPE_DENSITY = {'airport': 0.0004, 'brewery': 0.1, 'hardware_store': 0.2, 'home_improvement_store': 0.1}
+
+
+def stub_env(base_url: str) -> dict:
+    """Backend settings pointing every upstream endpoint at a stub."""
+    return {setting: base_url.rstrip('/') + path for path, setting, _ in ENDPOINTS.values()}
+
+
+def request_key(endpoint: str, params: dict, body) -> str:
+    """Canonical identity of an upstream request, for fixture lookup."""
+    params = {k: v for k, v in params.items() if k not in _IGNORED_PARAMS}
+    return json.dumps([endpoint, params, body], sort_keys=True, separators=(',', ':'))
+
+
+def _seed(*parts) -> int:
+    return int.from_bytes(hashlib.sha1(repr(parts).encode()).digest()[:8], 'big')
+
+
+def _miles(lat1, lng1, lat2, lng2) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 2 * 3958.8 * math.asin(min(1.0, math.sqrt(a)))
+
+
+@functools.lru_cache(maxsize=200000)
+def _cell_places(cell_lat: int, cell_lng: int, place_type: str) -> tuple:
+    rng = random.Random(_seed(cell_lat, cell_lng, place_type))
+    density = TYPE_DENSITY.get(place_type, DEFAULT_DENSITY)
+    count = int(density) + (1 if rng.random() < density - int(density) else 0)
+    places = []
+    for i in range(count):
+        lat = (cell_lat + rng.random()) * FIELD_CELL_DEGREES
+        lng = (cell_lng + rng.random()) * FIELD_CELL_DEGREES
+        place_id = f'{place_type}-{cell_lat}-{cell_lng}-{i}'
+        places.append({
+            'id': place_id,
+            'displayName': {'text': f"{place_type.replace('_', ' ').title()} {abs(_seed(place_id)) % 10000}"},
+            'location': {'latitude': round(lat, 7), 'longitude': round(lng, 7)},
+            'rating': round(rng.uniform(3.0, 5.0), 1),
+            'types': [place_type, 'point_of_interest', 'establishment'],
+            'googleMapsUri': f'https://maps.google.com/?cid={_seed(place_id) % 10 ** 18}',
+        })
+    return tuple(places)
+
+
+def _places_in_circle(lat: float, lng: float, radius_meters: float, types: list) -> list:
+    radius_miles = radius_meters / 1609.34
+    dlat = radius_meters / 111320.0
+    dlng = dlat / max(0.01, math.cos(math.radians(lat)))
+    found = {}
+    for cell_lat in range(math.floor((lat - dlat) / FIELD_CELL_DEGREES), math.floor((lat + dlat) / FIELD_CELL_DEGREES) + 1):
+        for cell_lng in range(math.floor((lng - dlng) / FIELD_CELL_DEGREES),
+                              math.floor((lng + dlng) / FIELD_CELL_DEGREES) + 1):
+            for place_type in types:
+                for place in _cell_places(cell_lat, cell_lng, place_type):
+                    loc = place['location']
+                    distance = _miles(lat, lng, loc['latitude'], loc['longitude'])
+                    if distance <= radius_miles:
+                        found[place['id']] = (distance, place)
+    return list(found.values())
+
+
+def synthesize(endpoint: str, params: dict, body) -> dict:
+    """Deterministic stand-in response for a request with no recording."""
+    if endpoint == 'places_nearby':
+        circle = body['locationRestriction']['circle']
+        hits = _places_in_circle(circle['center']['latitude'], circle['center']['longitude'],
+                                 circle['radius'], body.get('includedTypes', []))
+        if body.get('rankPreference') == 'DISTANCE':
+            hits.sort(key=lambda hit: hit[0])
+        else:
+            hits.sort(key=lambda hit: (-hit[1]['rating'], hit[0]))
+        return {'places': [place for _, place in hits[:body.get('maxResultCount', 20)]]}
+
+    if endpoint == 'places_text':
+        circle = body['locationBias']['circle']
+        rng = random.Random(_seed(body['textQuery'].lower()))
+        lat, lng = circle['center']['latitude'], circle['center']['longitude']
+        places = []
+        for i in range(rng.randint(0, 20)):
+            place_id = f"text-{_seed(body['textQuery'].lower()) % 10 ** 6}-{i}"
+            places.append({
+                'id': place_id,
+                'displayName': {'text': f"{body['textQuery']} #{i + 1}"},
+                'location': {'latitude': lat + rng.uniform(-0.05, 0.05), 'longitude': lng + rng.uniform(-0.05, 0.05)},
+                'rating': round(rng.uniform(3.0, 5.0), 1),
+                'types': ['store', 'point_of_interest', 'establishment'],
+                'googleMapsUri': f'https://maps.google.com/?cid={_seed(place_id) % 10 ** 18}',
+            })
+        return {'places': places}
+
+    if endpoint == 'geocode':
+        if 'latlng' in params:
+            return {'status': 'OK', 'results': [{'formatted_address': f"{params['latlng']} (stub address)"}]}
+        address = ' '.join(params.get('address', '').split())
+        rng = random.Random(_seed(address.lower()))
+        # Somewhere in the contiguous US
+        return {'status': 'OK', 'results': [{
+            'formatted_address': f'{address.title()}, USA',
+            'geometry': {'location': {'lat': round(rng.uniform(30.0, 47.0), 6),
+                                      'lng': round(rng.uniform(-122.0, -75.0), 6)}},
+        }]}
+
+    if endpoint == 'autocomplete':
+        text = params.get('input', '')
+        return {'status': 'OK', 'predictions': [
+            {'description': f'{text}{suffix}'} for suffix in (' Street, Austin, TX, USA', ' Avenue, Denver, CO, USA',
+                                                             ', Portland, OR, USA', ' Road, Raleigh, NC, USA',
+                                                             ' Lane, Boise, ID, USA')
+        ]}
+
+    if endpoint == 'open_meteo':
+        lat = float(params['latitude'])
+        start = date.fromisoformat(params['start_date'])
+        end = date.fromisoformat(params['end_date'])
+        rng = random.Random(_seed(params['latitude'], params['longitude']))
+        times, tmax, tmin, precip = [], [], [], []
+        day = start
+        while day <= end:
+            season = math.cos(2 * math.pi * (day.timetuple().tm_yday - 200) / 365.25)
+            mean = 95 - 1.1 * abs(lat) + 20 * season
+            times.append(day.isoformat())
+            tmax.append(round(mean + 10 + rng.uniform(-5, 5), 1))
+            tmin.append(round(mean - 10 + rng.uniform(-5, 5), 1))
+            precip.append(round(max(0.0, rng.expovariate(4) - 0.15), 2))
+            day += timedelta(days=1)
+        return {'daily': {'time': times, 'temperature_2m_max': tmax,
+                          'temperature_2m_min': tmin, 'precipitation_sum': precip}}
+
+    raise KeyError(endpoint)
+
+
+class StubUpstream:
+    """Fixture store, fault injection and per-endpoint counters for one stub server."""
+
+    def __init__(self, fixtures=None, latency_ms: float = 0, jitter_ms: float = 0,
+                 error_rate: float = 0, strict: bool = False, record_path: str = None,
+                 retry_after: float = None):
+        self.fixtures = {}
+        for path in fixtures or []:
+            self.load(path)
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.retry_after = retry_after  # Retry-After seconds sent with injected failures
+        self.strict = strict
+        self.record_path = record_path
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: str):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.fixtures[request_key(entry['endpoint'], entry['params'], entry['body'])] = entry['response']
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+
+    def respond(self, endpoint: str, params: dict, body, headers: dict):
+        """(status, response JSON) for one upstream request."""
+        with self._lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+        if self.error_rate and random.random() < self.error_rate:
+            return random.choice((429, 503)), {'error': {'message': 'injected failure'}}
+
+        if self.record_path:
+            return self._record(endpoint, params, body, headers)
+
+        recorded = self.fixtures.get(request_key(endpoint, params, body))
+        if recorded is not None:
+            return 200, recorded
+        if self.strict:
+            return 404, {'error': {'message': 'no fixture for request'}}
+        return 200, synthesize(endpoint, params, body)
+
+    def _record(self, endpoint, params, body, headers):
+        url = ENDPOINTS[endpoint][2]
+        forward = {k: v for k, v in headers.items() if k.lower().startswith('x-goog-')}
+        if body is None:
+            response = requests.get(url, params=params, headers=forward, timeout=30)
+        else:
+            response = requests.post(url, json=body, headers=forward, timeout=30)
+        data = response.json()
+        if response.ok:
+            entry = {'endpoint': endpoint,
+                     'params': {k: v for k, v in params.items() if k not in _IGNORED_PARAMS},
+                     'body': body, 'response': data}
+            with self._lock, open(self.record_path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+        return response.status_code, data
+
+
+def make_handler(stub: StubUpstream):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, data):
+            payload = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            if status in (429, 503) and stub.retry_after is not None:
+                self.send_header('Retry-After', str(int(stub.retry_after)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _handle(self, body):
+            url = urlsplit(self.path)
+            if url.path == '/__stats':
+                return self._send(200, stub.stats())
+            if url.path == '/__reset':
+                stub.reset()
+                return self._send(200, {})
+            endpoint = _BY_PATH.get(url.path)
+            if endpoint is None:
+                return self._send(404, {'error': {'message': f'unknown path {url.path}'}})
+            status, data = stub.respond(endpoint, dict(parse_qsl(url.query)), body, dict(self.headers))
+            self._send(status, data)
+
+        def do_GET(self):
+            self._handle(None)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            self._handle(json.loads(raw) if raw else None)
+
+    return Handler
+
+
+def serve(stub: StubUpstream, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """Start the stub on a background thread; the bound URL is server.url."""
+    server = ThreadingHTTPServer((host, port), make_handler(stub))
+    server.daemon_threads = True
+    server.url = f'http://{host}:{server.server_address[1]}'
+    threading.Thread(target=server.serve_forever, name='stub-upstream', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve recorded or synthetic upstream API responses.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fixtures', nargs='*', default=[], help='JSONL fixture files to replay')
+    parser.add_argument('--strict', action='store_true', help='404 requests with no fixture instead of synthesizing')
+    parser.add_argument('--latency-ms', type=float, default=0, help='added to every response')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='uniform random extra latency')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of requests answered 429/503')
+    parser.add_argument('--retry-after', type=float, help='Retry-After seconds sent with injected failures')
+    parser.add_argument('--record', metavar='PATH', help='proxy to the real APIs and append fixtures to PATH')
+    args = parser.parse_args(argv)
+
+    stub = StubUpstream(args.fixtures, args.latency_ms, args.jitter_ms, args.error_rate,
+                        args.strict, args.record, args.retry_after)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(stub))
+    server.daemon_threads = True
+    base_url = f'http://{args.host}:{args.port}'
+    print(f"Stub upstream on {base_url} ({len(stub.fixtures)} fixture(s))", file=sys.stderr)
+    print('Backend settings:', file=sys.stderr)
+    for setting, url in stub_env(base_url).items():
+        print(f'  {setting}={url}', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useRef } from 'react';
-import { fetchCriteria, evaluateLocation } from './api';
+import { fetchCriteria, evaluateLocationStream } from './api';
 import { filterRestaurantsByRating } from './utils/amenityUtils';
 import LocationMap from './components/map/LocationMap';
 import LocationInput from './components/LocationInput';
@@ -111,8 +111,21 @@ export default function App() {
     setLoading(true);
     setError(null);
     try {
-      const data = await evaluateLocation({ location, radius, selectedCriteria, customAmenities });
-      setReport(data);
+      // Render progressively: the report appears once the location is geocoded
+      // and each section fills in as the backend streams it.
+      let partial = null;
+      await evaluateLocationStream({ location, radius, selectedCriteria, customAmenities }, (event, payload) => {
+        if (event === 'error') throw new Error(payload.error);
+        if (event === 'location') {
+          partial = { ...payload, amenities: {}, climate: null, transportation: null };
+          setLoading(false);
+        } else if (event === 'amenity') {
+          partial = { ...partial, amenities: { ...partial.amenities, [payload.key]: payload.data } };
+        } else if (event === 'climate' || event === 'transportation') {
+          partial = { ...partial, [event]: payload };
+        }
+        if (partial) setReport(partial);
+      });
     } catch (err) {
       setError(err.message || 'Network error - is the API server running?');
     } finally {
@@ -22,20 +22,59 @@ export async function fetchCriteria() {
   return res.json();
 }
 
-export async function evaluateLocation({ location, radius, selectedCriteria, customAmenities }) {
+function evaluationBody({ location, radius, selectedCriteria, customAmenities }) {
   const filledCustom = customAmenities.filter(a => a.trim() !== '');
+  return JSON.stringify({
+    location,
+    radius_miles: parseFloat(radius),
+    criteria: Array.from(selectedCriteria),
+    custom_amenities: filledCustom,
+    restaurant_min_rating: 0,
+  });
+}
+
+export async function evaluateLocation(params) {
   const res = await fetch(`${API_BASE}/evaluate`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({
-      location,
-      radius_miles: parseFloat(radius),
-      criteria: Array.from(selectedCriteria),
-      custom_amenities: filledCustom,
-      restaurant_min_rating: 0,
-    }),
+    body: evaluationBody(params),
   });
   const data = await res.json();
   if (!res.ok) throw new Error(data.error || 'Failed to evaluate location');
   return data;
 }
+
+// Streams /evaluate/stream Server-Sent Events, calling onEvent(event, payload)
+// for each section (location, amenity, climate, transportation, done, error).
+export async function evaluateLocationStream(params, onEvent) {
+  const res = await fetch(`${API_BASE}/evaluate/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: evaluationBody(params),
+  });
+  if (!res.ok) {
+    const data = await res.json();
+    throw new Error(data.error || 'Failed to evaluate location');
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const message = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = 'message';
+      let data = '';
+      message.split('\n').forEach(line => {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      });
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+}
@@ -30,7 +30,10 @@ export default function ReportPanel({ report, expandedSections, onToggleSection,
             <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M19 9l-7 7-7-7" />
           </svg>
         </button>
-        {expandedSections.has('climate') && (
+        {expandedSections.has('climate') && !report.climate && (
+          <p className="text-sm text-gray-500">Loading climate data...</p>
+        )}
+        {expandedSections.has('climate') && report.climate && (
           <div className="space-y-3">
             <TemperatureRow
               annual={report.climate.avg_temp_f}
@@ -51,7 +54,9 @@ export default function ReportPanel({ report, expandedSections, onToggleSection,
         <div className="space-y-3">
           <MetricRow
             label="Nearest Airport"
-            value={`${report.transportation.nearest_airport} — ${report.transportation.airport_distance}`}
+            value={report.transportation
+              ? `${report.transportation.nearest_airport} — ${report.transportation.airport_distance}`
+              : 'Loading...'}
           />
         </div>
       </div>
@@ -0,0 +1,134 @@
+"""
+Locale Airports - offline nearest-airport index
+Loads an OurAirports-style airports.csv into a k-d tree over unit-sphere
+coordinates and answers nearest-N queries with great-circle distances at any
+range, with no upstream call. Get the public-domain data with:
+
+    curl -o data/airports.csv https://davidmegginson.github.io/ourairports-data/airports.csv
+"""
+import os
+import csv
+import math
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+from locale_geo import haversine_miles
+
+_DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'airports.csv')
+AIRPORTS_CSV = os.environ.get('LOCALE_AIRPORTS_CSV', _DEFAULT_CSV)
+# OurAirports 'type' values to keep, and whether to require scheduled airline service
+AIRPORT_TYPES = set(os.environ.get('LOCALE_AIRPORT_TYPES', 'large_airport,medium_airport').split(','))
+AIRPORT_SCHEDULED_ONLY = os.environ.get('LOCALE_AIRPORT_SCHEDULED_ONLY', '1') == '1'
+
+
+def _to_xyz(lat: float, lng: float) -> Tuple[float, float, float]:
+    phi = math.radians(lat)
+    lmb = math.radians(lng)
+    return math.cos(phi) * math.cos(lmb), math.cos(phi) * math.sin(lmb), math.sin(phi)
+
+
+class _Node:
+    __slots__ = ('point', 'index', 'axis', 'left', 'right')
+
+    def __init__(self, point, index, axis, left, right):
+        self.point = point
+        self.index = index
+        self.axis = axis
+        self.left = left
+        self.right = right
+
+
+class AirportIndex:
+    """Static k-d tree of airports.
+
+    Points live on the unit sphere in 3-D, where straight-line (chord)
+    distance orders points exactly like great-circle distance, so nearest
+    neighbours are correct everywhere, including near the poles and the
+    antimeridian.
+    """
+
+    def __init__(self, airports: List[Dict]):
+        self.airports = airports
+        points = [(_to_xyz(a['lat'], a['lng']), i) for i, a in enumerate(airports)]
+        self._root = self._build(points, 0)
+
+    def __len__(self):
+        return len(self.airports)
+
+    def _build(self, points, depth) -> Optional[_Node]:
+        if not points:
+            return None
+        axis = depth % 3
+        points.sort(key=lambda p: p[0][axis])
+        mid = len(points) // 2
+        point, index = points[mid]
+        return _Node(point, index, axis,
+                     self._build(points[:mid], depth + 1),
+                     self._build(points[mid + 1:], depth + 1))
+
+    def nearest(self, lat: float, lng: float, n: int = 1,
+                max_miles: Optional[float] = None) -> List[Tuple[Dict, float]]:
+        """Up to n (airport, distance_miles) pairs, nearest first."""
+        target = _to_xyz(lat, lng)
+        best = []  # max-heap of (-chord², index)
+
+        def search(node):
+            if node is None:
+                return
+            d2 = sum((a - b) ** 2 for a, b in zip(target, node.point))
+            if len(best) < n:
+                heapq.heappush(best, (-d2, node.index))
+            elif d2 < -best[0][0]:
+                heapq.heapreplace(best, (-d2, node.index))
+            diff = target[node.axis] - node.point[node.axis]
+            near, far = (node.left, node.right) if diff < 0 else (node.right, node.left)
+            search(near)
+            if len(best) < n or diff * diff < -best[0][0]:
+                search(far)
+
+        search(self._root)
+        results = []
+        for _, index in sorted(best, reverse=True):
+            airport = self.airports[index]
+            distance = haversine_miles(lat, lng, airport['lat'], airport['lng'])
+            if max_miles is None or distance <= max_miles:
+                results.append((airport, distance))
+        return results
+
+
+def load_airports(path: str = AIRPORTS_CSV, types=None, scheduled_only: bool = None) -> List[Dict]:
+    """Read airports from an OurAirports airports.csv (or any CSV with the same columns)."""
+    types = AIRPORT_TYPES if types is None else types
+    scheduled_only = AIRPORT_SCHEDULED_ONLY if scheduled_only is None else scheduled_only
+    airports = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if types and row.get('type') not in types:
+                continue
+            if scheduled_only and row.get('scheduled_service', 'yes') != 'yes':
+                continue
+            try:
+                lat = float(row['latitude_deg'])
+                lng = float(row['longitude_deg'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            airports.append({
+                'name': row.get('name', 'Unknown'),
+                'iata': row.get('iata_code') or None,
+                'type': row.get('type'),
+                'lat': lat,
+                'lng': lng,
+            })
+    return airports
+
+
+def load_index_from_env() -> Optional[AirportIndex]:
+    """Airport index from LOCALE_AIRPORTS_CSV, or None when the file is absent."""
+    if not os.path.exists(AIRPORTS_CSV):
+        return None
+    try:
+        airports = load_airports(AIRPORTS_CSV)
+    except (OSError, csv.Error) as e:
+        print(f"Airport data error ({AIRPORTS_CSV}): {e}")
+        return None
+    return AirportIndex(airports) if airports else None
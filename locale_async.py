@@ -0,0 +1,548 @@
+"""
+Locale Async - asyncio versions of the backend lookups
+Used by asgi_server.py so one process can hold hundreds of evaluations while
+they wait on upstream I/O. Requests, response parsing, cache keys, the
+response cache and the evaluation task plan are shared with locale_backend;
+only the transport (httpx) and the scheduling (asyncio tasks instead of the
+upstream thread pool) differ. Calls into SQLite-backed stores (a disk response
+cache, climate normals, the Places snapshot, shared quota buckets and the
+shared evaluation flight) run on worker threads so they never block the loop.
+"""
+import os
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+
+import locale_backend as backend
+from locale_backend import (
+    CLIMATE_NORMAL_YEARS, CLIMATE_STORE_LAZY, CRITERIA_MAP, EVALUATION_DEADLINE_SECONDS,
+    COVERAGE_REQUEST_BUDGET, UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT, UPSTREAM_RETRIES,
+    UPSTREAM_BACKOFF_FACTOR, AIRPORT_PLACES_FALLBACK, DeadlineExceeded, UpstreamClient, RequestBudget,
+    airport_index, autocomplete_cache, climate_store, deadline_time_left, evaluation_flight, quota, response_cache,
+    retry_delay_cap,
+    _UPSTREAM_ENDPOINTS, _airport_request, _assemble_evaluation, _autocomplete_request,
+    _calculate_distance_miles,
+    _climate_request, _evaluation_key, _evaluation_tasks, _exact_search_key, _expand_result,
+    _expand_timed_out, _filter_places_by_type, _geocode_request, _location_event,
+    _nearby_request, _normalize_query, _parse_airport, _parse_autocomplete, _parse_climate_daily,
+    _parse_geocode, _parse_nearby, _parse_reverse_geocode, _parse_text_search,
+    _rank_preference, _result_event, _reverse_geocode_request, _text_search_request, _tile_search, _timed_out_result,
+    _unbatched_tasks, _build_place_list, _snapshot_search, _task_label, _complete_miles, _superset_places,
+    _superset_radius, _trim_text_search, _within_superset, _tile_density, _set_tile_density,
+    _remember_area_count, _text_search_radius, _remember_text_search,
+)
+from locale_cache import SharedSingleFlight
+from locale_climate import normals_period, summarize_daily
+from locale_metrics import EVALUATION_TIMEOUTS, span, upstream_span
+from locale_quota import QuotaExceeded, record_call
+
+# Keep-alive connections per upstream host; much higher than the thread-pool
+# default because waiting requests only cost a socket, not a thread
+ASYNC_POOL_SIZE = int(os.environ.get('LOCALE_ASYNC_POOL_SIZE', '100'))
+
+
+class AsyncUpstreamClient:
+    """httpx counterpart of UpstreamClient with the same timeout and retry policy.
+
+    Connection failures are retried by the transport; 429/5xx responses are
+    retried here with exponential backoff, honoring Retry-After up to
+    retry_delay_cap() and failing at once when asked to wait longer.
+    """
+
+    RETRY_STATUSES = UpstreamClient.RETRY_STATUSES
+
+    def __init__(self, pool_size: int = ASYNC_POOL_SIZE,
+                 connect_timeout: float = UPSTREAM_CONNECT_TIMEOUT,
+                 read_timeout: float = UPSTREAM_READ_TIMEOUT,
+                 retries: int = UPSTREAM_RETRIES,
+                 backoff_factor: float = UPSTREAM_BACKOFF_FACTOR):
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the server's event loop
+        if self._client is None:
+            transport = httpx.AsyncHTTPTransport(retries=self.retries, limits=self.limits)
+            self._client = httpx.AsyncClient(transport=transport, timeout=self.timeout)
+        return self._client
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff_factor * (2 ** attempt)
+
+    async def request_json(self, method: str, url: str, **kwargs):
+        """Send a request and return the decoded JSON body; raises on HTTP errors."""
+        client = self._get_client()
+        for attempt in range(self.retries + 1):
+            response = await client.request(method, url, **kwargs)
+            if response.status_code in self.RETRY_STATUSES and attempt < self.retries:
+                delay = self._retry_delay(response, attempt)
+                if delay <= retry_delay_cap():
+                    await asyncio.sleep(delay)
+                    continue
+            response.raise_for_status()
+            return response.json()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent coroutines that share a key into one task.
+
+    Waiters are shielded from each other: a cancelled caller (a client that
+    disconnected, or a missed deadline) does not cancel the shared work.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+
+    async def do(self, key, fn):
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return await asyncio.shield(task)
+
+
+upstream = AsyncUpstreamClient()
+_flight = AsyncSingleFlight()
+
+
+async def _cache_io(fn, *args, **kwargs):
+    """fn(*args, **kwargs) for a call that reads or writes the response cache.
+
+    Runs on a worker thread when the cache is SQLite-backed, inline otherwise.
+    """
+    if response_cache.on_disk:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
+
+
+async def _request(spec):
+    method, url, kwargs = spec
+    endpoint = _UPSTREAM_ENDPOINTS[url]
+    await quota.acquire_async(endpoint, max_wait=deadline_time_left())
+    record_call(endpoint)
+    with upstream_span(endpoint):
+        return await upstream.request_json(method, url, **kwargs)
+
+
+async def _cached(namespace: str, key_parts, fetch):
+    """Async ResponseCache.get_or_fetch; concurrent misses for a key share one fetch."""
+    value = await _cache_io(response_cache.get, namespace, key_parts)
+    if value is not None:
+        return value
+
+    async def load():
+        value = await fetch()
+        await _cache_io(response_cache.set, namespace, key_parts, value)
+        return value
+
+    return await _flight.do(response_cache.make_key(namespace, key_parts), load)
+
+
+async def autocomplete_places(input_text: str, session_token: str = None) -> list:
+    """Async autocomplete_places, sharing its per-prefix suggestion cache."""
+    try:
+        suggestions = await _cache_io(autocomplete_cache.cached, input_text)
+        if suggestions is not None:
+            return suggestions
+
+        async def fetch():
+            data = await _request(_autocomplete_request(input_text, session_token))
+            suggestions = _parse_autocomplete(data)
+            await _cache_io(autocomplete_cache.store, input_text, suggestions)
+            return suggestions
+
+        with span('autocomplete'):
+            return list(await _flight.do(('autocomplete', autocomplete_cache.normalize(input_text)), fetch))
+    except Exception as e:
+        print(f"Autocomplete error: {e}")
+        return []
+
+
+async def geocode_location(location: str) -> Optional[Dict]:
+    try:
+        async def fetch():
+            return _parse_geocode(await _request(_geocode_request(location)))
+        with span('geocode'):
+            return await _cached('geocode', [_normalize_query(location)], fetch)
+    except Exception as e:
+        print(f"Geocoding error: {e}")
+        return None
+
+
+async def reverse_geocode(lat: float, lng: float) -> Optional[str]:
+    try:
+        async def fetch():
+            return _parse_reverse_geocode(await _request(_reverse_geocode_request(lat, lng)))
+        with span('reverse_geocode'):
+            return await _cached('reverse_geocode', [round(lat, 5), round(lng, 5)], fetch)
+    except Exception as e:
+        print(f"Reverse geocoding error: {e}")
+        return None
+
+
+async def _fetch_nearby_raw(lat: float, lng: float, types_list: list,
+                            radius_meters: int, rank_preference: str) -> dict:
+    data = await _request(_nearby_request(lat, lng, types_list, radius_meters, rank_preference))
+    return _parse_nearby(data, lat, lng)
+
+
+async def _nearby_places_in_circle(lat: float, lng: float, types_list: list,
+                                   radius_meters: int, rank_preference: str,
+                                   exact_fallback: bool = True):
+    """Async locale_backend._nearby_places_in_circle (same tile, exact and superset cache keys)."""
+    if backend.snapshot_store is not None and rank_preference == 'DISTANCE':
+        snapshot = await asyncio.to_thread(_snapshot_search, lat, lng, types_list, radius_meters)
+        if snapshot is not None:
+            return snapshot['places'], True
+
+    radius_miles = radius_meters / 1609.34
+    superset = await _cache_io(_superset_places, lat, lng, types_list, radius_miles, rank_preference)
+    if superset is not None:
+        return superset, True
+
+    fetch_meters = await _cache_io(_superset_radius, lat, lng, types_list, radius_meters, rank_preference)
+    tile_search = _tile_search(lat, lng, types_list, fetch_meters, rank_preference)
+    density = None
+    if tile_search is not None:
+        key, tile_lat, tile_lng, fetch_radius = tile_search
+        density = await _cache_io(_tile_density, key)
+        tiled = await _cache_io(response_cache.get, 'places', key, count=False)
+        if tiled is None and density == 'sparse':
+            tiled = await _cached('places', key, lambda: _fetch_nearby_raw(
+                tile_lat, tile_lng, types_list, fetch_radius, rank_preference))
+
+        if tiled is not None:
+            complete_miles = _complete_miles(tiled, rank_preference, fetch_radius / 1609.34,
+                                             _calculate_distance_miles(lat, lng, tile_lat, tile_lng))
+            if complete_miles >= radius_miles or not exact_fallback:
+                return await _cache_io(_within_superset, lat, lng, types_list, rank_preference, tiled['places'],
+                                       complete_miles, radius_miles, tiled['saturated'])
+            await _cache_io(_set_tile_density, key, 'dense')
+            density = 'dense'
+
+    key = _exact_search_key(lat, lng, types_list, fetch_meters, rank_preference)
+    exact = await _cached('places', key, lambda: _fetch_nearby_raw(
+        lat, lng, types_list, fetch_meters, rank_preference))
+    if tile_search is not None and density is None:
+        await _cache_io(_set_tile_density, tile_search[0], 'dense' if exact['saturated'] else 'sparse')
+    complete_miles = _complete_miles(exact, rank_preference, fetch_meters / 1609.34)
+    return await _cache_io(_within_superset, lat, lng, types_list, rank_preference, exact['places'],
+                           complete_miles, radius_miles, exact['saturated'])
+
+
+async def count_nearby_places(lat: float, lng: float, place_type,
+                              radius_meters: int, min_rating: float = 4.0,
+                              budget: Optional[RequestBudget] = None) -> dict:
+    """Async count_nearby_places.
+
+    Full-coverage searches (with a RequestBudget) run the synchronous
+    quadtree engine on a worker thread, since it fans out on its own pool.
+    """
+    if budget is not None:
+        return await asyncio.to_thread(backend.count_nearby_places, lat, lng, place_type,
+                                       radius_meters, min_rating, budget)
+
+    types_list = [place_type] if isinstance(place_type, str) else place_type
+    rank_preference = _rank_preference(types_list, min_rating)
+    try:
+        places, complete = await _nearby_places_in_circle(lat, lng, types_list, radius_meters, rank_preference)
+        await _cache_io(_remember_area_count, lat, lng, types_list, radius_meters, len(places), complete)
+        with span('places_filter'):
+            detailed_places = _build_place_list(_filter_places_by_type(places, types_list, min_rating), lat, lng)
+        return {
+            'count': len(detailed_places),
+            'places': detailed_places
+        }
+    except (DeadlineExceeded, QuotaExceeded):
+        return _timed_out_result('amenity')
+    except Exception as e:
+        print(f"Places API error for {place_type}: {e}")
+        return {'count': 0, 'places': []}
+
+
+async def count_nearby_places_batch(lat: float, lng: float, criteria_types: Dict[str, object],
+                                    radius_meters: int,
+                                    budget: Optional[RequestBudget] = None,
+                                    fallback: bool = True) -> Optional[Dict[str, dict]]:
+    """Async count_nearby_places_batch; the fallback requests run concurrently."""
+    types_by_criterion = {
+        criterion: [types] if isinstance(types, str) else list(types)
+        for criterion, types in criteria_types.items()
+    }
+    union = sorted({t for types in types_by_criterion.values() for t in types})
+
+    try:
+        places, complete = await _nearby_places_in_circle(lat, lng, union, radius_meters, 'DISTANCE',
+                                                          exact_fallback=False)
+    except Exception as e:
+        print(f"Places API error for batch {union}: {e}")
+        complete = False
+
+    if not complete:
+        if not fallback:
+            return None
+        results = await asyncio.gather(*(
+            count_nearby_places(lat, lng, criteria_types[criterion], radius_meters, budget=budget)
+            for criterion in criteria_types
+        ))
+        return dict(zip(criteria_types, results))
+
+    results = {}
+    with span('places_filter'):
+        for criterion, types in types_by_criterion.items():
+            detailed_places = _build_place_list(_filter_places_by_type(places, types, 0), lat, lng)
+            results[criterion] = {
+                'count': len(detailed_places),
+                'places': detailed_places
+            }
+            if budget is not None:
+                results[criterion]['complete'] = True
+    for criterion, types in types_by_criterion.items():
+        await _cache_io(_remember_area_count, lat, lng, types, radius_meters, results[criterion]['count'], True)
+    return results
+
+
+async def search_by_text(lat: float, lng: float, query: str, radius_meters: int) -> dict:
+    fetch_meters = await _cache_io(_text_search_radius, lat, lng, query, radius_meters)
+    try:
+        async def fetch():
+            data = await _request(_text_search_request(lat, lng, query, fetch_meters))
+            return _parse_text_search(data, lat, lng, fetch_meters)
+        fetched = await _cached('text_search', [lat, lng, _normalize_query(query), fetch_meters], fetch)
+        await _cache_io(_remember_text_search, lat, lng, query, fetch_meters, fetched.get('saturated', True))
+        return _trim_text_search(fetched, lat, lng, radius_meters)
+    except (DeadlineExceeded, QuotaExceeded):
+        return _timed_out_result('amenity')
+    except Exception as e:
+        print(f"Text search error for '{query}': {e}")
+        return {'count': 0, 'places': []}
+
+
+async def _fetch_climate_summary(lat: float, lng: float, start_date, end_date) -> Dict:
+    data = await _request(_climate_request(lat, lng, start_date, end_date))
+    return summarize_daily(*_parse_climate_daily(data))
+
+
+async def get_climate_data(lat: float, lng: float) -> Dict:
+    """Async get_climate_data: the normals store is read locally, misses are fetched async."""
+    try:
+        if climate_store is not None:
+            normals = await asyncio.to_thread(climate_store.get, lat, lng)
+            if normals is not None:
+                return normals
+            if CLIMATE_STORE_LAZY:
+                cell_lat, cell_lng = climate_store.cell_for(lat, lng)
+                start_date, end_date = normals_period(CLIMATE_NORMAL_YEARS)
+                normals = await _flight.do(('climate_cell', cell_lat, cell_lng), lambda: _fetch_climate_summary(
+                    cell_lat, cell_lng, start_date, end_date))
+                await asyncio.to_thread(climate_store.put, lat, lng, normals, CLIMATE_NORMAL_YEARS)
+                return normals
+
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=365)
+        return await _cached('climate', [round(lat, 4), round(lng, 4)],
+                             lambda: _fetch_climate_summary(lat, lng, start_date, end_date))
+    except (DeadlineExceeded, QuotaExceeded):
+        return _timed_out_result('climate')
+    except Exception as e:
+        print(f"Climate API error: {e}")
+        return backend._climate_unavailable()
+
+
+async def find_nearest_airport(lat: float, lng: float, radius_meters: int = 50000) -> Dict:
+    """Async find_nearest_airport: the offline index is local, the Places fallback is async."""
+    if airport_index is not None or not AIRPORT_PLACES_FALLBACK:
+        return backend.find_nearest_airport(lat, lng, radius_meters)
+
+    try:
+        async def fetch():
+            return _parse_airport(await _request(_airport_request(lat, lng, radius_meters)), lat, lng)
+        return await _cached('airport', [round(lat, 4), round(lng, 4), radius_meters], fetch)
+    except (DeadlineExceeded, QuotaExceeded):
+        return _timed_out_result('airport')
+    except Exception as e:
+        print(f"Airport search error: {e}")
+        return {'name': 'Error', 'distance_mi': 'N/A'}
+
+
+# Async implementation of each function _evaluation_tasks plans with
+_ASYNC_TASK_FUNCS = {
+    backend.count_nearby_places: count_nearby_places,
+    backend.count_nearby_places_batch: count_nearby_places_batch,
+    backend.search_by_text: search_by_text,
+    backend.get_climate_data: get_climate_data,
+    backend.find_nearest_airport: find_nearest_airport,
+}
+
+
+async def _call_task(task: tuple, deadline: float):
+    """Run one evaluation task; deadline (loop time, i.e. monotonic) bounds its quota waits and retries."""
+    section, _, func, args, kwargs = task
+    backend._upstream_deadline.set(deadline)
+    with span(section, _task_label(task)):
+        return await _ASYNC_TASK_FUNCS[func](*args, **kwargs)
+
+
+async def _run_tasks(tasks: list, deadline_seconds: float, parallel: bool = True):
+    """Async locale_backend._run_tasks: yields (section, key, result) as tasks finish.
+
+    Tasks run as asyncio tasks on the event loop (one after another when
+    parallel is False). Incomplete batches are replaced by their per-criterion
+    tasks, and anything unfinished at the deadline gets a timed-out placeholder.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + deadline_seconds
+    running = {}
+
+    def start(task):
+        future = asyncio.ensure_future(_call_task(task, deadline))
+        running[future] = task
+        return future
+
+    queue = list(tasks)
+    pending = set()
+    while queue or pending:
+        # Parallel mode starts everything queued; sequential mode one task at a time
+        while queue and (parallel or not pending):
+            pending.add(start(queue.pop(0)))
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            task = running[future]
+            section, key = task[0], task[1]
+            result = future.result()
+            if result is None and section == 'amenity_batch':
+                queue[0:0] = _unbatched_tasks(task)
+            else:
+                for item in _expand_result(section, key, result):
+                    yield item
+
+    if pending or queue:
+        unfinished = [running[f] for f in pending] + queue
+        missing = [', '.join(key) if isinstance(key, tuple) else key for _, key, *_ in unfinished]
+        print(f"Evaluation deadline exceeded after {deadline_seconds}s, missing: {', '.join(missing)}")
+        for future in pending:
+            future.cancel()
+        for section, key, *_ in unfinished:
+            EVALUATION_TIMEOUTS.inc(section=section)
+            for item in _expand_timed_out(section, key):
+                yield item
+
+
+async def iter_evaluation(location: str, radius_miles: float,
+                          selected_criteria: Optional[List[str]] = None,
+                          custom_amenities: Optional[List[str]] = None,
+                          restaurant_min_rating: float = 0,
+                          parallel: bool = True,
+                          deadline_seconds: Optional[float] = None,
+                          full_coverage: bool = False,
+                          coverage_budget: Optional[int] = None):
+    """Async locale_backend.iter_evaluation, yielding the same (event, payload) pairs.
+
+    As in the sync version, identical streams are not coalesced into one
+    evaluation; their concurrent lookups share upstream calls through the
+    response cache.
+    """
+    with span('evaluation'):
+        async for item in _iter_evaluation(location, radius_miles, selected_criteria, custom_amenities,
+                                           restaurant_min_rating, parallel, deadline_seconds,
+                                           full_coverage, coverage_budget):
+            yield item
+
+
+async def _iter_evaluation(location, radius_miles, selected_criteria, custom_amenities,
+                           restaurant_min_rating, parallel, deadline_seconds,
+                           full_coverage, coverage_budget, geo_data=None):
+    if geo_data is None:
+        geo_data = await geocode_location(location)
+    if not geo_data:
+        yield 'error', {'error': 'Location not found'}
+        return
+
+    yield _location_event(geo_data, radius_miles)
+
+    if selected_criteria is None:
+        selected_criteria = list(CRITERIA_MAP.keys())
+    if deadline_seconds is None:
+        deadline_seconds = EVALUATION_DEADLINE_SECONDS
+
+    budget = None
+    if full_coverage:
+        budget = RequestBudget(COVERAGE_REQUEST_BUDGET if coverage_budget is None else coverage_budget)
+
+    radius_meters = int(radius_miles * 1609.34)
+    # Batch planning reads the place counts seen nearby from the response cache
+    tasks = await _cache_io(_evaluation_tasks, geo_data['lat'], geo_data['lng'], radius_meters,
+                            selected_criteria, custom_amenities, restaurant_min_rating, budget)
+
+    timed_out = []
+    async for section, key, result in _run_tasks(tasks, deadline_seconds, parallel):
+        if result.get('timed_out'):
+            timed_out.append(key)
+        yield _result_event(section, key, result)
+
+    yield 'done', {'timed_out': timed_out}
+
+
+async def evaluate_location(location: str, radius_miles: float,
+                            selected_criteria: Optional[List[str]] = None,
+                            custom_amenities: Optional[List[str]] = None,
+                            restaurant_min_rating: float = 0,
+                            parallel: bool = True,
+                            deadline_seconds: Optional[float] = None,
+                            full_coverage: bool = False,
+                            coverage_budget: Optional[int] = None) -> Dict:
+    """Async locale_backend.evaluate_location (same arguments and result).
+
+    Identical concurrent evaluations in this process share one computation,
+    and with a shared evaluation flight (LOCALE_FLIGHT_PATH) so do those in
+    other workers, sync or async.
+    """
+    geo_data = await geocode_location(location)
+    if not geo_data:
+        return {'error': 'Location not found'}
+
+    key = _evaluation_key(geo_data, radius_miles, selected_criteria, custom_amenities,
+                          restaurant_min_rating, full_coverage, coverage_budget)
+
+    def evaluate():
+        return _evaluate(location, radius_miles, selected_criteria, custom_amenities, restaurant_min_rating,
+                         parallel, deadline_seconds, full_coverage, coverage_budget, geo_data)
+
+    if isinstance(evaluation_flight, SharedSingleFlight):
+        return await _flight.do(('evaluation', key), lambda: evaluation_flight.do_async(key, evaluate))
+    return await _flight.do(('evaluation', key), evaluate)
+
+
+async def _evaluate(location, radius_miles, selected_criteria, custom_amenities, restaurant_min_rating,
+                    parallel, deadline_seconds, full_coverage, coverage_budget, geo_data=None) -> Dict:
+    sections = {}
+    amenities = {}
+    with span('evaluation'):
+        async for event, payload in _iter_evaluation(location, radius_miles, selected_criteria,
+                                                     custom_amenities, restaurant_min_rating,
+                                                     parallel, deadline_seconds,
+                                                     full_coverage, coverage_budget, geo_data):
+            if event == 'error':
+                return payload
+            if event == 'amenity':
+                amenities[payload['key']] = payload['data']
+            else:
+                sections[event] = payload
+    return _assemble_evaluation(sections, amenities, selected_criteria, custom_amenities)
@@ -3,28 +3,252 @@ Locale Backend - Location Evaluation API
 Integrates Google Places API and Open-Meteo for real location data
 """
 import os
+import contextvars
 import json
+import math
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
+from locale_airports import load_index_from_env
+from locale_cache import AutocompleteCache, SingleFlight, create_cache_from_env, create_flight_from_env
+from locale_climate import CLIMATE_NORMAL_YEARS, create_store_from_env, normals_period, summarize_daily
+from locale_metrics import EVALUATION_TIMEOUTS, cache_stats_lines, registry, span, upstream_span
+from locale_quota import BATCH, QuotaExceeded, create_quota_from_env, priority, record_call
+from locale_snapshot import SNAPSHOT_REFRESH_INTERVAL, SnapshotRefresher, create_snapshot_from_env
+from locale_geo import (covering_tile, geohash_center, geohash_encode, cell_half_diagonal_meters,
+                        quadrant_circles, haversine_miles, haversine_miles_many, nearest_within)
+
 # Load environment variables from .env file
 load_dotenv()
 
 # Configuration
 GOOGLE_API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY', 'YOUR_API_KEY_HERE')
-PLACES_API_BASE = 'https://places.googleapis.com/v1/places:searchNearby'
-TEXT_SEARCH_API_BASE = 'https://places.googleapis.com/v1/places:searchText'
-GEOCODING_API_BASE = 'https://maps.googleapis.com/maps/api/geocode/json'
-METEO_API_BASE = 'https://archive-api.open-meteo.com/v1/archive'
-AUTOCOMPLETE_API_BASE = 'https://maps.googleapis.com/maps/api/place/autocomplete/json'
+# Upstream endpoints; overridable so benchmarks can point at a stub (bench/stub_upstream.py)
+PLACES_API_BASE = os.environ.get('LOCALE_PLACES_NEARBY_URL', 'https://places.googleapis.com/v1/places:searchNearby')
+TEXT_SEARCH_API_BASE = os.environ.get('LOCALE_PLACES_TEXT_URL', 'https://places.googleapis.com/v1/places:searchText')
+GEOCODING_API_BASE = os.environ.get('LOCALE_GEOCODING_URL', 'https://maps.googleapis.com/maps/api/geocode/json')
+METEO_API_BASE = os.environ.get('LOCALE_METEO_URL', 'https://archive-api.open-meteo.com/v1/archive')
+AUTOCOMPLETE_API_BASE = os.environ.get('LOCALE_AUTOCOMPLETE_URL',
+                                       'https://maps.googleapis.com/maps/api/place/autocomplete/json')
+
+# Upstream fan-out: evaluate_location dispatches its independent lookups onto a
+# bounded thread pool and gives up on anything still running after the deadline.
+UPSTREAM_MAX_WORKERS = int(os.environ.get('LOCALE_UPSTREAM_WORKERS', '16'))
+EVALUATION_DEADLINE_SECONDS = float(os.environ.get('LOCALE_EVALUATION_DEADLINE', '20'))
+
+_upstream_executor = ThreadPoolExecutor(max_workers=UPSTREAM_MAX_WORKERS,
+                                        thread_name_prefix='locale-upstream')
+
+# Upstream HTTP client: pooled keep-alive connections, timeouts and retries
+UPSTREAM_POOL_SIZE = int(os.environ.get('LOCALE_UPSTREAM_POOL_SIZE', str(UPSTREAM_MAX_WORKERS)))
+UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get('LOCALE_UPSTREAM_CONNECT_TIMEOUT', '3.05'))
+UPSTREAM_READ_TIMEOUT = float(os.environ.get('LOCALE_UPSTREAM_READ_TIMEOUT', '10'))
+UPSTREAM_RETRIES = int(os.environ.get('LOCALE_UPSTREAM_RETRIES', '2'))
+UPSTREAM_BACKOFF_FACTOR = float(os.environ.get('LOCALE_UPSTREAM_BACKOFF', '0.5'))
+# Longest Retry-After honored; a 429/503 asking for a longer wait fails instead
+UPSTREAM_RETRY_MAX_DELAY = float(os.environ.get('LOCALE_RETRY_MAX_DELAY', '5'))
+
+
+# Monotonic time by which the current evaluation task must finish; set per task
+# by _run_tasks so a request sent close to the deadline times out with it
+_upstream_deadline = contextvars.ContextVar('upstream_deadline', default=None)
+
+
+class DeadlineExceeded(requests.Timeout):
+    """An upstream request was not sent, or was cut off, because its evaluation deadline passed."""
+
+
+def deadline_time_left() -> Optional[float]:
+    """Seconds left before the current evaluation task's deadline, or None outside one.
+
+    Raises DeadlineExceeded once the deadline has passed.
+    """
+    deadline = _upstream_deadline.get()
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded('Evaluation deadline passed')
+    return remaining
+
+
+def retry_delay_cap() -> float:
+    """Longest Retry-After worth waiting for: the configured cap, or less near the deadline."""
+    deadline = _upstream_deadline.get()
+    if deadline is None:
+        return UPSTREAM_RETRY_MAX_DELAY
+    return min(UPSTREAM_RETRY_MAX_DELAY, deadline - time.monotonic())
+
+
+class _CappedRetry(Retry):
+    """Retry that gives up on a Retry-After longer than retry_delay_cap().
+
+    Raising MaxRetryError from increment() makes urllib3 hand back the
+    429/503 response (raise_on_status=False), which request_json raises.
+    """
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if response is not None and self.respect_retry_after_header:
+            delay = self.get_retry_after(response)
+            if delay is not None and delay > retry_delay_cap():
+                raise MaxRetryError(_pool, url, ResponseError(f'Retry-After of {delay:g}s is too long'))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+class UpstreamClient:
+    """Shared HTTP client for Google Maps Platform and Open-Meteo calls.
+
+    One requests.Session keeps a keep-alive connection pool per upstream host,
+    every call carries a (connect, read) timeout, and connection failures plus
+    429/5xx responses are retried with exponential backoff (honoring
+    Retry-After up to LOCALE_RETRY_MAX_DELAY or the evaluation deadline, and
+    failing at once when asked to wait longer). Read timeouts are not retried so a stalled upstream costs at
+    most one read timeout.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, pool_size: int = UPSTREAM_POOL_SIZE,
+                 connect_timeout: float = UPSTREAM_CONNECT_TIMEOUT,
+                 read_timeout: float = UPSTREAM_READ_TIMEOUT,
+                 retries: int = UPSTREAM_RETRIES,
+                 backoff_factor: float = UPSTREAM_BACKOFF_FACTOR):
+        self.timeout = (connect_timeout, read_timeout)
+        retry = _CappedRetry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset({'GET', 'POST'}),  # Places searches are reads
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # pool_connections = number of per-host pools kept; pool_maxsize = sockets per host
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request_json(self, method: str, url: str, **kwargs):
+        """Send a request and return the decoded JSON body; raises on HTTP errors.
+
+        Inside an evaluation task the timeouts are cut to the time left before
+        its deadline, and a request is not sent at all once it has passed; both
+        raise DeadlineExceeded.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        deadline = _upstream_deadline.get()
+        remaining = deadline_time_left()
+        if remaining is not None:
+            connect_timeout, read_timeout = kwargs['timeout']
+            kwargs['timeout'] = (min(connect_timeout, remaining), min(read_timeout, remaining))
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except (requests.Timeout, requests.ConnectionError) as e:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise DeadlineExceeded('Evaluation deadline passed') from e
+            raise
+        response.raise_for_status()
+        return response.json()
+
+    def get_json(self, url: str, params: Optional[Dict] = None, **kwargs):
+        return self.request_json('GET', url, params=params, **kwargs)
+
+    def post_json(self, url: str, json_body: Optional[Dict] = None,
+                  headers: Optional[Dict] = None, **kwargs):
+        return self.request_json('POST', url, json=json_body, headers=headers, **kwargs)
+
+
+upstream = UpstreamClient()
+
+# Token buckets per upstream endpoint (LOCALE_QUOTA_* settings, see locale_quota.py)
+quota = create_quota_from_env()
+_UPSTREAM_ENDPOINTS = {
+    PLACES_API_BASE: 'places_nearby',
+    TEXT_SEARCH_API_BASE: 'places_text',
+    GEOCODING_API_BASE: 'geocode',
+    AUTOCOMPLETE_API_BASE: 'autocomplete',
+    METEO_API_BASE: 'open_meteo',
+}
+
+# Response cache in front of every geocoding, Places, climate and airport lookup
+# (backend and TTLs come from LOCALE_CACHE_* settings, see locale_cache.py)
+response_cache = create_cache_from_env()
+registry.register_collector(lambda: cache_stats_lines(response_cache.stats()))
+
+# Identical concurrent evaluations (same geocoded point and parameters) share
+# one computation, within a worker and, with a shared SQLite file, across workers
+evaluation_flight = create_flight_from_env(lock_ttl=EVALUATION_DEADLINE_SECONDS + 30)
+
+# Autocomplete suggestions cached per prefix, with concurrent identical
+# prefixes coalesced into one upstream call
+autocomplete_cache = AutocompleteCache(response_cache, lambda text, token: _fetch_autocomplete(text, token))
+
+# Climate normals store: multi-year normals per grid cell, filled lazily on a
+# miss (LOCALE_CLIMATE_LAZY=0 falls back to per-request past-year data instead)
+# or in bulk with `python locale_climate.py --bbox ...`
+climate_store = create_store_from_env()
+CLIMATE_STORE_LAZY = os.environ.get('LOCALE_CLIMATE_LAZY', '1') == '1'
+# Concurrent misses in one grid cell share a single normals fetch
+_climate_flight = SingleFlight()
+
+# Offline airport index (data/airports.csv, see locale_airports.py). The Places
+# airport search is only used when no index is loaded.
+airport_index = load_index_from_env()
+AIRPORT_PLACES_FALLBACK = os.environ.get('LOCALE_AIRPORT_PLACES_FALLBACK', '1') == '1'
+
+# Places snapshot store (see locale_snapshot.py): searches inside crawled, fresh
+# tiles are answered locally. Each tile crawl may spend this many requests
+# subdividing saturated searches.
+snapshot_store = create_snapshot_from_env()
+SNAPSHOT_CRAWL_BUDGET = int(os.environ.get('LOCALE_SNAPSHOT_CRAWL_BUDGET', '64'))
+
+# Places searches are keyed by geohash tile rather than exact coordinates: one
+# fetch around the tile center (widened to cover any center inside the tile)
+# serves every nearby search circle of the same radius and types.
+PLACES_TILE_CACHE = os.environ.get('LOCALE_PLACES_TILE_CACHE', '1') == '1'
+PLACES_TILE_FRACTION = float(os.environ.get('LOCALE_PLACES_TILE_FRACTION', '0.25'))
+PLACES_MAX_RESULTS = 20            # searchNearby hard cap per request
+# Criteria ranked by distance are merged into multi-type requests of this many
+# criteria each (1 = one request per criterion)
+PLACES_BATCH_SIZE = int(os.environ.get('LOCALE_PLACES_BATCH_SIZE', '4'))
+# A merged request that hits the cap costs a second round of per-criterion
+# requests, so only criteria whose combined count seen nearby (per geohash area
+# of this precision) stays under this many places are merged
+PLACES_BATCH_MAX_EXPECTED = float(os.environ.get('LOCALE_PLACES_BATCH_MAX_EXPECTED', '12'))
+PLACES_AREA_PRECISION = 4
+
+# Coverage engine: saturated searches are split into quadrant sub-circles until
+# each one comes back under the result cap, bounded by a per-evaluation budget
+# of extra requests. Sub-circle fetches run on their own pool because coverage
+# is itself started from tasks on the upstream pool.
+COVERAGE_REQUEST_BUDGET = int(os.environ.get('LOCALE_COVERAGE_BUDGET', '40'))
+COVERAGE_MIN_RADIUS_METERS = float(os.environ.get('LOCALE_COVERAGE_MIN_RADIUS', '150'))
+_coverage_executor = ThreadPoolExecutor(max_workers=UPSTREAM_MAX_WORKERS,
+                                        thread_name_prefix='locale-coverage')
+PLACES_MAX_RADIUS_METERS = 50000   # searchNearby maximum circle radius
+
+# Radius supersets: DISTANCE-ranked searches are fetched at no less than this
+# radius, and each point's result is remembered with the radius out to which it
+# is complete, so re-evaluating a location at any radius inside that (the
+# radius selector) re-filters locally instead of refetching. 0 disables.
+RADIUS_SUPERSET_MILES = float(os.environ.get('LOCALE_RADIUS_SUPERSET_MILES', '10'))
 
 # Shared request headers for Google Places API
 _PLACES_HEADERS = {
     'Content-Type': 'application/json',
     'X-Goog-Api-Key': GOOGLE_API_KEY,
-    'X-Goog-FieldMask': 'places.displayName,places.rating,places.location,places.types,places.googleMapsUri',
+    'X-Goog-FieldMask': 'places.id,places.displayName,places.rating,places.location,places.types,places.googleMapsUri',
 }
 _AIRPORT_HEADERS = {
     'Content-Type': 'application/json',
@@ -49,11 +273,35 @@ CRITERIA_MAP = {
 }
 
 
+def criteria_list() -> list:
+    """The built-in criteria as GET /api/criteria lists them."""
+    return [
+        {
+            'key': key,
+            'label': key.replace('_', ' ').title(),
+            'description': f"Count of {key.replace('_', ' ')} within radius"
+        }
+        for key in CRITERIA_MAP.keys()
+    ]
+
+
 def _calculate_distance_miles(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-    """Distance in miles using Haversine approximation."""
-    lat_diff = abs(lat1 - lat2) * 69      # ~69 miles per degree latitude
-    lng_diff = abs(lng1 - lng2) * 54.6    # ~54.6 miles per degree longitude at mid-latitudes
-    return round((lat_diff**2 + lng_diff**2)**0.5, 2)
+    """Great-circle (haversine) distance in miles, rounded to 0.01."""
+    return round(haversine_miles(lat1, lng1, lat2, lng2), 2)
+
+
+def _place_coords(place: dict):
+    location = place.get('location', {})
+    return location.get('latitude'), location.get('longitude')
+
+
+def _places_within(places: list, center_lat: float, center_lng: float, radius_miles: float) -> list:
+    """Raw places within radius_miles of a center (input order kept)."""
+    if not places:
+        return []
+    lats, lngs = zip(*(_place_coords(p) for p in places))
+    distances = haversine_miles_many(center_lat, center_lng, lats, lngs)
+    return [p for p, d in zip(places, distances) if d <= radius_miles]
 
 
 def _build_place_list(raw_places: list, center_lat: float, center_lng: float,
@@ -63,97 +311,690 @@ def _build_place_list(raw_places: list, center_lat: float, center_lng: float,
     If radius_miles is given, only places within that radius are included.
     Results are sorted nearest first.
     """
+    located = [p for p in raw_places if all(_place_coords(p))]
+    if not located:
+        return []
+    lats, lngs = zip(*(_place_coords(p) for p in located))
     result = []
-    for place in raw_places:
-        place_lat = place.get('location', {}).get('latitude')
-        place_lng = place.get('location', {}).get('longitude')
-        if place_lat and place_lng:
-            distance = _calculate_distance_miles(center_lat, center_lng, place_lat, place_lng)
-            if radius_miles is None or distance <= radius_miles:
-                result.append({
-                    'name': place.get('displayName', {}).get('text', 'Unknown'),
-                    'distance': distance,
-                    'rating': place.get('rating'),
-                    'url': place.get('googleMapsUri', ''),
-                    'lat': place_lat,
-                    'lng': place_lng,
-                })
-    return sorted(result, key=lambda x: x['distance'])
+    for index, distance in nearest_within(center_lat, center_lng, lats, lngs, radius_miles):
+        place = located[index]
+        result.append({
+            'name': place.get('displayName', {}).get('text', 'Unknown'),
+            'distance': round(distance, 2),
+            'rating': place.get('rating'),
+            'url': place.get('googleMapsUri', ''),
+            'lat': lats[index],
+            'lng': lngs[index],
+        })
+    return result
 
 
 def autocomplete_places(input_text: str, session_token: str = None) -> list:
-    """Get address autocomplete suggestions using Google Places Autocomplete API"""
-    params = {'input': input_text, 'key': GOOGLE_API_KEY}
-    if session_token:
-        params['sessiontoken'] = session_token
+    """Get address autocomplete suggestions using Google Places Autocomplete API
+
+    Served through autocomplete_cache: repeated prefixes, and longer inputs a
+    narrow shorter-prefix list already answers, skip the upstream call.
+    """
     try:
-        response = requests.get(AUTOCOMPLETE_API_BASE, params=params)
-        response.raise_for_status()
-        data = response.json()
-        if data.get('status') == 'OK':
-            return [p['description'] for p in data.get('predictions', [])]
-        return []
+        with span('autocomplete'):
+            return autocomplete_cache.lookup(input_text, session_token)
     except Exception as e:
         print(f"Autocomplete error: {e}")
         return []
 
 
+def _fetch_autocomplete(input_text: str, session_token: str = None) -> list:
+    return _parse_autocomplete(_send(_autocomplete_request(input_text, session_token)))
+
+
+# Each upstream call is split into a request builder returning
+# (method, url, requests kwargs) and a parser of the decoded JSON body, so the
+# async client in locale_async.py sends exactly the same requests.
+
+def _send(spec) -> dict:
+    """Send a (method, url, kwargs) request built by one of the _*_request helpers.
+
+    Every upstream call waits for its endpoint's quota and is counted in the
+    current request's usage report. Inside an evaluation task the quota wait
+    is capped at the time left before its deadline: a call that would wait
+    longer raises QuotaExceeded, and none is made once the deadline has
+    passed (DeadlineExceeded).
+    """
+    method, url, kwargs = spec
+    endpoint = _UPSTREAM_ENDPOINTS[url]
+    quota.acquire(endpoint, max_wait=deadline_time_left())
+    record_call(endpoint)
+    with upstream_span(endpoint):
+        return upstream.request_json(method, url, **kwargs)
+
+
+def _autocomplete_request(input_text: str, session_token: str = None):
+    params = {'input': input_text, 'key': GOOGLE_API_KEY}
+    if session_token:
+        params['sessiontoken'] = session_token
+    return 'GET', AUTOCOMPLETE_API_BASE, {'params': params}
+
+
+def _parse_autocomplete(data: dict) -> list:
+    if data.get('status') == 'OK':
+        return [p['description'] for p in data.get('predictions', [])]
+    if data.get('status') == 'ZERO_RESULTS':
+        return []
+    raise ValueError(f"status {data.get('status')}")
+
+
+def _normalize_query(text: str) -> str:
+    """Case- and whitespace-insensitive form of a free-text query, for cache keys."""
+    return ' '.join(text.lower().split())
+
+
 def geocode_location(location: str) -> Optional[Dict]:
     """Convert location string to lat/lng using Google Geocoding API"""
-    params = {
-        'address': location,
-        'key': GOOGLE_API_KEY
-    }
-    
     try:
-        response = requests.get(GEOCODING_API_BASE, params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        if data['status'] == 'OK' and data['results']:
-            result = data['results'][0]
-            return {
-                'formatted_address': result['formatted_address'],
-                'lat': result['geometry']['location']['lat'],
-                'lng': result['geometry']['location']['lng']
-            }
-        return None
+        with span('geocode'):
+            return response_cache.get_or_fetch('geocode', [_normalize_query(location)],
+                                               lambda: _fetch_geocode(location))
     except Exception as e:
         print(f"Geocoding error: {e}")
         return None
 
 
-def reverse_geocode(lat: float, lng: float) -> Optional[str]:
-    """Convert lat/lng coordinates to a formatted address string."""
+def _fetch_geocode(location: str) -> Optional[Dict]:
+    return _parse_geocode(_send(_geocode_request(location)))
+
+
+def _geocode_request(location: str):
     params = {
-        'latlng': f'{lat},{lng}',
+        'address': location,
         'key': GOOGLE_API_KEY
     }
+    return 'GET', GEOCODING_API_BASE, {'params': params}
+
+
+def _parse_geocode(data: dict) -> Optional[Dict]:
+    if data['status'] == 'OK' and data['results']:
+        result = data['results'][0]
+        return {
+            'formatted_address': result['formatted_address'],
+            'lat': result['geometry']['location']['lat'],
+            'lng': result['geometry']['location']['lng']
+        }
+    return None
+
+
+def reverse_geocode(lat: float, lng: float) -> Optional[str]:
+    """Convert lat/lng coordinates to a formatted address string."""
     try:
-        response = requests.get(GEOCODING_API_BASE, params=params)
-        response.raise_for_status()
-        data = response.json()
-        if data['status'] == 'OK' and data['results']:
-            return data['results'][0]['formatted_address']
-        return None
+        with span('reverse_geocode'):
+            return response_cache.get_or_fetch('reverse_geocode', [round(lat, 5), round(lng, 5)],
+                                               lambda: _fetch_reverse_geocode(lat, lng))
     except Exception as e:
         print(f"Reverse geocoding error: {e}")
         return None
 
 
+def _fetch_reverse_geocode(lat: float, lng: float) -> Optional[str]:
+    return _parse_reverse_geocode(_send(_reverse_geocode_request(lat, lng)))
+
+
+def _reverse_geocode_request(lat: float, lng: float):
+    params = {
+        'latlng': f'{lat},{lng}',
+        'key': GOOGLE_API_KEY
+    }
+    return 'GET', GEOCODING_API_BASE, {'params': params}
+
+
+def _parse_reverse_geocode(data: dict) -> Optional[str]:
+    if data['status'] == 'OK' and data['results']:
+        return data['results'][0]['formatted_address']
+    return None
+
+
 def count_nearby_places(lat: float, lng: float, place_type,
-                       radius_meters: int, min_rating: float = 4.0) -> dict:
+                       radius_meters: int, min_rating: float = 4.0,
+                       budget: Optional['RequestBudget'] = None) -> dict:
     """
     Get places of a given type within radius using Google Places API (New)
     Returns count and detailed list with names and distances
     Uses POST request as required by new API
+
+    With a RequestBudget, a search that hits the 20-result cap is subdivided
+    (see _cover_circle) to get a true count, and the result carries a
+    'complete' flag saying whether the budget allowed full coverage.
     """
     types_list = [place_type] if isinstance(place_type, str) else place_type
+    rank_preference = _rank_preference(types_list, min_rating)
+
+    try:
+        places, complete = _nearby_places_in_circle(lat, lng, types_list, radius_meters, rank_preference)
+        _remember_area_count(lat, lng, types_list, radius_meters, len(places), complete)
+        if budget is not None and not complete:
+            places, complete = _cover_circle(lat, lng, types_list, radius_meters, rank_preference,
+                                             budget, places)
+            if complete:
+                _remember_superset(lat, lng, types_list, rank_preference, places, radius_meters / 1609.34,
+                                   saturated=True)
+        with span('places_filter'):
+            places = _filter_places_by_type(places, types_list, min_rating)
+            detailed_places = _build_place_list(places, lat, lng)
+        result = {
+            'count': len(detailed_places),
+            'places': detailed_places
+        }
+        if budget is not None:
+            result['complete'] = complete
+        return result
+    except (DeadlineExceeded, QuotaExceeded):
+        return _timed_out_result('amenity')
+    except Exception as e:
+        print(f"Places API error for {place_type}: {e}")
+        return {'count': 0, 'places': []}
+
+
+def _rank_preference(types_list: list, min_rating: float) -> str:
+    # Override to popularity ranking for restaurants (better quality results)
+    rank_preference = 'DISTANCE'  # Prioritize closest results for better coverage
+    if 'restaurant' in types_list and min_rating:
+        rank_preference = 'POPULARITY'
+    return rank_preference
+
+
+def count_nearby_places_batch(lat: float, lng: float, criteria_types: Dict[str, object],
+                              radius_meters: int,
+                              budget: Optional['RequestBudget'] = None,
+                              fallback: bool = True) -> Optional[Dict[str, dict]]:
+    """
+    Evaluate several criteria with one multi-type searchNearby request.
+
+    criteria_types maps criterion key -> Google Places type(s), as in
+    CRITERIA_MAP. The merged DISTANCE-ranked result is split back into
+    per-criterion buckets with the same type filtering as count_nearby_places.
+    If the merged result hit the 20-place cap before covering the circle, each
+    criterion falls back to its own count_nearby_places request; with
+    fallback=False None is returned instead so the caller can dispatch those
+    requests concurrently.
+    """
+    types_by_criterion = {
+        criterion: [types] if isinstance(types, str) else list(types)
+        for criterion, types in criteria_types.items()
+    }
+    union = sorted({t for types in types_by_criterion.values() for t in types})
+
+    try:
+        places, complete = _nearby_places_in_circle(lat, lng, union, radius_meters, 'DISTANCE',
+                                                    exact_fallback=False)
+    except Exception as e:
+        print(f"Places API error for batch {union}: {e}")
+        complete = False
+
+    if not complete:
+        if not fallback:
+            return None
+        return {
+            criterion: count_nearby_places(lat, lng, criteria_types[criterion], radius_meters,
+                                           budget=budget)
+            for criterion in criteria_types
+        }
+
+    results = {}
+    with span('places_filter'):
+        for criterion, types in types_by_criterion.items():
+            matching = _filter_places_by_type(places, types, 0)
+            _remember_area_count(lat, lng, types, radius_meters, len(matching), True)
+            detailed_places = _build_place_list(matching, lat, lng)
+            results[criterion] = {
+                'count': len(detailed_places),
+                'places': detailed_places
+            }
+            if budget is not None:
+                results[criterion]['complete'] = True
+    return results
+
+
+def _is_batchable(types_list: list) -> bool:
+    """Whether a criterion can share a merged DISTANCE-ranked request.
+
+    Restaurant searches are popularity-ranked and rating-filtered (see
+    count_nearby_places), so they always get their own request.
+    """
+    return 'restaurant' not in types_list
+
+
+def _area_count_key(lat: float, lng: float, types_list: list):
+    return ['area_count', geohash_encode(lat, lng, PLACES_AREA_PRECISION), sorted(types_list)]
+
+
+def _remember_area_count(lat: float, lng: float, types_list: list, radius_meters: int,
+                         count: int, complete: bool):
+    """Record how many places of these types a search around (lat, lng) found."""
+    response_cache.set('places', _area_count_key(lat, lng, types_list),
+                       {'count': count, 'radius_meters': radius_meters, 'complete': complete})
+
+
+def _expected_count(lat: float, lng: float, types_list: list, radius_meters: int) -> Optional[float]:
+    """Places of these types expected within radius_meters, scaled from the last search in the area.
+
+    None when nothing is known, or when the last search was cut off by the
+    result cap at a larger radius than this one.
+    """
+    seen = response_cache.get('places', _area_count_key(lat, lng, types_list), count=False)
+    if seen is None:
+        return None
+    if not seen['complete']:
+        return float(PLACES_MAX_RESULTS) if radius_meters >= seen['radius_meters'] else None
+    return seen['count'] * (radius_meters / seen['radius_meters']) ** 2
+
+
+def _batch_groups(lat: float, lng: float, criteria_types: Dict[str, object], radius_meters: int) -> list:
+    """Split batchable criteria into groups of at most PLACES_BATCH_SIZE, one request each.
+
+    A criterion is only merged when its expected count is known, and a group
+    only while the counts add up to at most PLACES_BATCH_MAX_EXPECTED, so a
+    merged request should come back under the result cap. Anything else gets
+    a group of its own.
+    """
+    groups, totals = [], []  # totals[i] is None for a group that takes no more criteria
+    for criterion, place_type in criteria_types.items():
+        types_list = [place_type] if isinstance(place_type, str) else place_type
+        expected = _expected_count(lat, lng, types_list, radius_meters)
+        if expected is None or expected > PLACES_BATCH_MAX_EXPECTED:
+            groups.append([criterion])
+            totals.append(None)
+            continue
+        for i, total in enumerate(totals):
+            if total is not None and len(groups[i]) < PLACES_BATCH_SIZE \
+                    and total + expected <= PLACES_BATCH_MAX_EXPECTED:
+                groups[i].append(criterion)
+                totals[i] += expected
+                break
+        else:
+            groups.append([criterion])
+            totals.append(expected)
+    return groups
+
+
+def _filter_places_by_type(places: list, types_list: list, min_rating: float) -> list:
+    """Keep raw places matching the requested types (and rating, for restaurants)."""
+    # For all types, check if any requested type appears in the place's types list.
+    # Some types need primary-type exclusions to filter out false positives.
+    types_set = set(types_list)
+    CAFE_EXCLUDED_PRIMARY = {'gas_station', 'grocery_store', 'convenience_store', 'supermarket'}
+    SCHOOL_EXCLUDED_PRIMARY = {'sports_school', 'sports_coaching', 'sports_club', 'gym', 'fitness_center'}
+
+    def primary_type(p):
+        return p.get('types', [None])[0]
+
+    if 'cafe' in types_set:
+        places = [
+            p for p in places
+            if any(t in types_set for t in p.get('types', []))
+            and primary_type(p) not in CAFE_EXCLUDED_PRIMARY
+        ]
+    elif 'school' in types_set:
+        places = [
+            p for p in places
+            if any(t in types_set for t in p.get('types', []))
+            and primary_type(p) not in SCHOOL_EXCLUDED_PRIMARY
+        ]
+    else:
+        places = [p for p in places if any(t in types_set for t in p.get('types', []))]
+
+    # Filter by rating if specified (for restaurants)
+    if 'restaurant' in types_list and min_rating:
+        places = [p for p in places if p.get('rating', 0) >= min_rating]
+    return places
+
+
+def _nearby_places_in_circle(lat: float, lng: float, types_list: list,
+                             radius_meters: int, rank_preference: str,
+                             exact_fallback: bool = True):
+    """Raw Places results of the given types inside a search circle.
+
+    When tile caching is on, the search is answered from a fetch around the
+    center of the geohash tile containing (lat, lng), widened by the tile's
+    half-diagonal and re-filtered locally to this circle, so every center in
+    the same tile shares one upstream call. If that fetch hit the 20-result cap
+    before reaching the far edge of this circle, an exact fetch is used instead
+    (unless exact_fallback is False). A tile is only fetched once it is known to
+    be sparse: the first search in a tile is exact, and a tile whose searches
+    saturate is marked dense so its points keep going straight to exact
+    fetches instead of paying for both.
+
+    DISTANCE-ranked searches are remembered per point (see _remember_superset),
+    so a later search of the same point at a radius they cover costs no
+    upstream call. Where an earlier fetch at the point was not saturated, they
+    are fetched at RADIUS_SUPERSET_MILES or more (see _superset_radius).
+
+    The snapshot store only answers DISTANCE-ranked searches: a POPULARITY
+    search is the 20 most popular places, not every place in the circle.
+
+    Returns (places, complete) where complete is False when the result cap may
+    have cut off places inside the circle.
+    """
+    if rank_preference == 'DISTANCE':
+        snapshot = _snapshot_search(lat, lng, types_list, radius_meters)
+        if snapshot is not None:
+            return snapshot['places'], True
+
+    radius_miles = radius_meters / 1609.34
+    superset = _superset_places(lat, lng, types_list, radius_miles, rank_preference)
+    if superset is not None:
+        return superset, True
+
+    fetch_meters = _superset_radius(lat, lng, types_list, radius_meters, rank_preference)
+    tile_search = _tile_search(lat, lng, types_list, fetch_meters, rank_preference)
+    density = None
+    if tile_search is not None:
+        key, tile_lat, tile_lng, fetch_radius = tile_search
+        density = _tile_density(key)
+        tiled = response_cache.get('places', key, count=False)
+        if tiled is None and density == 'sparse':
+            tiled = response_cache.get_or_fetch(
+                'places', key,
+                lambda: _fetch_nearby_raw(tile_lat, tile_lng, types_list, fetch_radius, rank_preference))
+
+        if tiled is not None:
+            complete_miles = _complete_miles(tiled, rank_preference, fetch_radius / 1609.34,
+                                             _calculate_distance_miles(lat, lng, tile_lat, tile_lng))
+            if complete_miles >= radius_miles or not exact_fallback:
+                return _within_superset(lat, lng, types_list, rank_preference, tiled['places'],
+                                        complete_miles, radius_miles, tiled['saturated'])
+            _set_tile_density(key, 'dense')
+            density = 'dense'
+
+    key = _exact_search_key(lat, lng, types_list, fetch_meters, rank_preference)
+    exact = response_cache.get_or_fetch(
+        'places', key, lambda: _fetch_nearby_raw(lat, lng, types_list, fetch_meters, rank_preference))
+    if tile_search is not None and density is None:
+        _set_tile_density(tile_search[0], 'dense' if exact['saturated'] else 'sparse')
+    complete_miles = _complete_miles(exact, rank_preference, fetch_meters / 1609.34)
+    return _within_superset(lat, lng, types_list, rank_preference, exact['places'], complete_miles, radius_miles,
+                            exact['saturated'])
+
+
+def _tile_density(tile_key) -> Optional[str]:
+    """'dense' or 'sparse' as learned from earlier searches in a tile, or None if unknown."""
+    return response_cache.get('places', ['density', *tile_key], count=False)
+
+
+def _set_tile_density(tile_key, density: str):
+    response_cache.set('places', ['density', *tile_key], density)
+
+
+def _superset_radius(lat: float, lng: float, types_list: list, radius_meters: int,
+                     rank_preference: str) -> int:
+    """Radius to fetch a search at: widened to RADIUS_SUPERSET_MILES when that is
+    expected to cover later radius changes.
+
+    Only DISTANCE-ranked searches are widened (a popularity-ranked search over a
+    wider circle would return different places), and only at a point whose
+    remembered superset came from a fetch that was not saturated. In a dense
+    area a wider fetch hits the 20-result cap well inside the requested circle
+    and is no more reusable than one at the requested radius, while its larger
+    tile saturates too; there, and at points with no earlier fetch, the
+    requested radius is fetched.
+    """
+    if rank_preference != 'DISTANCE' or RADIUS_SUPERSET_MILES <= 0:
+        return radius_meters
+    superset = response_cache.get('places', _superset_key(lat, lng, types_list, rank_preference), count=False)
+    if superset is None or superset.get('saturated', True):
+        return radius_meters
+    return max(radius_meters, int(RADIUS_SUPERSET_MILES * 1609.34))
+
+
+def _superset_key(lat: float, lng: float, types_list: list, rank_preference: str):
+    return ['superset', round(lat, 6), round(lng, 6), sorted(types_list), rank_preference]
+
+
+def _complete_miles(fetched: dict, rank_preference: str, fetch_radius_miles: float,
+                    offset_miles: float = 0.0) -> float:
+    """Radius around a point offset_miles from a fetch's center inside which it holds every match."""
+    if not fetched['saturated']:
+        reach_miles = fetch_radius_miles
+    elif rank_preference == 'DISTANCE':
+        reach_miles = min(fetched['reach_miles'], fetch_radius_miles)
+    else:
+        return 0.0
+    return max(reach_miles - offset_miles, 0.0)
+
+
+def _superset_places(lat: float, lng: float, types_list: list, radius_miles: float,
+                     rank_preference: str) -> Optional[list]:
+    """Raw places within radius_miles from the point's remembered superset, or None
+    if there is none complete out to that radius."""
+    if RADIUS_SUPERSET_MILES <= 0:
+        return None
+    superset = response_cache.get('places', _superset_key(lat, lng, types_list, rank_preference))
+    if superset is None or superset['complete_miles'] < radius_miles:
+        return None
+    return _places_within(superset['places'], lat, lng, radius_miles)
+
+
+def _remember_superset(lat: float, lng: float, types_list: list, rank_preference: str,
+                       places: list, complete_miles: float, saturated: bool):
+    """Remember every matching place within complete_miles of a point, and
+    whether the fetch they came from was saturated.
+
+    Kept in the 'places' cache namespace (same TTL as the fetches it came
+    from); a superset complete out to a larger radius is not replaced, but
+    learns that the point saturates.
+    """
+    if RADIUS_SUPERSET_MILES <= 0 or complete_miles <= 0:
+        return
+    key = _superset_key(lat, lng, types_list, rank_preference)
+    known = response_cache.get('places', key)
+    if known is not None and known['complete_miles'] >= complete_miles:
+        if saturated and not known.get('saturated', True):
+            response_cache.set('places', key, {**known, 'saturated': True})
+        return
+    response_cache.set('places', key, {
+        'places': _places_within(places, lat, lng, complete_miles),
+        'complete_miles': complete_miles,
+        'saturated': saturated,
+    })
+
+
+def _within_superset(lat: float, lng: float, types_list: list, rank_preference: str,
+                     places: list, complete_miles: float, radius_miles: float, saturated: bool):
+    """(places within radius_miles, complete) from a fetch, remembering it as the point's superset."""
+    _remember_superset(lat, lng, types_list, rank_preference, places, complete_miles, saturated)
+    return _places_within(places, lat, lng, radius_miles), complete_miles >= radius_miles
+
+
+def _snapshot_search(lat: float, lng: float, types_list: list, radius_meters: int) -> Optional[dict]:
+    """Every matching place in the circle from the snapshot store, shaped like a
+    _fetch_nearby_raw result, or None if the store does not fully cover it."""
+    if snapshot_store is None:
+        return None
+    try:
+        places = snapshot_store.places_in_circle(types_list, lat, lng, radius_meters)
+    except Exception as e:
+        print(f"Snapshot store error: {e}")
+        return None
+    if places is None:
+        return None
+    return {'places': places, 'saturated': False, 'reach_miles': radius_meters / 1609.34}
+
+
+def _tile_search(lat: float, lng: float, types_list: list, radius_meters: int, rank_preference: str):
+    """(cache key, tile lat, tile lng, fetch radius) of the shared tile search, or None.
+
+    None when tile caching is off or the widened circle would exceed the
+    searchNearby radius limit.
+    """
+    if not PLACES_TILE_CACHE:
+        return None
+    tile = covering_tile(lat, lng, radius_meters, PLACES_TILE_FRACTION)
+    tile_lat, tile_lng = geohash_center(tile)
+    fetch_radius = int(math.ceil(radius_meters + cell_half_diagonal_meters(tile)))
+    if fetch_radius > PLACES_MAX_RADIUS_METERS:
+        return None
+    return ['tile', tile, fetch_radius, sorted(types_list), rank_preference], tile_lat, tile_lng, fetch_radius
+
+
+def _exact_search_key(lat: float, lng: float, types_list: list, radius_meters: int, rank_preference: str):
+    return ['exact', lat, lng, sorted(types_list), radius_meters, rank_preference]
+
+
+def _is_complete(fetched: dict, rank_preference: str, needed_miles: float) -> bool:
+    """Whether a fetch holds every matching place within needed_miles of its center.
+
+    Unsaturated results are complete; a saturated DISTANCE-ranked result is
+    complete out to its farthest returned place.
+    """
+    if not fetched['saturated']:
+        return True
+    return rank_preference == 'DISTANCE' and fetched['reach_miles'] >= needed_miles
+
+
+class RequestBudget:
+    """Thread-safe allowance of extra upstream requests for one evaluation."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    def try_spend(self, n: int = 1) -> bool:
+        with self._lock:
+            if self.spent + n > self.limit:
+                return False
+            self.spent += n
+            return True
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            return self.limit - self.spent
+
+
+def _place_id(place: dict) -> str:
+    """Stable identity for de-duplicating places returned by overlapping searches."""
+    if place.get('id'):
+        return place['id']
+    loc = place['location']
+    return f"{place.get('displayName', {}).get('text')}@{loc['latitude']:.6f},{loc['longitude']:.6f}"
+
+
+def _cover_circle(lat: float, lng: float, types_list: list, radius_meters: int,
+                  rank_preference: str, budget: RequestBudget, seed_places: list = ()):
+    """Collect every matching place in a circle despite the 20-result cap.
+
+    Works breadth-first over a quadtree of sub-circles: each level's searches
+    run concurrently, and every saturated one is replaced by its four quadrant
+    sub-circles. Sub-circles that miss the original circle, or that a
+    DISTANCE-ranked parent already covers out to its farthest result, are not
+    fetched. Stops when the budget runs out or circles shrink below
+    COVERAGE_MIN_RADIUS_METERS.
+
+    Returns (places, complete), places de-duplicated and limited to the circle.
+    """
+    radius_miles = radius_meters / 1609.34
+    found = {_place_id(p): p for p in seed_places}
+    complete = True
+
+    def fetch(circle):
+        c_lat, c_lng, c_radius = circle
+        c_radius = int(math.ceil(c_radius))
+        key = ['exact', round(c_lat, 6), round(c_lng, 6), sorted(types_list), c_radius, rank_preference]
+        cached = response_cache.get('places', key)
+        if cached is not None:
+            return cached
+        if not budget.try_spend():
+            return None
+        fetched = _fetch_nearby_raw(c_lat, c_lng, types_list, c_radius, rank_preference)
+        response_cache.set('places', key, fetched)
+        return fetched
+
+    def children(circle, fetched):
+        c_lat, c_lng, c_radius = circle
+        for sub in quadrant_circles(c_lat, c_lng, c_radius):
+            s_lat, s_lng, s_radius = sub
+            s_radius_miles = s_radius / 1609.34
+            if _calculate_distance_miles(lat, lng, s_lat, s_lng) - s_radius_miles > radius_miles:
+                continue  # entirely outside the search circle
+            if _is_complete(fetched, rank_preference,
+                            _calculate_distance_miles(c_lat, c_lng, s_lat, s_lng) + s_radius_miles):
+                continue  # parent's nearest-first results already cover it
+            yield sub
+
+    frontier = list(quadrant_circles(lat, lng, radius_meters))
+    while frontier:
+        contexts = [contextvars.copy_context() for _ in frontier]  # one per pool task
+        results = list(_coverage_executor.map(lambda ctx, circle: ctx.run(fetch, circle),
+                                               contexts, frontier))
+        next_frontier = []
+        for circle, fetched in zip(frontier, results):
+            if fetched is None:
+                complete = False
+                continue
+            for place in fetched['places']:
+                found.setdefault(_place_id(place), place)
+            if _is_complete(fetched, rank_preference, circle[2] / 1609.34):
+                continue
+            if circle[2] / 2 < COVERAGE_MIN_RADIUS_METERS:
+                complete = False
+                continue
+            next_frontier.extend(children(circle, fetched))
+        frontier = next_frontier
+
+    return _places_within(list(found.values()), lat, lng, radius_miles), complete
+
+
+def _fetch_nearby_raw(lat: float, lng: float, types_list: list,
+                      radius_meters: int, rank_preference: str) -> dict:
+    """One searchNearby call.
 
+    Returns the located places plus whether the result cap was hit and how far
+    from the center the farthest returned place lies (the radius within which
+    a saturated DISTANCE-ranked result is still complete).
+    """
+    data = _send(_nearby_request(lat, lng, types_list, radius_meters, rank_preference))
+    return _parse_nearby(data, lat, lng)
+
+
+def crawl_snapshot_tile(place_type: str, tile: str, budget: Optional[int] = None) -> bool:
+    """Fetch every place of one type in a snapshot tile and store it.
+
+    Runs at batch priority. Returns whether the crawl was complete; an
+    incomplete tile is stored but not served until a later crawl completes.
+    """
+    lat, lng = geohash_center(tile)
+    radius = int(math.ceil(cell_half_diagonal_meters(tile)))
+    with priority(BATCH):
+        fetched = _fetch_nearby_raw(lat, lng, [place_type], radius, 'DISTANCE')
+        places, complete = fetched['places'], _is_complete(fetched, 'DISTANCE', radius / 1609.34)
+        if not complete:
+            places, complete = _cover_circle(
+                lat, lng, [place_type], radius, 'DISTANCE',
+                RequestBudget(SNAPSHOT_CRAWL_BUDGET if budget is None else budget), places)
+    snapshot_store.put_tile(place_type, tile, places, complete)
+    return complete
+
+
+_snapshot_refresher = None
+
+
+def start_snapshot_refresher():
+    """Start this process's background snapshot refresher, once.
+
+    Called by the servers at startup rather than on import, so scripts and
+    tests importing the backend do not crawl. Does nothing without a
+    snapshot store or with LOCALE_SNAPSHOT_REFRESH_INTERVAL=0.
+    """
+    global _snapshot_refresher
+    if snapshot_store is None or SNAPSHOT_REFRESH_INTERVAL <= 0 or _snapshot_refresher is not None:
+        return
+    _snapshot_refresher = SnapshotRefresher(snapshot_store, crawl_snapshot_tile)
+    _snapshot_refresher.start()
+
+
+def _nearby_request(lat: float, lng: float, types_list: list, radius_meters: int, rank_preference: str):
     body = {
         'includedTypes': types_list,
-        'maxResultCount': 20,  # API limit per request
-        'rankPreference': 'DISTANCE',  # Prioritize closest results for better coverage
+        'maxResultCount': PLACES_MAX_RESULTS,  # API limit per request
+        'rankPreference': rank_preference,
         'locationRestriction': {
             'circle': {
                 'center': {
@@ -165,53 +1006,24 @@ def count_nearby_places(lat: float, lng: float, place_type,
         }
     }
 
-    # Override to popularity ranking for restaurants (better quality results)
-    if 'restaurant' in types_list and min_rating:
-        body['rankPreference'] = 'POPULARITY'
+    return 'POST', PLACES_API_BASE, {'json': body, 'headers': _PLACES_HEADERS}
 
-    try:
-        response = requests.post(PLACES_API_BASE, headers=_PLACES_HEADERS, json=body)
-        response.raise_for_status()
-        data = response.json()
-
-        places = data.get('places', [])
-
-        # For all types, check if any requested type appears in the place's types list.
-        # Some types need primary-type exclusions to filter out false positives.
-        types_set = set(types_list)
-        CAFE_EXCLUDED_PRIMARY = {'gas_station', 'grocery_store', 'convenience_store', 'supermarket'}
-        SCHOOL_EXCLUDED_PRIMARY = {'sports_school', 'sports_coaching', 'sports_club', 'gym', 'fitness_center'}
-
-        def primary_type(p):
-            return p.get('types', [None])[0]
-
-        if 'cafe' in types_set:
-            places = [
-                p for p in places
-                if any(t in types_set for t in p.get('types', []))
-                and primary_type(p) not in CAFE_EXCLUDED_PRIMARY
-            ]
-        elif 'school' in types_set:
-            places = [
-                p for p in places
-                if any(t in types_set for t in p.get('types', []))
-                and primary_type(p) not in SCHOOL_EXCLUDED_PRIMARY
-            ]
-        else:
-            places = [p for p in places if any(t in types_set for t in p.get('types', []))]
-
-        # Filter by rating if specified (for restaurants)
-        if 'restaurant' in types_list and min_rating:
-            places = [p for p in places if p.get('rating', 0) >= min_rating]
 
-        detailed_places = _build_place_list(places, lat, lng)
-        return {
-            'count': len(places),
-            'places': detailed_places
-        }
-    except Exception as e:
-        print(f"Places API error for {place_type}: {e}")
-        return {'count': 0, 'places': []}
+def _parse_nearby(data: dict, lat: float, lng: float) -> dict:
+    places = [
+        p for p in data.get('places', [])
+        if p.get('location', {}).get('latitude') and p.get('location', {}).get('longitude')
+    ]
+    reach_miles = max(
+        haversine_miles_many(lat, lng, [p['location']['latitude'] for p in places],
+                             [p['location']['longitude'] for p in places]),
+        default=0.0
+    )
+    return {
+        'places': places,
+        'saturated': len(data.get('places', [])) >= PLACES_MAX_RESULTS,
+        'reach_miles': reach_miles,
+    }
 
 
 def search_by_text(lat: float, lng: float, query: str, radius_meters: int) -> dict:
@@ -219,7 +1031,75 @@ def search_by_text(lat: float, lng: float, query: str, radius_meters: int) -> di
     Search for places by text query (e.g., business name like "Starbucks")
     Uses Google Places Text Search API
     Returns count and detailed list with names and distances
+
+    Results are DISTANCE-ranked, so like nearby searches they are cut down
+    from a fetch at a larger radius when one is known (see _text_search_radius).
     """
+    fetch_meters = _text_search_radius(lat, lng, query, radius_meters)
+    key = [lat, lng, _normalize_query(query), fetch_meters]
+    try:
+        fetched = response_cache.get_or_fetch(
+            'text_search', key, lambda: _fetch_text_search(lat, lng, query, fetch_meters))
+        _remember_text_search(lat, lng, query, fetch_meters, fetched.get('saturated', True))
+        return _trim_text_search(fetched, lat, lng, radius_meters)
+    except (DeadlineExceeded, QuotaExceeded):
+        return _timed_out_result('amenity')
+    except Exception as e:
+        print(f"Text search error for '{query}': {e}")
+        return {'count': 0, 'places': []}
+
+
+def _text_search_key(lat: float, lng: float, query: str):
+    return ['superset', lat, lng, _normalize_query(query)]
+
+
+def _text_search_radius(lat: float, lng: float, query: str, radius_meters: int) -> int:
+    """Radius to fetch a text search at.
+
+    The radius of the largest earlier fetch of the query around the point when
+    it covers this one: the nearest 20 results trimmed to a smaller circle are
+    what a fetch at that circle would return. Otherwise the requested radius,
+    widened to RADIUS_SUPERSET_MILES only when that earlier fetch was not
+    saturated (see _superset_radius).
+    """
+    if RADIUS_SUPERSET_MILES <= 0:
+        return radius_meters
+    known = response_cache.get('text_search', _text_search_key(lat, lng, query), count=False)
+    if known is None:
+        return radius_meters
+    if known['fetch_meters'] >= radius_meters:
+        return known['fetch_meters']
+    if known['saturated']:
+        return radius_meters
+    return max(radius_meters, int(RADIUS_SUPERSET_MILES * 1609.34))
+
+
+def _remember_text_search(lat: float, lng: float, query: str, fetch_meters: int, saturated: bool):
+    """Remember the radius a text search was fetched at, unless a larger fetch is already known."""
+    if RADIUS_SUPERSET_MILES <= 0:
+        return
+    key = _text_search_key(lat, lng, query)
+    known = response_cache.get('text_search', key, count=False)
+    if known is not None and known['fetch_meters'] >= fetch_meters:
+        return
+    response_cache.set('text_search', key, {'fetch_meters': fetch_meters, 'saturated': saturated})
+
+
+def _trim_text_search(fetched: dict, lat: float, lng: float, radius_meters: int) -> dict:
+    """A text search result around (lat, lng) limited to a radius no larger than it was fetched at."""
+    places = fetched['places']
+    if places:
+        distances = haversine_miles_many(lat, lng, [p['lat'] for p in places], [p['lng'] for p in places])
+        places = [p for p, d in zip(places, distances) if d <= radius_meters / 1609.34]
+    return {'count': len(places), 'places': places}
+
+
+def _fetch_text_search(lat: float, lng: float, query: str, radius_meters: int) -> dict:
+    data = _send(_text_search_request(lat, lng, query, radius_meters))
+    return _parse_text_search(data, lat, lng, radius_meters)
+
+
+def _text_search_request(lat: float, lng: float, query: str, radius_meters: int):
     body = {
         'textQuery': query,
         'maxResultCount': 20,
@@ -235,32 +1115,77 @@ def search_by_text(lat: float, lng: float, query: str, radius_meters: int) -> di
         }
     }
 
-    try:
-        response = requests.post(TEXT_SEARCH_API_BASE, headers=_PLACES_HEADERS, json=body)
-        response.raise_for_status()
-        data = response.json()
+    return 'POST', TEXT_SEARCH_API_BASE, {'json': body, 'headers': _PLACES_HEADERS}
 
-        places = data.get('places', [])
-        radius_miles = radius_meters / 1609.34
-        detailed_places = _build_place_list(places, lat, lng, radius_miles)
-        return {
-            'count': len(detailed_places),
-            'places': detailed_places
-        }
-    except Exception as e:
-        print(f"Text search error for '{query}': {e}")
-        return {'count': 0, 'places': []}
+
+def _parse_text_search(data: dict, lat: float, lng: float, radius_meters: int) -> dict:
+    places = data.get('places', [])
+    radius_miles = radius_meters / 1609.34
+    detailed_places = _build_place_list(places, lat, lng, radius_miles)
+    return {
+        'count': len(detailed_places),
+        'places': detailed_places,
+        'saturated': len(places) >= PLACES_MAX_RESULTS,
+    }
 
 
 def get_climate_data(lat: float, lng: float) -> Dict:
     """
-    Get historical climate averages using Open-Meteo
-    Calculates averages from past year
+    Get climate averages for a location
+
+    Served from the climate normals store (multi-year normals per grid cell)
+    when one is configured; a missing cell is fetched from Open-Meteo once and
+    stored. Without a store, averages come from the past year of Open-Meteo
+    data.
     """
+    try:
+        if climate_store is not None:
+            return _climate_normals_for(lat, lng)
+        return response_cache.get_or_fetch('climate', [round(lat, 4), round(lng, 4)],
+                                           lambda: _fetch_climate_data(lat, lng))
+    except (DeadlineExceeded, QuotaExceeded):
+        return _timed_out_result('climate')
+    except Exception as e:
+        print(f"Climate API error: {e}")
+        return _climate_unavailable()
+
+
+def _climate_normals_for(lat: float, lng: float) -> Dict:
+    normals = climate_store.get(lat, lng)
+    if normals is None:
+        if not CLIMATE_STORE_LAZY:
+            return response_cache.get_or_fetch('climate', [round(lat, 4), round(lng, 4)],
+                                               lambda: _fetch_climate_data(lat, lng))
+        cell_lat, cell_lng = climate_store.cell_for(lat, lng)
+
+        def fill():
+            normals = fetch_climate_normals(cell_lat, cell_lng)
+            climate_store.put(lat, lng, normals, CLIMATE_NORMAL_YEARS)
+            return normals
+
+        normals = _climate_flight.do((cell_lat, cell_lng), fill)
+    return normals
+
+
+def fetch_climate_normals(lat: float, lng: float, years: int = CLIMATE_NORMAL_YEARS) -> Dict:
+    """Multi-year climate normals for a point from the Open-Meteo archive."""
+    start_date, end_date = normals_period(years)
+    return summarize_daily(*_fetch_climate_daily(lat, lng, start_date, end_date))
+
+
+def _fetch_climate_data(lat: float, lng: float) -> Dict:
     # Get data for past year
     end_date = datetime.now().date()
     start_date = end_date - timedelta(days=365)
-    
+    return summarize_daily(*_fetch_climate_daily(lat, lng, start_date, end_date))
+
+
+def _fetch_climate_daily(lat: float, lng: float, start_date, end_date):
+    """Daily (times, max temps, min temps, precipitation) from Open-Meteo."""
+    return _parse_climate_daily(_send(_climate_request(lat, lng, start_date, end_date)))
+
+
+def _climate_request(lat: float, lng: float, start_date, end_date):
     params = {
         'latitude': lat,
         'longitude': lng,
@@ -271,77 +1196,71 @@ def get_climate_data(lat: float, lng: float) -> Dict:
         'precipitation_unit': 'inch',
         'timezone': 'auto'
     }
-    
-    try:
-        response = requests.get(METEO_API_BASE, params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        daily = data.get('daily', {})
-        temp_max = daily.get('temperature_2m_max', [])
-        temp_min = daily.get('temperature_2m_min', [])
-        precip = daily.get('precipitation_sum', [])
-        
-        times = daily.get('time', [])
-
-        # Calculate averages
-        avg_temp = round((sum(temp_max) + sum(temp_min)) / (len(temp_max) + len(temp_min)), 1)
-        total_precip = round(sum(precip), 1)
-
-        # Estimate sunny days (days with < 0.1 inch precipitation)
-        sunny_days = sum(1 for p in precip if p < 0.1)
-
-        # Group daily avg temps by month
-        month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                       'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        month_buckets = {m: [] for m in month_names}
-
-        for i, date_str in enumerate(times):
-            try:
-                month_idx = int(date_str[5:7]) - 1
-                tmax = temp_max[i] if i < len(temp_max) else None
-                tmin = temp_min[i] if i < len(temp_min) else None
-                if tmax is not None and tmin is not None:
-                    month_buckets[month_names[month_idx]].append((tmax + tmin) / 2)
-            except (IndexError, ValueError):
-                pass
-
-        monthly_temps = {
-            m: round(sum(vals) / len(vals), 1) if vals else None
-            for m, vals in month_buckets.items()
-        }
 
-        season_months = {
-            'Spring': ['Mar', 'Apr', 'May'],
-            'Summer': ['Jun', 'Jul', 'Aug'],
-            'Fall':   ['Sep', 'Oct', 'Nov'],
-            'Winter': ['Dec', 'Jan', 'Feb'],
-        }
-        seasonal_temps = {}
-        for season, months in season_months.items():
-            vals = [monthly_temps[m] for m in months if monthly_temps.get(m) is not None]
-            seasonal_temps[season] = round(sum(vals) / len(vals), 1) if vals else None
+    return 'GET', METEO_API_BASE, {'params': params}
 
-        return {
-            'avg_temp_f': f"{avg_temp}°F",
-            'annual_precipitation': f"{total_precip} in/yr",
-            'sunny_days': f"{sunny_days} days/yr",
-            'monthly_temps': monthly_temps,
-            'seasonal_temps': seasonal_temps,
-        }
-    except Exception as e:
-        print(f"Climate API error: {e}")
-        return {
-            'avg_temp_f': 'N/A',
-            'annual_precipitation': 'N/A',
-            'sunny_days': 'N/A',
-            'monthly_temps': {},
-            'seasonal_temps': {},
-        }
+
+def _parse_climate_daily(data: dict):
+    daily = data.get('daily', {})
+    return (
+        daily.get('time', []),
+        daily.get('temperature_2m_max', []),
+        daily.get('temperature_2m_min', []),
+        daily.get('precipitation_sum', []),
+    )
+
+
+def _climate_unavailable() -> Dict:
+    """Placeholder climate block used when Open-Meteo data cannot be fetched."""
+    return {
+        'avg_temp_f': 'N/A',
+        'annual_precipitation': 'N/A',
+        'sunny_days': 'N/A',
+        'monthly_temps': {},
+        'seasonal_temps': {},
+    }
+
+
+def nearest_airports(lat: float, lng: float, n: int = 3) -> List[Dict]:
+    """Nearest n airports from the offline index, with great-circle distances."""
+    if airport_index is None:
+        return []
+    return [
+        {'name': airport['name'], 'iata': airport['iata'], 'distance_mi': round(distance, 2)}
+        for airport, distance in airport_index.nearest(lat, lng, n)
+    ]
 
 
 def find_nearest_airport(lat: float, lng: float, radius_meters: int = 50000) -> Dict:
-    """Find nearest airport (searches within ~31 miles - Google API max)"""
+    """Find nearest airport
+
+    Answered locally from the offline airport index at any range. Without an
+    index, falls back to a Places search (within ~31 miles - Google API max).
+    """
+    if airport_index is not None:
+        nearest = nearest_airports(lat, lng, 1)
+        if not nearest:
+            return {'name': 'None nearby', 'distance_mi': 'N/A'}
+        return {'name': nearest[0]['name'], 'distance_mi': f"{nearest[0]['distance_mi']} mi"}
+    if not AIRPORT_PLACES_FALLBACK:
+        return {'name': 'Unavailable', 'distance_mi': 'N/A'}
+
+    try:
+        return response_cache.get_or_fetch('airport', [round(lat, 4), round(lng, 4), radius_meters],
+                                           lambda: _fetch_nearest_airport(lat, lng, radius_meters))
+    except (DeadlineExceeded, QuotaExceeded):
+        return _timed_out_result('airport')
+    except Exception as e:
+        print(f"Airport search error: {e}")
+        return {'name': 'Error', 'distance_mi': 'N/A'}
+
+
+def _fetch_nearest_airport(lat: float, lng: float, radius_meters: int) -> Dict:
+    data = _send(_airport_request(lat, lng, radius_meters))
+    return _parse_airport(data, lat, lng)
+
+
+def _airport_request(lat: float, lng: float, radius_meters: int):
     body = {
         'includedTypes': ['airport'],
         'maxResultCount': 5,
@@ -352,36 +1271,317 @@ def find_nearest_airport(lat: float, lng: float, radius_meters: int = 50000) ->
             }
         }
     }
-    
-    try:
-        response = requests.post(PLACES_API_BASE, headers=_AIRPORT_HEADERS, json=body)
-        response.raise_for_status()
-        data = response.json()
-        
-        places = data.get('places', [])
-        if not places:
-            return {'name': 'None nearby', 'distance_mi': 'N/A'}
-        
-        # Get closest airport
-        closest = places[0]
-        airport_lat = closest['location']['latitude']
-        airport_lng = closest['location']['longitude']
-        
-        distance = _calculate_distance_miles(lat, lng, airport_lat, airport_lng)
-        
-        return {
-            'name': closest['displayName']['text'],
-            'distance_mi': f"{distance} mi"
-        }
-    except Exception as e:
-        print(f"Airport search error: {e}")
-        return {'name': 'Error', 'distance_mi': 'N/A'}
+
+    return 'POST', PLACES_API_BASE, {'json': body, 'headers': _AIRPORT_HEADERS}
+
+
+def _parse_airport(data: dict, lat: float, lng: float) -> Dict:
+    places = data.get('places', [])
+    if not places:
+        return {'name': 'None nearby', 'distance_mi': 'N/A'}
+
+    # Get closest airport
+    closest = places[0]
+    airport_lat = closest['location']['latitude']
+    airport_lng = closest['location']['longitude']
+
+    distance = _calculate_distance_miles(lat, lng, airport_lat, airport_lng)
+
+    return {
+        'name': closest['displayName']['text'],
+        'distance_mi': f"{distance} mi"
+    }
+
+
+def _evaluation_tasks(lat: float, lng: float, radius_meters: int,
+                      selected_criteria: List[str],
+                      custom_amenities: Optional[List[str]],
+                      restaurant_min_rating: float,
+                      budget: Optional[RequestBudget] = None) -> list:
+    """Independent upstream lookups for one evaluation.
+
+    Each task is (section, key, func, args, kwargs) where section is one of
+    'amenity', 'climate' or 'airport' and key names the result slot. With
+    Places batching on, compatible criteria expected to be sparse around the
+    point are merged into 'amenity_batch' tasks whose key is the tuple of
+    criteria they answer (see _batch_groups).
+    """
+    tasks = []
+    batchable = {}
+    for criterion in selected_criteria:
+        if criterion in CRITERIA_MAP:
+            place_type = CRITERIA_MAP[criterion]
+            kwargs = {'budget': budget}
+            # Special handling for restaurants with configurable minimum rating
+            if criterion == 'restaurants' and restaurant_min_rating > 0:
+                kwargs['min_rating'] = restaurant_min_rating
+            types_list = [place_type] if isinstance(place_type, str) else place_type
+            if PLACES_BATCH_SIZE > 1 and _is_batchable(types_list):
+                batchable[criterion] = place_type
+            else:
+                tasks.append(('amenity', criterion, count_nearby_places,
+                              (lat, lng, place_type, radius_meters), kwargs))
+
+    for group in _batch_groups(lat, lng, batchable, radius_meters):
+        if len(group) == 1:
+            tasks.append(('amenity', group[0], count_nearby_places,
+                          (lat, lng, batchable[group[0]], radius_meters), {'budget': budget}))
+        else:
+            tasks.append(('amenity_batch', tuple(group), count_nearby_places_batch,
+                          (lat, lng, {c: batchable[c] for c in group}, radius_meters),
+                          {'budget': budget, 'fallback': False}))
+
+    # Custom amenities use text search (supports business names and queries)
+    if custom_amenities:
+        for query in custom_amenities:
+            if query and query.strip():
+                tasks.append(('amenity', query.strip(), search_by_text,
+                              (lat, lng, query.strip(), radius_meters), {}))
+
+    tasks.append(('climate', 'climate', get_climate_data, (lat, lng), {}))
+    tasks.append(('airport', 'airport', find_nearest_airport, (lat, lng), {}))
+    return tasks
+
+
+def _expand_result(section: str, key, result):
+    """Split an 'amenity_batch' task result into per-criterion amenity results.
+
+    Lookups that returned a timed-out result of their own (cut off by the
+    deadline or refused by the quota) are counted in EVALUATION_TIMEOUTS.
+    """
+    if section == 'amenity_batch':
+        items = [('amenity', criterion, result[criterion]) for criterion in key]
+    else:
+        items = [(section, key, result)]
+    for item in items:
+        if item[2].get('timed_out'):
+            EVALUATION_TIMEOUTS.inc(section=item[0])
+        yield item
+
+
+def _timed_out_result(section: str) -> Dict:
+    """Partial result reported for a lookup that missed the evaluation deadline.
+
+    Calls refused by the upstream quota (QuotaExceeded) are reported the same way.
+    """
+    if section == 'amenity':
+        return {'count': 0, 'places': [], 'timed_out': True}
+    if section == 'climate':
+        return {**_climate_unavailable(), 'timed_out': True}
+    return {'name': 'Timed out', 'distance_mi': 'N/A', 'timed_out': True}
+
+
+def _unbatched_tasks(task: tuple) -> list:
+    """Per-criterion count_nearby_places tasks replacing an incomplete batch task."""
+    _, _, _, (lat, lng, criteria_types, radius_meters), kwargs = task
+    return [
+        ('amenity', criterion, count_nearby_places, (lat, lng, place_type, radius_meters),
+         {'budget': kwargs.get('budget')})
+        for criterion, place_type in criteria_types.items()
+    ]
+
+
+def _run_tasks(tasks: list, deadline_seconds: float, parallel: bool = True):
+    """Run evaluation tasks, yielding (section, key, result) as each one finishes.
+
+    In parallel mode every task is submitted to the shared upstream pool at once;
+    in sequential mode they run one after another on the calling thread. A batch
+    task that comes back incomplete (None) is replaced by its per-criterion
+    tasks. Tasks still outstanding when the deadline passes are yielded with a
+    timed-out placeholder result instead. Upstream requests made by a task time
+    out at the deadline, so a sequential task cannot run far past it either,
+    and a task cut off that way returns a timed-out result of its own.
+    """
+    deadline = time.monotonic() + deadline_seconds
+
+    if not parallel:
+        queue = list(tasks)
+        while queue:
+            task = queue.pop(0)
+            section, key, func, args, kwargs = task
+            if time.monotonic() >= deadline:
+                EVALUATION_TIMEOUTS.inc(section=section)
+                yield from _expand_timed_out(section, key)
+                continue
+            result = contextvars.copy_context().run(_call_task, task, deadline)
+            if time.monotonic() >= deadline:
+                # Finished (or gave up) past the deadline, as parallel mode would report it
+                EVALUATION_TIMEOUTS.inc(section=section)
+                yield from _expand_timed_out(section, key)
+            elif result is None and section == 'amenity_batch':
+                queue[0:0] = _unbatched_tasks(task)
+            else:
+                yield from _expand_result(section, key, result)
+        return
+
+    futures = {}
+
+    def submit(task):
+        # Carry the request's quota priority, usage report and timings into the pool thread
+        future = _upstream_executor.submit(contextvars.copy_context().run, _call_task, task, deadline)
+        futures[future] = task
+        return future
+
+    pending = {submit(task) for task in tasks}
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            task = futures[future]
+            section, key = task[0], task[1]
+            result = future.result()
+            if result is None and section == 'amenity_batch':
+                pending.update(submit(sub) for sub in _unbatched_tasks(task))
+            else:
+                yield from _expand_result(section, key, result)
+
+    if pending:
+        missing = [', '.join(key) if isinstance(key, tuple) else key
+                   for _, key, *_ in (futures[f] for f in pending)]
+        print(f"Evaluation deadline exceeded after {deadline_seconds}s, missing: {', '.join(missing)}")
+        for future in pending:
+            future.cancel()
+            section, key = futures[future][0], futures[future][1]
+            EVALUATION_TIMEOUTS.inc(section=section)
+            yield from _expand_timed_out(section, key)
+
+
+def _call_task(task: tuple, deadline: Optional[float] = None):
+    """Run one evaluation task inside a latency span for its section and criterion.
+
+    Called in a context of its own; deadline bounds the task's upstream requests.
+    """
+    section, _, func, args, kwargs = task
+    if deadline is not None:
+        _upstream_deadline.set(deadline)
+    with span(section, _task_label(task)):
+        return func(*args, **kwargs)
+
+
+def _task_label(task: tuple) -> str:
+    section, key, func = task[:3]
+    if func is search_by_text:
+        return 'custom'  # free-text queries would make unbounded metric labels
+    if section == 'amenity_batch':
+        return ','.join(key)
+    return key if section == 'amenity' else ''
+
+
+def _expand_timed_out(section: str, key):
+    """Timed-out placeholders for every result slot a task would have filled."""
+    if section == 'amenity_batch':
+        for criterion in key:
+            yield 'amenity', criterion, _timed_out_result('amenity')
+    else:
+        yield section, key, _timed_out_result(section)
+
+
+def _amenity_keys(selected_criteria: List[str], custom_amenities: Optional[List[str]]) -> List[str]:
+    """Result keys of an evaluation's amenities, in request order."""
+    keys = [c for c in selected_criteria if c in CRITERIA_MAP]
+    keys += [q.strip() for q in custom_amenities or [] if q and q.strip()]
+    return keys
+
+
+def iter_evaluation(location: str, radius_miles: float,
+                    selected_criteria: Optional[List[str]] = None,
+                    custom_amenities: Optional[List[str]] = None,
+                    restaurant_min_rating: float = 0,
+                    parallel: bool = True,
+                    deadline_seconds: Optional[float] = None,
+                    full_coverage: bool = False,
+                    coverage_budget: Optional[int] = None):
+    """
+    Evaluate a location section by section, as each lookup completes
+
+    Takes the same arguments as evaluate_location and yields (event, payload)
+    pairs:
+        ('location', {'location', 'coordinates', 'radius_miles'}) first,
+        ('amenity', {'key', 'data'}) once per amenity,
+        ('climate', climate block),
+        ('transportation', {'nearest_airport', 'airport_distance'}),
+        ('done', {'timed_out': [...]}) last.
+    If the location cannot be geocoded, a single ('error', {'error': ...}) is
+    yielded instead.
+
+    Unlike evaluate_location, concurrent identical streams are not coalesced
+    into one evaluation, since each consumer needs its own events as they
+    arrive. Their lookups still share upstream calls through the response
+    cache, which coalesces concurrent misses on the same key.
+    """
+    with span('evaluation'):
+        yield from _iter_evaluation(location, radius_miles, selected_criteria, custom_amenities,
+                                    restaurant_min_rating, parallel, deadline_seconds,
+                                    full_coverage, coverage_budget)
+
+
+def _iter_evaluation(location, radius_miles, selected_criteria, custom_amenities, restaurant_min_rating,
+                     parallel, deadline_seconds, full_coverage, coverage_budget, geo_data=None):
+    # Geocode location, unless the caller already has
+    if geo_data is None:
+        geo_data = geocode_location(location)
+    if not geo_data:
+        yield 'error', {'error': 'Location not found'}
+        return
+
+    lat = geo_data['lat']
+    lng = geo_data['lng']
+    radius_meters = int(radius_miles * 1609.34)  # Convert miles to meters
+
+    yield _location_event(geo_data, radius_miles)
+
+    # Default to all criteria if none specified
+    if selected_criteria is None:
+        selected_criteria = list(CRITERIA_MAP.keys())
+    if deadline_seconds is None:
+        deadline_seconds = EVALUATION_DEADLINE_SECONDS
+
+    budget = None
+    if full_coverage:
+        budget = RequestBudget(COVERAGE_REQUEST_BUDGET if coverage_budget is None else coverage_budget)
+
+    tasks = _evaluation_tasks(lat, lng, radius_meters, selected_criteria,
+                              custom_amenities, restaurant_min_rating, budget)
+
+    timed_out = []
+    for section, key, result in _run_tasks(tasks, deadline_seconds, parallel):
+        if result.get('timed_out'):
+            timed_out.append(key)
+        yield _result_event(section, key, result)
+
+    yield 'done', {'timed_out': timed_out}
+
+
+def _location_event(geo_data: Dict, radius_miles: float):
+    return 'location', {
+        'location': geo_data['formatted_address'],
+        'coordinates': {'lat': geo_data['lat'], 'lng': geo_data['lng']},
+        'radius_miles': radius_miles,
+    }
+
+
+def _result_event(section: str, key, result):
+    """The (event, payload) iter_evaluation yields for one task result."""
+    if section == 'amenity':
+        return 'amenity', {'key': key, 'data': result}
+    if section == 'climate':
+        return 'climate', result
+    return 'transportation', {
+        'nearest_airport': result['name'],
+        'airport_distance': result['distance_mi']
+    }
 
 
 def evaluate_location(location: str, radius_miles: float,
                      selected_criteria: Optional[List[str]] = None,
                      custom_amenities: Optional[List[str]] = None,
-                     restaurant_min_rating: float = 0) -> Dict:
+                     restaurant_min_rating: float = 0,
+                     parallel: bool = True,
+                     deadline_seconds: Optional[float] = None,
+                     full_coverage: bool = False,
+                     coverage_budget: Optional[int] = None) -> Dict:
     """
     Main function to evaluate a location
 
@@ -391,59 +1591,89 @@ def evaluate_location(location: str, radius_miles: float,
         selected_criteria: List of criteria keys to evaluate (defaults to all)
         custom_amenities: List of custom place types to search for
         restaurant_min_rating: Minimum rating for restaurants (0-5, default 0 for all)
+        parallel: Dispatch the amenity, climate and airport lookups concurrently
+        deadline_seconds: Time budget for those lookups (defaults to
+            EVALUATION_DEADLINE_SECONDS); anything slower is returned as a
+            timed-out partial result
+        full_coverage: Subdivide saturated Places searches so counts are not
+            capped at 20; each amenity then reports whether it is 'complete'
+        coverage_budget: Extra Places requests full coverage may spend across
+            the whole evaluation (defaults to COVERAGE_REQUEST_BUDGET)
 
     Returns:
-        Dictionary with location evaluation data
+        Dictionary with location evaluation data. Concurrent identical
+        evaluations share one result, which callers must not mutate.
     """
-    # Geocode location
+    # Geocode first so differently-spelled requests for the same place coalesce
     geo_data = geocode_location(location)
     if not geo_data:
         return {'error': 'Location not found'}
+    return evaluate_geocoded(geo_data, location, radius_miles, selected_criteria, custom_amenities,
+                             restaurant_min_rating, parallel, deadline_seconds, full_coverage, coverage_budget)
 
-    lat = geo_data['lat']
-    lng = geo_data['lng']
-    radius_meters = int(radius_miles * 1609.34)  # Convert miles to meters
 
-    # Default to all criteria if none specified
-    if selected_criteria is None:
-        selected_criteria = list(CRITERIA_MAP.keys())
+def evaluate_geocoded(geo_data: Dict, location: str, radius_miles: float,
+                      selected_criteria: Optional[List[str]] = None,
+                      custom_amenities: Optional[List[str]] = None,
+                      restaurant_min_rating: float = 0,
+                      parallel: bool = True,
+                      deadline_seconds: Optional[float] = None,
+                      full_coverage: bool = False,
+                      coverage_budget: Optional[int] = None) -> Dict:
+    """evaluate_location for a location the caller has already geocoded (geocode_location's result)."""
+    key = _evaluation_key(geo_data, radius_miles, selected_criteria, custom_amenities,
+                          restaurant_min_rating, full_coverage, coverage_budget)
+    return evaluation_flight.do(key, lambda: _evaluate(
+        location, radius_miles, selected_criteria, custom_amenities, restaurant_min_rating,
+        parallel, deadline_seconds, full_coverage, coverage_budget, geo_data))
+
 
-    # Gather amenity data (counts and details)
+def _evaluation_key(geo_data: Dict, radius_miles, selected_criteria, custom_amenities,
+                    restaurant_min_rating, full_coverage, coverage_budget) -> str:
+    """Identity of an evaluation once its location has been geocoded."""
+    return json.dumps([
+        round(geo_data['lat'], 6), round(geo_data['lng'], 6), radius_miles,
+        sorted(selected_criteria) if selected_criteria is not None else None,
+        sorted(q.strip() for q in custom_amenities or [] if q and q.strip()),
+        restaurant_min_rating, full_coverage, coverage_budget,
+    ])
+
+
+def _evaluate(location, radius_miles, selected_criteria, custom_amenities, restaurant_min_rating,
+              parallel, deadline_seconds, full_coverage, coverage_budget, geo_data=None) -> Dict:
+    """Assemble the evaluate_location result from iter_evaluation's sections."""
+    sections = {}
     amenities = {}
-    for criterion in selected_criteria:
-        if criterion in CRITERIA_MAP:
-            place_type = CRITERIA_MAP[criterion]
-            # Special handling for restaurants with configurable minimum rating
-            if criterion == 'restaurants' and restaurant_min_rating > 0:
-                result = count_nearby_places(lat, lng, place_type, radius_meters, min_rating=restaurant_min_rating)
+    with span('evaluation'):
+        for event, payload in _iter_evaluation(location, radius_miles, selected_criteria,
+                                               custom_amenities, restaurant_min_rating,
+                                               parallel, deadline_seconds,
+                                               full_coverage, coverage_budget, geo_data):
+            if event == 'error':
+                return payload
+            if event == 'amenity':
+                amenities[payload['key']] = payload['data']
             else:
-                result = count_nearby_places(lat, lng, place_type, radius_meters)
-            amenities[criterion] = result
+                sections[event] = payload
+    return _assemble_evaluation(sections, amenities, selected_criteria, custom_amenities)
 
-    # Add custom amenities using text search (supports business names and queries)
-    if custom_amenities:
-        for query in custom_amenities:
-            if query and query.strip():
-                result = search_by_text(lat, lng, query.strip(), radius_meters)
-                amenities[query.strip()] = result
-    
-    # Get climate data
-    climate = get_climate_data(lat, lng)
-    
-    # Find nearest airport
-    airport = find_nearest_airport(lat, lng)
-    
-    return {
-        'location': geo_data['formatted_address'],
-        'coordinates': {'lat': lat, 'lng': lng},
-        'radius_miles': radius_miles,
-        'climate': climate,
-        'amenities': amenities,
-        'transportation': {
-            'nearest_airport': airport['name'],
-            'airport_distance': airport['distance_mi']
-        }
+
+def _assemble_evaluation(sections: Dict, amenities: Dict, selected_criteria, custom_amenities) -> Dict:
+    """evaluate_location's result from the non-amenity events and amenity results."""
+    # Keep amenities in request order regardless of completion order
+    if selected_criteria is None:
+        selected_criteria = list(CRITERIA_MAP.keys())
+    keys = _amenity_keys(selected_criteria, custom_amenities)
+
+    evaluation = {
+        **sections['location'],
+        'climate': sections['climate'],
+        'amenities': {key: amenities[key] for key in keys},
+        'transportation': sections['transportation'],
     }
+    if sections['done']['timed_out']:
+        evaluation['timed_out'] = sections['done']['timed_out']
+    return evaluation
 
 
 # Example usage
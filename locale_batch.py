@@ -0,0 +1,252 @@
+"""
+Locale Batch - evaluate many locations at once
+Shared runner behind POST /api/evaluate/batch and a resumable command-line tool
+
+Usage:
+    python locale_batch.py candidates.csv -o results.jsonl --workers 4 --rate 2
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterable, List, Optional
+
+from locale_backend import evaluate_geocoded, geocode_location, _evaluation_key
+from locale_quota import BATCH, priority
+
+DEFAULT_WORKERS = int(os.environ.get('LOCALE_BATCH_WORKERS', '4'))
+DEFAULT_RATE = float(os.environ.get('LOCALE_BATCH_RATE', '2'))  # evaluations started per second
+BATCH_MAX_LOCATIONS = 500  # per POST /api/evaluate/batch request
+
+
+class RateLimiter:
+    """Spaces out calls so no more than `rate` start per second (0 = unlimited)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class _Once:
+    """Runs fn once per key; callers for a key already started wait for its result."""
+
+    def __init__(self):
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, fn):
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = self._futures[key] = Future()
+        if owner:
+            try:
+                future.set_result(fn())
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+
+def _split_list(value) -> Optional[List[str]]:
+    """Criteria / custom amenities from a CSV cell ('a;b') or a JSON list."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, list):
+        return value
+    return [v.strip() for v in str(value).replace('|', ';').split(';') if v.strip()]
+
+
+def normalize_item(raw, index: int, defaults: Optional[Dict] = None) -> Dict:
+    """Turn a location string or row dict into a full batch item.
+
+    Missing fields fall back to `defaults`, then to evaluate_location's own
+    defaults; items without an 'id' are numbered by position. Raises
+    ValueError for an item that is not a string or an object, or whose
+    fields have the wrong types.
+    """
+    defaults = defaults or {}
+    if isinstance(raw, str):
+        raw = {'location': raw}
+    elif not isinstance(raw, dict):
+        raise ValueError(f'Location {index} must be a string or an object')
+    location = raw.get('location') or ''
+    if not isinstance(location, str):
+        raise ValueError(f'Location {index}: location must be a string')
+    try:
+        item = {
+            'id': str(raw.get('id') or index),
+            'location': location.strip(),
+            'radius_miles': float(raw.get('radius_miles') or defaults.get('radius_miles', 3)),
+            'criteria': _split_list(raw.get('criteria')) or defaults.get('criteria'),
+            'custom_amenities': _split_list(raw.get('custom_amenities')) or defaults.get('custom_amenities', []),
+            'restaurant_min_rating': float(raw.get('restaurant_min_rating')
+                                           or defaults.get('restaurant_min_rating', 0)),
+        }
+    except (TypeError, ValueError):
+        raise ValueError(f'Location {index}: radius_miles and restaurant_min_rating must be numbers')
+    return item
+
+
+def parse_batch_request(data: Dict) -> List[Dict]:
+    """Batch items from a POST /api/evaluate/batch body; raises ValueError.
+
+    Top-level radius_miles, criteria, custom_amenities and
+    restaurant_min_rating are defaults for entries that do not set their own.
+    """
+    if not data or not isinstance(data.get('locations'), list) or not data['locations']:
+        raise ValueError('A non-empty locations list is required')
+    if len(data['locations']) > BATCH_MAX_LOCATIONS:
+        raise ValueError(f'At most {BATCH_MAX_LOCATIONS} locations per batch')
+
+    defaults = {k: data[k] for k in ('radius_miles', 'criteria', 'custom_amenities', 'restaurant_min_rating')
+                if k in data}
+    return [normalize_item(raw, i + 1, defaults) for i, raw in enumerate(data['locations'])]
+
+
+def read_items(path: str, defaults: Optional[Dict] = None) -> List[Dict]:
+    """Load batch items from a CSV (with a 'location' column) or a JSONL file."""
+    with open(path, newline='') as f:
+        if path.endswith('.jsonl') or path.endswith('.ndjson'):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    return [normalize_item(row, i + 1, defaults) for i, row in enumerate(rows)]
+
+
+def completed_ids(path: str) -> set:
+    """IDs already written successfully to a JSONL output file (for resuming)."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # partial line from an interrupted run
+            if 'error' not in record:
+                done.add(record.get('id'))
+    return done
+
+
+def run_batch(items: Iterable[Dict], workers: int = DEFAULT_WORKERS, rate: float = DEFAULT_RATE,
+              skip_ids: Iterable[str] = ()):
+    """
+    Evaluate batch items on a rate-limited worker pool, yielding one record per
+    item as results complete: {'id', 'location', 'result'} or {'id', 'location', 'error'}.
+
+    Each item is geocoded and evaluated in its own task, so records stream out
+    as soon as their evaluation finishes rather than after the whole batch has
+    been geocoded. Each distinct location string is still geocoded once, and
+    items that geocode to the same point with the same parameters share a
+    single evaluation.
+    """
+    skip_ids = set(skip_ids)
+    items = [item for item in items if item['id'] not in skip_ids]
+    limiter = RateLimiter(rate)
+    geocodes, evaluations = _Once(), _Once()
+
+    # Batch upstream calls yield to interactive traffic (see locale_quota)
+    def geocode(location):
+        limiter.acquire()
+        with priority(BATCH):
+            return geocode_location(location)
+
+    def evaluate(item, geo):
+        limiter.acquire()
+        with priority(BATCH):
+            return evaluate_geocoded(geo, item['location'], item['radius_miles'], item['criteria'],
+                                     item['custom_amenities'], item['restaurant_min_rating'])
+
+    def run(item):
+        """(result, error) for one item."""
+        try:
+            geo = geocodes.get(' '.join(item['location'].lower().split()), lambda: geocode(item['location']))
+            if not geo:
+                return None, 'Location not found'
+            key = _evaluation_key(geo, item['radius_miles'], item['criteria'], item['custom_amenities'],
+                                  item['restaurant_min_rating'], False, None)
+            result = evaluations.get(key, lambda: evaluate(item, geo))
+        except Exception as e:
+            print(f"Batch evaluation error for {item['location']}: {e}")
+            return None, 'Evaluation failed'
+        return result, result.get('error')
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='locale-batch') as pool:
+        futures = {}
+        for item in items:
+            if item['location']:
+                futures[pool.submit(run, item)] = item
+            else:
+                yield {'id': item['id'], 'location': item['location'], 'error': 'Location is required'}
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = futures[future]
+                result, error = future.result()
+                record = {'id': item['id'], 'location': item['location']}
+                if error:
+                    record['error'] = error
+                else:
+                    record['result'] = result
+                yield record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Evaluate many locations from a CSV or JSONL file.')
+    parser.add_argument('input', help="CSV with a 'location' column, or JSONL with one object per line")
+    parser.add_argument('-o', '--output', help='JSONL output file (appended to; enables resuming). '
+                                               'Defaults to stdout.')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='concurrent evaluations')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help='maximum evaluations started per second (0 = unlimited)')
+    parser.add_argument('--radius', type=float, default=3, help='default radius in miles')
+    parser.add_argument('--criteria', help='default comma-separated criteria (defaults to all)')
+    parser.add_argument('--no-resume', action='store_true',
+                        help='re-evaluate items already present in the output file')
+    args = parser.parse_args(argv)
+
+    defaults = {'radius_miles': args.radius}
+    if args.criteria:
+        defaults['criteria'] = [c.strip() for c in args.criteria.split(',') if c.strip()]
+    items = read_items(args.input, defaults)
+
+    skip = set()
+    if args.output and not args.no_resume:
+        skip = completed_ids(args.output)
+        if skip:
+            print(f"Resuming: skipping {len(skip)} completed item(s)", file=sys.stderr)
+
+    out = open(args.output, 'a') if args.output else sys.stdout
+    written = 0
+    try:
+        for record in run_batch(items, workers=args.workers, rate=args.rate, skip_ids=skip):
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+            written += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Wrote {written} result(s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,521 @@
+"""
+Locale Cache - TTL response cache for upstream lookups
+Keeps geocoding, Places, climate and airport responses so repeat searches skip
+Google / Open-Meteo. Two backends: an in-process LRU and a SQLite file that
+several gunicorn workers can share.
+"""
+import os
+import re
+import json
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+_MISSING = object()
+
+DAY = 24 * 60 * 60
+
+# Default time-to-live per cached source, in seconds
+DEFAULT_TTLS = {
+    'geocode': 30 * DAY,
+    'reverse_geocode': 30 * DAY,
+    'places': 6 * 60 * 60,
+    'text_search': 6 * 60 * 60,
+    'climate': DAY,
+    'airport': 7 * DAY,
+    'autocomplete': DAY,
+}
+
+
+class MemoryBackend:
+    """In-process LRU store with per-entry expiry. Not shared between workers."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, encoded value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    """SQLite-file store shared by every process that opens the same path.
+
+    Entries carry an expiry and a last-access time; once the table grows past
+    max_entries the least recently used rows are pruned. The access time is
+    only rewritten when it is more than TOUCH_INTERVAL old, so reads stay
+    reads and LRU order is approximate to that interval.
+    """
+
+    PRUNE_EVERY = 500  # writes between size checks
+    TOUCH_INTERVAL = 60.0  # seconds
+
+    def __init__(self, path: str, max_entries: int = 100000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        conn = self._conn()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL,'
+            ' expires_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)')
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            'SELECT value, accessed_at FROM cache WHERE key = ? AND expires_at > ?', (key, now)
+        ).fetchone()
+        if row is None:
+            return _MISSING
+        value, accessed_at = row
+        if now - accessed_at > self.TOUCH_INTERVAL:
+            conn.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, key))
+            conn.commit()
+        return value
+
+    def set(self, key: str, value: str, ttl: float):
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+            (key, value, now + ttl, now)
+        )
+        conn.commit()
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self._prune(conn, now)
+
+    def _prune(self, conn: sqlite3.Connection, now: float):
+        conn.execute('DELETE FROM cache WHERE expires_at <= ?', (now,))
+        conn.execute(
+            'DELETE FROM cache WHERE key IN ('
+            ' SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+        conn.commit()
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute('DELETE FROM cache')
+        conn.commit()
+
+
+class ResponseCache:
+    """Namespaced TTL cache with hit/miss counters.
+
+    Values must be JSON-serializable; they are stored encoded so callers always
+    get a fresh copy they are free to mutate.
+    """
+
+    def __init__(self, backend, ttls: Optional[Dict[str, float]] = None):
+        self.backend = backend
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    @property
+    def on_disk(self) -> bool:
+        """Whether reads and writes go to SQLite (and so may block on disk or locks)."""
+        return isinstance(self.backend, SQLiteBackend)
+
+    @staticmethod
+    def make_key(namespace: str, key_parts) -> str:
+        return f"{namespace}:{json.dumps(key_parts, sort_keys=True, separators=(',', ':'))}"
+
+    def _count(self, namespace: str, field: str):
+        with self._lock:
+            counters = self._counters.setdefault(namespace, {'hits': 0, 'misses': 0})
+            counters[field] += 1
+
+    def get(self, namespace: str, key_parts, count: bool = True):
+        """Return the cached value, or None when absent or expired.
+
+        count=False skips the hit/miss counters (for speculative probes).
+        """
+        if self.backend is None:
+            return None
+        try:
+            value = self.backend.get(self.make_key(namespace, key_parts))
+        except sqlite3.Error as e:
+            print(f"Cache read error ({namespace}): {e}")
+            value = _MISSING
+        if value is _MISSING:
+            if count:
+                self._count(namespace, 'misses')
+            return None
+        if count:
+            self._count(namespace, 'hits')
+        return json.loads(value)
+
+    def set(self, namespace: str, key_parts, value, ttl: Optional[float] = None):
+        if self.backend is None or value is None:
+            return
+        if ttl is None:
+            ttl = self.ttls.get(namespace, DAY)
+        try:
+            self.backend.set(self.make_key(namespace, key_parts), json.dumps(value), ttl)
+        except sqlite3.Error as e:
+            print(f"Cache write error ({namespace}): {e}")
+
+    def get_or_fetch(self, namespace: str, key_parts, fetch: Callable):
+        """Return the cached value or call fetch() and cache what it returns.
+
+        Exceptions from fetch() propagate and None results are not cached, so
+        upstream failures never get pinned in the cache. Concurrent misses on
+        one key share a single fetch; callers that waited get their own copy.
+        """
+        value = self.get(namespace, key_parts)
+        if value is not None:
+            return value
+
+        fetched_here = []
+
+        def load():
+            fetched_here.append(True)
+            value = fetch()
+            self.set(namespace, key_parts, value)
+            return value
+
+        value = self._flight.do(self.make_key(namespace, key_parts), load)
+        if fetched_here or value is None:
+            return value
+        return json.loads(json.dumps(value))
+
+    def stats(self) -> Dict[str, Dict]:
+        """Hit/miss counters per namespace for this process."""
+        with self._lock:
+            snapshot = {ns: dict(c) for ns, c in self._counters.items()}
+        for counters in snapshot.values():
+            total = counters['hits'] + counters['misses']
+            counters['hit_ratio'] = round(counters['hits'] / total, 3) if total else 0.0
+        return snapshot
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+        with self._lock:
+            self._counters.clear()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key runs fn(); callers arriving while it is in
+    flight wait and receive the same result (or exception). The shared result
+    must be treated as read-only.
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn: Callable):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class SharedSingleFlight:
+    """SingleFlight that also coalesces across processes through a SQLite file.
+
+    Within a process calls are coalesced as in SingleFlight. Across processes
+    the first caller takes a row lock in flight_locks and publishes its result
+    to flight_results for a few seconds; callers in other workers poll for
+    that result instead of recomputing. A lock whose owner died expires after
+    lock_ttl, and any SQLite error degrades to computing locally.
+    """
+
+    POLL_SECONDS = 0.05
+
+    def __init__(self, path: str, lock_ttl: float = 60.0, result_ttl: float = 10.0):
+        self.path = path
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self._local = threading.local()
+        self._flight = SingleFlight()
+        conn = self._conn()
+        conn.execute('CREATE TABLE IF NOT EXISTS flight_locks (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)')
+        conn.execute('CREATE TABLE IF NOT EXISTS flight_results ('
+                     ' key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)')
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _try_lock(self, key: str) -> bool:
+        conn = self._conn()
+        now = time.time()
+        conn.execute('DELETE FROM flight_locks WHERE key = ? AND expires_at <= ?', (key, now))
+        cursor = conn.execute('INSERT OR IGNORE INTO flight_locks (key, expires_at) VALUES (?, ?)',
+                              (key, now + self.lock_ttl))
+        conn.commit()
+        return cursor.rowcount == 1
+
+    def _unlock(self, key: str):
+        conn = self._conn()
+        conn.execute('DELETE FROM flight_locks WHERE key = ?', (key,))
+        conn.commit()
+
+    def _published(self, key: str):
+        row = self._conn().execute(
+            'SELECT value FROM flight_results WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return _MISSING if row is None else json.loads(row[0])
+
+    def _publish(self, key: str, value):
+        conn = self._conn()
+        now = time.time()
+        conn.execute('DELETE FROM flight_results WHERE expires_at <= ?', (now,))
+        conn.execute('INSERT OR REPLACE INTO flight_results (key, value, expires_at) VALUES (?, ?, ?)',
+                     (key, json.dumps(value), now + self.result_ttl))
+        conn.commit()
+
+    def do(self, key: str, fn: Callable):
+        return self._flight.do(key, lambda: self._do_shared(key, fn))
+
+    async def do_async(self, key: str, fn: Callable):
+        """The cross-process half of do() for a coroutine function fn.
+
+        Callers coalesce within their event loop first (see
+        locale_async.AsyncSingleFlight). The SQLite calls run on worker threads.
+        """
+        try:
+            give_up = time.monotonic() + self.lock_ttl
+            while True:
+                value = await asyncio.to_thread(self._published, key)
+                if value is not _MISSING:
+                    return value
+                if await asyncio.to_thread(self._try_lock, key):
+                    break
+                if time.monotonic() >= give_up:
+                    return await fn()
+                await asyncio.sleep(self.POLL_SECONDS)
+        except sqlite3.Error as e:
+            print(f"Shared flight error: {e}")
+            return await fn()
+
+        try:
+            value = await fn()
+            try:
+                await asyncio.to_thread(self._publish, key, value)
+            except sqlite3.Error as e:
+                print(f"Shared flight publish error: {e}")
+            return value
+        finally:
+            try:
+                await asyncio.to_thread(self._unlock, key)
+            except sqlite3.Error as e:
+                print(f"Shared flight unlock error: {e}")
+
+    def _do_shared(self, key: str, fn: Callable):
+        try:
+            give_up = time.monotonic() + self.lock_ttl
+            while True:
+                value = self._published(key)
+                if value is not _MISSING:
+                    return value
+                if self._try_lock(key):
+                    break
+                if time.monotonic() >= give_up:
+                    return fn()
+                time.sleep(self.POLL_SECONDS)
+        except sqlite3.Error as e:
+            print(f"Shared flight error: {e}")
+            return fn()
+
+        try:
+            value = fn()
+            try:
+                self._publish(key, value)
+            except sqlite3.Error as e:
+                print(f"Shared flight publish error: {e}")
+            return value
+        finally:
+            try:
+                self._unlock(key)
+            except sqlite3.Error as e:
+                print(f"Shared flight unlock error: {e}")
+
+
+class AutocompleteCache:
+    """Suggestion lists per normalized prefix, in front of an autocomplete fetcher.
+
+    A lookup is answered, in order, from the exact prefix's cached list, from
+    a shorter cached prefix whose list was already narrow enough (fewer than
+    max_results, so nothing was cut off) filtered down to the longer input, or
+    from one upstream call shared by every concurrent request for the prefix.
+    """
+
+    def __init__(self, cache: ResponseCache, fetch: Callable[[str, Optional[str]], List[str]],
+                 max_results: int = 5, min_length: int = 2):
+        self.cache = cache
+        self.fetch = fetch
+        self.max_results = max_results
+        self.min_length = min_length
+        self._flight = SingleFlight()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return ' '.join(text.lower().split())
+
+    @staticmethod
+    def _matches(prefix: str, suggestion: str) -> bool:
+        """Every word of the input starts some word of the suggestion."""
+        words = re.findall(r'\w+', suggestion.lower())
+        return all(any(w.startswith(token) for w in words) for token in re.findall(r'\w+', prefix))
+
+    def _from_shorter_prefix(self, prefix: str) -> Optional[List[str]]:
+        for length in range(len(prefix) - 1, self.min_length - 1, -1):
+            entry = self.cache.get('autocomplete', [prefix[:length]], count=False)
+            if entry is None:
+                continue
+            if not entry['complete']:
+                return None  # the longest cached prefix was truncated upstream
+            narrowed = [s for s in entry['suggestions'] if self._matches(prefix, s)]
+            return narrowed or None
+        return None
+
+    def cached(self, text: str) -> Optional[List[str]]:
+        """Suggestions answerable without an upstream call, or None."""
+        prefix = self.normalize(text)
+        entry = self.cache.get('autocomplete', [prefix])
+        if entry is not None:
+            return entry['suggestions']
+
+        narrowed = self._from_shorter_prefix(prefix)
+        if narrowed is not None:
+            self.cache.set('autocomplete', [prefix], {'suggestions': narrowed, 'complete': True})
+        return narrowed
+
+    def store(self, text: str, suggestions: List[str]):
+        """Cache a fetched suggestion list for its prefix."""
+        self.cache.set('autocomplete', [self.normalize(text)], {
+            'suggestions': suggestions,
+            'complete': len(suggestions) < self.max_results,
+        })
+
+    def lookup(self, text: str, session_token: Optional[str] = None) -> List[str]:
+        suggestions = self.cached(text)
+        if suggestions is not None:
+            return suggestions
+
+        def fetch():
+            suggestions = self.fetch(text, session_token)
+            self.store(text, suggestions)
+            return suggestions
+
+        return list(self._flight.do(self.normalize(text), fetch))
+
+
+def create_flight_from_env(lock_ttl: float = 60.0):
+    """SingleFlight for this process, or SharedSingleFlight when a shared file is configured.
+
+    Uses LOCALE_FLIGHT_PATH, or the SQLite cache file when
+    LOCALE_CACHE_BACKEND=sqlite, so gunicorn workers coalesce with each other.
+    """
+    path = os.environ.get('LOCALE_FLIGHT_PATH')
+    if not path and os.environ.get('LOCALE_CACHE_BACKEND', 'memory').lower() == 'sqlite':
+        path = os.environ.get('LOCALE_CACHE_PATH', 'locale_cache.sqlite3')
+    if path:
+        return SharedSingleFlight(path, lock_ttl=lock_ttl)
+    return SingleFlight()
+
+
+def create_cache_from_env() -> ResponseCache:
+    """Build the response cache described by LOCALE_CACHE_* environment variables.
+
+    LOCALE_CACHE_BACKEND is 'memory' (default), 'sqlite' or 'none'. Per-source
+    TTLs can be overridden with LOCALE_CACHE_TTL_<NAMESPACE> in seconds.
+    """
+    backend_name = os.environ.get('LOCALE_CACHE_BACKEND', 'memory').lower()
+    max_entries = int(os.environ.get('LOCALE_CACHE_MAX_ENTRIES', '10000'))
+    if backend_name == 'sqlite':
+        path = os.environ.get('LOCALE_CACHE_PATH', 'locale_cache.sqlite3')
+        backend = SQLiteBackend(path, max_entries=max_entries)
+    elif backend_name == 'none':
+        backend = None
+    else:
+        backend = MemoryBackend(max_entries=max_entries)
+
+    ttls = {}
+    for namespace in DEFAULT_TTLS:
+        override = os.environ.get(f'LOCALE_CACHE_TTL_{namespace.upper()}')
+        if override:
+            ttls[namespace] = float(override)
+    return ResponseCache(backend, ttls)
@@ -0,0 +1,217 @@
+"""
+Locale Climate - precomputed climate normals store
+Multi-year monthly normals, annual precipitation and sunny-day counts per
+coarse lat/lng grid cell, kept in SQLite so climate is a local lookup on the
+evaluation hot path. Cells are filled lazily on first use or ahead of time:
+
+    python locale_climate.py --bbox 29.5,-98.5,31.0,-97.0
+"""
+import os
+import sys
+import json
+import math
+import time
+import sqlite3
+import argparse
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+               'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+SEASON_MONTHS = {
+    'Spring': ['Mar', 'Apr', 'May'],
+    'Summer': ['Jun', 'Jul', 'Aug'],
+    'Fall':   ['Sep', 'Oct', 'Nov'],
+    'Winter': ['Dec', 'Jan', 'Feb'],
+}
+
+CLIMATE_GRID_DEGREES = float(os.environ.get('LOCALE_CLIMATE_GRID', '0.25'))
+CLIMATE_NORMAL_YEARS = int(os.environ.get('LOCALE_CLIMATE_YEARS', '10'))
+CLIMATE_MAX_AGE_DAYS = float(os.environ.get('LOCALE_CLIMATE_MAX_AGE_DAYS', '365'))
+
+
+def summarize_daily(times: List[str], temp_max: List[float], temp_min: List[float],
+                    precip: List[float]) -> Dict:
+    """Climate block (the shape evaluate_location returns) from daily series.
+
+    Works for any span: precipitation and sunny days are reported per year,
+    and monthly temperatures average every day of that month across years.
+    """
+    temps = [t for t in temp_max + temp_min if t is not None]
+    precip = [p for p in precip if p is not None]
+    years = max(1, round(len(times) / 365.25))
+
+    # Calculate averages
+    avg_temp = round(sum(temps) / len(temps), 1)
+    total_precip = round(sum(precip) / years, 1)
+
+    # Estimate sunny days (days with < 0.1 inch precipitation)
+    sunny_days = round(sum(1 for p in precip if p < 0.1) / years)
+
+    return {
+        'avg_temp_f': f"{avg_temp}°F",
+        'annual_precipitation': f"{total_precip} in/yr",
+        'sunny_days': f"{sunny_days} days/yr",
+        **_monthly_and_seasonal(times, temp_max, temp_min),
+    }
+
+
+def _monthly_and_seasonal(times, temp_max, temp_min) -> Dict:
+    # Group daily avg temps by month
+    month_buckets = {m: [] for m in MONTH_NAMES}
+    for i, date_str in enumerate(times):
+        try:
+            month_idx = int(date_str[5:7]) - 1
+            tmax = temp_max[i] if i < len(temp_max) else None
+            tmin = temp_min[i] if i < len(temp_min) else None
+            if tmax is not None and tmin is not None:
+                month_buckets[MONTH_NAMES[month_idx]].append((tmax + tmin) / 2)
+        except (IndexError, ValueError):
+            pass
+
+    monthly_temps = {
+        m: round(sum(vals) / len(vals), 1) if vals else None
+        for m, vals in month_buckets.items()
+    }
+
+    seasonal_temps = {}
+    for season, months in SEASON_MONTHS.items():
+        vals = [monthly_temps[m] for m in months if monthly_temps.get(m) is not None]
+        seasonal_temps[season] = round(sum(vals) / len(vals), 1) if vals else None
+
+    return {'monthly_temps': monthly_temps, 'seasonal_temps': seasonal_temps}
+
+
+def grid_cell(lat: float, lng: float, step: float = CLIMATE_GRID_DEGREES) -> Tuple[float, float]:
+    """Center of the grid cell containing (lat, lng)."""
+    cell_lat = (math.floor(lat / step) + 0.5) * step
+    cell_lng = (math.floor(lng / step) + 0.5) * step
+    return round(cell_lat, 6), round(cell_lng, 6)
+
+
+def normals_period(years: int = CLIMATE_NORMAL_YEARS, today: Optional[date] = None) -> Tuple[date, date]:
+    """The last `years` complete calendar years."""
+    today = today or date.today()
+    return date(today.year - years, 1, 1), date(today.year - 1, 12, 31)
+
+
+class ClimateStore:
+    """SQLite table of climate normals keyed by (grid size, cell center).
+
+    The file (and its directory) is created on first use, not when the store
+    is constructed.
+    """
+
+    def __init__(self, path: str, grid_degrees: float = CLIMATE_GRID_DEGREES,
+                 max_age_days: float = CLIMATE_MAX_AGE_DAYS):
+        self.path = path
+        self.grid_degrees = grid_degrees
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS climate_normals ('
+                ' grid REAL NOT NULL,'
+                ' cell_lat REAL NOT NULL,'
+                ' cell_lng REAL NOT NULL,'
+                ' years INTEGER NOT NULL,'
+                ' data TEXT NOT NULL,'
+                ' updated_at REAL NOT NULL,'
+                ' PRIMARY KEY (grid, cell_lat, cell_lng))'
+            )
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def cell_for(self, lat: float, lng: float) -> Tuple[float, float]:
+        return grid_cell(lat, lng, self.grid_degrees)
+
+    def get(self, lat: float, lng: float) -> Optional[Dict]:
+        """Stored normals for the cell containing (lat, lng), or None if absent/stale."""
+        cell_lat, cell_lng = self.cell_for(lat, lng)
+        row = self._conn().execute(
+            'SELECT data, updated_at FROM climate_normals WHERE grid = ? AND cell_lat = ? AND cell_lng = ?',
+            (self.grid_degrees, cell_lat, cell_lng)
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.max_age_seconds:
+            return None
+        return json.loads(row[0])
+
+    def put(self, lat: float, lng: float, normals: Dict, years: int):
+        cell_lat, cell_lng = self.cell_for(lat, lng)
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO climate_normals (grid, cell_lat, cell_lng, years, data, updated_at)'
+            ' VALUES (?, ?, ?, ?, ?, ?)',
+            (self.grid_degrees, cell_lat, cell_lng, years, json.dumps(normals), time.time())
+        )
+        conn.commit()
+
+    def cells_in_bbox(self, south: float, west: float, north: float, east: float) -> List[Tuple[float, float]]:
+        """Centers of every grid cell overlapping a bounding box."""
+        step = self.grid_degrees
+        cells = []
+        lat = grid_cell(south, west, step)[0]
+        while lat - step / 2 <= north:
+            lng = grid_cell(south, west, step)[1]
+            while lng - step / 2 <= east:
+                cells.append((round(lat, 6), round(lng, 6)))
+                lng += step
+            lat += step
+        return cells
+
+
+def create_store_from_env() -> Optional[ClimateStore]:
+    """Climate store at LOCALE_CLIMATE_STORE ('none' disables it), data/climate_normals.sqlite3 by default."""
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'climate_normals.sqlite3')
+    path = os.environ.get('LOCALE_CLIMATE_STORE', default_path)
+    if path.lower() == 'none':
+        return None
+    return ClimateStore(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk-load climate normals for a region.')
+    parser.add_argument('--bbox', required=True, help='south,west,north,east in degrees')
+    parser.add_argument('--years', type=int, default=CLIMATE_NORMAL_YEARS, help='years of history per cell')
+    parser.add_argument('--delay', type=float, default=1.0, help='seconds between Open-Meteo requests')
+    parser.add_argument('--refresh', action='store_true', help='re-fetch cells that are already stored')
+    args = parser.parse_args(argv)
+
+    # Imported here so the store itself has no dependency on the backend
+    from locale_backend import climate_store, fetch_climate_normals
+    from locale_quota import BATCH, priority
+
+    if climate_store is None:
+        parser.error('LOCALE_CLIMATE_STORE is disabled')
+    south, west, north, east = (float(v) for v in args.bbox.split(','))
+    cells = climate_store.cells_in_bbox(south, west, north, east)
+    print(f"{len(cells)} cell(s) at {climate_store.grid_degrees} degrees", file=sys.stderr)
+
+    loaded = 0
+    for cell_lat, cell_lng in cells:
+        if not args.refresh and climate_store.get(cell_lat, cell_lng) is not None:
+            continue
+        try:
+            with priority(BATCH):
+                normals = fetch_climate_normals(cell_lat, cell_lng, args.years)
+        except Exception as e:
+            print(f"Climate normals error at {cell_lat},{cell_lng}: {e}", file=sys.stderr)
+            continue
+        climate_store.put(cell_lat, cell_lng, normals, args.years)
+        loaded += 1
+        time.sleep(args.delay)
+    print(f"Loaded {loaded} cell(s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
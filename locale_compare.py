@@ -0,0 +1,206 @@
+"""
+Locale Compare - several locations side by side
+Evaluates every location of a comparison concurrently and lines the results
+up in one table: per-criterion counts with 0-1 scores and ranks, climate
+metrics, airport distances and an overall rank across the criteria.
+
+Work the locations have in common is done once. Location strings are geocoded
+once each and locations at the same point share one evaluation. Nearby points
+share Places tile fetches and climate grid cells; concurrent misses on either
+are coalesced into one upstream call.
+"""
+import os
+import re
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from locale_backend import CRITERIA_MAP, climate_store, evaluate_geocoded, geocode_location
+from locale_search import CLIMATE_METRICS, climate_value
+
+COMPARE_MAX_LOCATIONS = int(os.environ.get('LOCALE_COMPARE_MAX_LOCATIONS', '10'))
+
+_MILES = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+def compare_locations(locations: List[str], radius_miles: float = 3,
+                      selected_criteria: Optional[List[str]] = None,
+                      custom_amenities: Optional[List[str]] = None,
+                      restaurant_min_rating: float = 0,
+                      deadline_seconds: Optional[float] = None,
+                      full_coverage: bool = False,
+                      coverage_budget: Optional[int] = None,
+                      details: bool = False) -> Dict:
+    """
+    Evaluate locations with the same parameters and compare them
+
+    Takes evaluate_location's arguments with a list of locations instead of
+    one. Every row of the result is a list aligned with 'locations'; a
+    location that cannot be geocoded has None throughout. Ranks are 1 for the
+    best value, with ties sharing a rank. Scores run from 0 (worst) to 1
+    (best). Counts are capped at the Places result limit unless full_coverage
+    is set. Climate metrics are not ranked because which way is better is up
+    to the user.
+
+    With details=True the result also carries each location's full evaluation
+    under 'evaluations', shared between locations at the same point.
+    """
+    if not locations:
+        raise ValueError('At least one location is required')
+    if len(locations) > COMPARE_MAX_LOCATIONS:
+        raise ValueError(f'At most {COMPARE_MAX_LOCATIONS} locations per comparison')
+
+    queries = list(dict.fromkeys(' '.join(location.lower().split()) for location in locations))
+    with ThreadPoolExecutor(max_workers=len(queries), thread_name_prefix='locale-compare') as pool:
+        geocoded = dict(zip(queries, _map(pool, geocode_location, queries)))
+
+        # One evaluation per distinct point, however many locations resolve to it
+        points = {}
+        for location in locations:
+            geo = geocoded[' '.join(location.lower().split())]
+            if geo:
+                points.setdefault((round(geo['lat'], 6), round(geo['lng'], 6)), (geo, location))
+
+        def evaluate(point):
+            geo, location = points[point]
+            return evaluate_geocoded(geo, location, radius_miles, selected_criteria, custom_amenities,
+                                     restaurant_min_rating, deadline_seconds=deadline_seconds,
+                                     full_coverage=full_coverage, coverage_budget=coverage_budget)
+
+        evaluated = dict(zip(points, _map(pool, evaluate, list(points))))
+
+    evaluations = []
+    for location in locations:
+        geo = geocoded[' '.join(location.lower().split())]
+        evaluations.append(evaluated[(round(geo['lat'], 6), round(geo['lng'], 6))] if geo else None)
+
+    result = {
+        'radius_miles': radius_miles,
+        'locations': [_location_entry(location, evaluation)
+                      for location, evaluation in zip(locations, evaluations)],
+        **comparison_table(evaluations),
+        'stats': {
+            'locations': len(locations),
+            'evaluations': len(points),
+            'climate_cells': (len({climate_store.cell_for(*point) for point in points})
+                              if climate_store is not None else None),
+        },
+    }
+    if details:
+        result['evaluations'] = evaluations
+    return result
+
+
+def _map(pool: ThreadPoolExecutor, func, items: list) -> list:
+    """func over items on the comparison's pool, with the request context carried along."""
+    futures = [pool.submit(contextvars.copy_context().run, func, item) for item in items]
+    return [future.result() for future in futures]
+
+
+def _location_entry(query: str, evaluation: Optional[Dict]) -> Dict:
+    if evaluation is None:
+        return {'query': query, 'error': 'Location not found'}
+    entry = {'query': query, 'location': evaluation['location'], 'coordinates': evaluation['coordinates']}
+    if evaluation.get('timed_out'):
+        entry['timed_out'] = evaluation['timed_out']
+    return entry
+
+
+def comparison_table(evaluations: List[Optional[Dict]]) -> Dict:
+    """The 'criteria', 'climate', 'transportation' and 'overall' rows for aligned evaluations."""
+    keys = []
+    for evaluation in evaluations:
+        if evaluation is not None:
+            keys.extend(key for key in evaluation['amenities'] if key not in keys)
+
+    criteria = {}
+    for key in keys:
+        amenities = [evaluation['amenities'].get(key) if evaluation is not None else None
+                     for evaluation in evaluations]
+        # A count cut off by the deadline (or the quota) is unknown, not zero
+        criteria[key] = rank_row([amenity['count'] if amenity and not amenity.get('timed_out') else None
+                                  for amenity in amenities])
+        if any(amenity and 'complete' in amenity for amenity in amenities):
+            criteria[key]['complete'] = [amenity.get('complete') if amenity else None for amenity in amenities]
+
+    climate = {
+        metric: {'values': [climate_value(metric, evaluation['climate']) if evaluation is not None else None
+                            for evaluation in evaluations]}
+        for metric in CLIMATE_METRICS
+    }
+
+    airports = [evaluation['transportation'] if evaluation is not None else None for evaluation in evaluations]
+    transportation = {
+        'nearest_airport': [airport['nearest_airport'] if airport else None for airport in airports],
+        'airport_distance': rank_row([_miles(airport['airport_distance']) if airport else None
+                                      for airport in airports], higher_is_better=False),
+    }
+
+    # Overall: mean criterion score, so each criterion weighs the same
+    overall = []
+    for i, evaluation in enumerate(evaluations):
+        scores = [row['scores'][i] for row in criteria.values() if row['scores'][i] is not None]
+        overall.append(round(sum(scores) / len(scores), 3) if evaluation is not None and scores else None)
+
+    return {'criteria': criteria, 'climate': climate, 'transportation': transportation,
+            'overall': rank_row(overall)}
+
+
+def rank_row(values: List[Optional[float]], higher_is_better: bool = True) -> Dict:
+    """{'values', 'scores', 'ranks'} for one metric; None values get no score or rank.
+
+    Scores are min-max normalized to 0-1 with 1 for the best value (all 1
+    when every value is equal). Ranks use 1 for the best, ties sharing a rank.
+    """
+    present = [value for value in values if value is not None]
+    low, high = (min(present), max(present)) if present else (0, 0)
+    scores, ranks = [], []
+    for value in values:
+        if value is None:
+            scores.append(None)
+            ranks.append(None)
+            continue
+        if high == low:
+            scores.append(1.0)
+        else:
+            scores.append(round((value - low if higher_is_better else high - value) / (high - low), 3))
+        better = sum(1 for other in present if (other > value if higher_is_better else other < value))
+        ranks.append(better + 1)
+    return {'values': values, 'scores': scores, 'ranks': ranks}
+
+
+def _miles(distance) -> Optional[float]:
+    """Airport distance ('12.3 mi') as a number, or None ('N/A')."""
+    match = _MILES.search(str(distance or ''))
+    return float(match.group()) if match else None
+
+
+def parse_compare_request(data: Dict) -> Dict:
+    """Keyword arguments for compare_locations from a request body; raises ValueError."""
+    if not data or not isinstance(data.get('locations'), list) or not data['locations']:
+        raise ValueError('A non-empty locations list is required')
+    locations = [location.strip() for location in data['locations']
+                 if isinstance(location, str) and location.strip()]
+    if len(locations) != len(data['locations']):
+        raise ValueError('Every location must be a non-empty string')
+    criteria = data.get('criteria')  # None = all criteria
+    if criteria is not None:
+        unknown = [c for c in criteria if c not in CRITERIA_MAP]
+        if unknown:
+            raise ValueError(f"Unknown criteria: {', '.join(map(str, unknown))}")
+    try:
+        deadline_seconds = data.get('deadline_seconds')
+        coverage_budget = data.get('coverage_budget')
+        return {
+            'locations': locations,
+            'radius_miles': float(data.get('radius_miles', 3)),
+            'selected_criteria': criteria,
+            'custom_amenities': data.get('custom_amenities', []),
+            'restaurant_min_rating': float(data.get('restaurant_min_rating', 0)),
+            'deadline_seconds': float(deadline_seconds) if deadline_seconds is not None else None,
+            'full_coverage': bool(data.get('full_coverage', False)),
+            'coverage_budget': int(coverage_budget) if coverage_budget is not None else None,
+            'details': bool(data.get('details', False)),
+        }
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Invalid comparison request: {e}')
@@ -0,0 +1,188 @@
+"""
+Locale Geo - spatial helpers for the backend
+Great-circle distances (vectorized with NumPy when available) and geohash
+tiling used to share Places lookups between nearby centers
+"""
+import math
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: pure-Python fallback below
+    np = None
+
+METERS_PER_DEGREE_LAT = 111320.0
+EARTH_RADIUS_MILES = 3958.8
+
+# Below this many points the per-call overhead of NumPy outweighs the gain
+VECTORIZE_MIN_POINTS = 16
+
+
+def haversine_miles(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two coordinates, in miles."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_miles_many(lat: float, lng: float,
+                         lats: Sequence[float], lngs: Sequence[float]) -> List[float]:
+    """Great-circle distances in miles from one center to many points."""
+    if np is None or len(lats) < VECTORIZE_MIN_POINTS:
+        return [haversine_miles(lat, lng, p_lat, p_lng) for p_lat, p_lng in zip(lats, lngs)]
+    phi1 = math.radians(lat)
+    phi2 = np.radians(np.asarray(lats, dtype=float))
+    dlmb = np.radians(np.asarray(lngs, dtype=float) - lng)
+    a = np.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return (2 * EARTH_RADIUS_MILES * np.arcsin(np.minimum(1.0, np.sqrt(a)))).tolist()
+
+
+def nearest_within(lat: float, lng: float, lats: Sequence[float], lngs: Sequence[float],
+                   radius_miles: Optional[float] = None) -> List[Tuple[int, float]]:
+    """(index, distance) of points within radius_miles of a center, nearest first.
+
+    Distances, the radius filter and the ordering are done in one pass over the
+    whole array. With no radius every point is returned.
+    """
+    if np is None or len(lats) < VECTORIZE_MIN_POINTS:
+        distances = haversine_miles_many(lat, lng, lats, lngs)
+        hits = [(i, d) for i, d in enumerate(distances) if radius_miles is None or d <= radius_miles]
+        return sorted(hits, key=lambda hit: hit[1])
+    distances = np.asarray(haversine_miles_many(lat, lng, lats, lngs))
+    indices = np.arange(len(distances))
+    if radius_miles is not None:
+        indices = indices[distances <= radius_miles]
+    indices = indices[np.argsort(distances[indices], kind='stable')]
+    return list(zip(indices.tolist(), distances[indices].tolist()))
+
+
+_GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_GEOHASH_INDEX = {c: i for i, c in enumerate(_GEOHASH_BASE32)}
+
+
+def geohash_encode(lat: float, lng: float, precision: int) -> str:
+    """Geohash string of the given length for a coordinate."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # geohash interleaves bits starting with longitude
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                value = (value << 1) | 1
+                lng_lo = mid
+            else:
+                value <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def geohash_bbox(geohash: str) -> Tuple[float, float, float, float]:
+    """Bounding box (south, west, north, east) of a geohash cell."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    even = True
+    for char in geohash:
+        value = _GEOHASH_INDEX[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                if bit:
+                    lng_lo = mid
+                else:
+                    lng_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return lat_lo, lng_lo, lat_hi, lng_hi
+
+
+def geohash_center(geohash: str) -> Tuple[float, float]:
+    """Center (lat, lng) of a geohash cell."""
+    south, west, north, east = geohash_bbox(geohash)
+    return (south + north) / 2, (west + east) / 2
+
+
+def geohashes_in_bbox(south: float, west: float, north: float, east: float, precision: int) -> List[str]:
+    """Every geohash cell of the given length overlapping a bounding box."""
+    s, w, n, e = geohash_bbox(geohash_encode(south, west, precision))
+    height, width = n - s, e - w
+    cells = []
+    lat = s + height / 2
+    while lat - height / 2 < north:
+        lng = w + width / 2
+        while lng - width / 2 < east:
+            cells.append(geohash_encode(min(lat, 90.0), min(lng, 180.0), precision))
+            lng += width
+        lat += height
+    return cells
+
+
+def cell_half_diagonal_meters(geohash: str) -> float:
+    """Distance from a geohash cell's center to its corners, in meters."""
+    south, west, north, east = geohash_bbox(geohash)
+    mid_lat = math.radians((south + north) / 2)
+    height = (north - south) * METERS_PER_DEGREE_LAT
+    width = (east - west) * METERS_PER_DEGREE_LAT * math.cos(mid_lat)
+    return math.hypot(height, width) / 2
+
+
+def covering_tile(lat: float, lng: float, radius_meters: float,
+                  max_fraction: float = 0.25, max_precision: int = 9) -> str:
+    """Coarsest geohash cell containing (lat, lng) that is small next to the radius.
+
+    The cell's half-diagonal is kept within max_fraction of radius_meters, so a
+    circle of radius + half-diagonal around the cell center covers the search
+    circle of every point inside the cell with modest over-fetch.
+    """
+    for precision in range(1, max_precision + 1):
+        tile = geohash_encode(lat, lng, precision)
+        if cell_half_diagonal_meters(tile) <= max_fraction * radius_meters:
+            return tile
+    return geohash_encode(lat, lng, max_precision)
+
+
+def offset_point(lat: float, lng: float, north_meters: float, east_meters: float) -> Tuple[float, float]:
+    """Coordinate displaced by the given distances north and east (small offsets)."""
+    dlat = north_meters / METERS_PER_DEGREE_LAT
+    dlng = east_meters / (METERS_PER_DEGREE_LAT * math.cos(math.radians(lat)))
+    return lat + dlat, lng + dlng
+
+
+def quadrant_circles(lat: float, lng: float, radius_meters: float) -> list:
+    """Four sub-circles that together cover a circle.
+
+    Each covers one quadrant of the circle's bounding square: centered half a
+    radius away along both axes, with radius r / sqrt(2).
+    """
+    half = radius_meters / 2
+    sub_radius = radius_meters / math.sqrt(2)
+    return [
+        (*offset_point(lat, lng, north * half, east * half), sub_radius)
+        for north in (1, -1) for east in (1, -1)
+    ]
@@ -0,0 +1,216 @@
+"""
+Locale Metrics - latency histograms, counters and per-request timings
+Spans around each evaluation stage and upstream call feed in-process
+Prometheus-style histograms, served as text by /api/metrics. A request can
+also collect its own spans (see collect_timings) to return as a 'timings'
+block. Metrics are per process; scrape each worker.
+"""
+import time
+import bisect
+import threading
+import contextlib
+import contextvars
+from typing import Callable, Dict, List, Tuple
+
+# Seconds; spans from sub-millisecond cache hits to the 20 s evaluation deadline
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+
+
+def _label_text(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(n, '')) for n in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        lines += [f'{self.name}{_label_text(self.label_names, key)} {value}' for key, value in values]
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed set of label names."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, '')) for n in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted((key, (list(counts), total, n)) for key, (counts, total, n) in self._series.items())
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for key, (counts, total, n) in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                labels = _label_text(self.label_names, key, 'le="%s"' % le)
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            lines.append(f'{self.name}_sum{_label_text(self.label_names, key)} {round(total, 6)}')
+            lines.append(f'{self.name}_count{_label_text(self.label_names, key)} {n}')
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics of this process plus collectors for values owned elsewhere."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Histogram:
+        metric = Histogram(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collect: Callable[[], List[str]]):
+        """Add a function returning exposition lines, called on every render."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        for collect in self._collectors:
+            lines += collect()
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    'locale_stage_seconds', 'Duration of evaluation stages', ('stage', 'criterion'))
+UPSTREAM_SECONDS = registry.histogram(
+    'locale_upstream_request_seconds', 'Duration of upstream API calls', ('endpoint',))
+UPSTREAM_ERRORS = registry.counter(
+    'locale_upstream_errors_total', 'Upstream API calls that failed', ('endpoint', 'error'))
+EVALUATION_TIMEOUTS = registry.counter(
+    'locale_evaluation_timeouts_total', 'Evaluation lookups that missed the deadline', ('section',))
+
+
+class Timings:
+    """Spans recorded on behalf of one request."""
+
+    def __init__(self):
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            total = self._totals.setdefault(name, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+
+    def report(self) -> Dict[str, Dict]:
+        """{span name: {'ms': total milliseconds, 'count': spans}}."""
+        with self._lock:
+            return {name: {'ms': round(seconds * 1000, 1), 'count': count}
+                    for name, (seconds, count) in self._totals.items()}
+
+
+# Travels into pool threads and asyncio tasks with the rest of the request context
+_timings = contextvars.ContextVar('locale_metrics_timings', default=None)
+
+
+@contextlib.contextmanager
+def collect_timings():
+    """Collect a Timings of the spans recorded inside the block."""
+    timings = Timings()
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def _record(name: str, seconds: float):
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextlib.contextmanager
+def span(stage: str, criterion: str = ''):
+    """Time a block as an evaluation stage, optionally for one criterion."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage, criterion=criterion)
+        _record(f'{stage}:{criterion}' if criterion else stage, elapsed)
+
+
+@contextlib.contextmanager
+def upstream_span(endpoint: str):
+    """Time an upstream call and count it as an error if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        status = getattr(getattr(e, 'response', None), 'status_code', None)
+        UPSTREAM_ERRORS.inc(endpoint=endpoint, error=status or type(e).__name__)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_SECONDS.observe(elapsed, endpoint=endpoint)
+        _record(f'upstream:{endpoint}', elapsed)
+
+
+def cache_stats_lines(stats: Dict[str, Dict]) -> List[str]:
+    """Exposition lines for ResponseCache.stats()."""
+    lines = ['# HELP locale_cache_requests_total Response cache lookups',
+             '# TYPE locale_cache_requests_total counter']
+    for namespace, counters in sorted(stats.items()):
+        for result, field in (('hit', 'hits'), ('miss', 'misses')):
+            lines.append(f'locale_cache_requests_total{{namespace="{namespace}",result="{result}"}} '
+                         f'{counters[field]}')
+    lines += ['# HELP locale_cache_hit_ratio Response cache hit ratio',
+              '# TYPE locale_cache_hit_ratio gauge']
+    lines += [f'locale_cache_hit_ratio{{namespace="{namespace}"}} {counters["hit_ratio"]}'
+              for namespace, counters in sorted(stats.items())]
+    return lines
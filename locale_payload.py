@@ -0,0 +1,250 @@
+"""
+Locale Payload - response shaping for evaluation results
+Trims the per-place lists of an evaluate_location result to the fields and
+number of places a client renders, and optionally packs them into a compact
+form: one de-duplicated place table with a column per field, referenced by
+index from each criterion, or into a diff against an evaluation of the same
+location at another radius. Also parses the request body fields both API
+servers share, and negotiates gzip/brotli response compression.
+"""
+import os
+import gzip
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only without it
+    brotli = None
+
+PLACE_FIELDS = ('name', 'distance', 'rating', 'url', 'lat', 'lng')
+# Coordinates in compact payloads are rounded to about a meter
+COMPACT_COORD_DECIMALS = 5
+COMPRESS_MIN_BYTES = int(os.environ.get('LOCALE_COMPRESS_MIN_BYTES', '1024'))
+
+
+def parse_fields(value) -> Optional[Tuple[str, ...]]:
+    """Place fields from a list or comma-separated string (None = all); raises ValueError."""
+    if value is None or value == '':
+        return None
+    names = value.split(',') if isinstance(value, str) else value
+    if not isinstance(names, (list, tuple)):
+        raise ValueError('fields must be a list or a comma-separated string')
+    fields = tuple(str(name).strip() for name in names if str(name).strip())
+    unknown = [name for name in fields if name not in PLACE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown place field(s): {', '.join(unknown)}; "
+                         f"choose from {', '.join(PLACE_FIELDS)}")
+    return fields
+
+
+def parse_limit(value) -> Optional[int]:
+    """Places per criterion from a request value (None = all); raises ValueError."""
+    if value is None or value == '':
+        return None
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 0:
+        raise ValueError('limit must be zero or more')
+    return limit
+
+
+def parse_shape(data: Dict) -> Dict:
+    """Response shaping options (apply_shape's keyword arguments) from a request body; raises ValueError."""
+    response_format = data.get('format', 'full')
+    if response_format not in ('full', 'compact'):
+        raise ValueError("format must be 'full' or 'compact'")
+    return {
+        'compact': response_format == 'compact',
+        'fields': parse_fields(data.get('fields')),  # None = every place field
+        'limit': parse_limit(data.get('limit')),  # None = every place; counts are unaffected
+    }
+
+
+def parse_previous_radius(data: Dict) -> Optional[float]:
+    """previous_radius_miles from a request body (None = full response); raises ValueError."""
+    previous = data.get('previous_radius_miles')
+    if previous is None:
+        return None
+    if data.get('format', 'full') != 'full' or data.get('limit') is not None:
+        raise ValueError('previous_radius_miles cannot be combined with format or limit')
+    try:
+        return float(previous)
+    except (TypeError, ValueError):
+        raise ValueError('previous_radius_miles must be a number')
+
+
+def parse_evaluation_request(data: Dict) -> Dict:
+    """Keyword arguments for evaluate_location/iter_evaluation from a request body."""
+    deadline_seconds = data.get('deadline_seconds')  # None = server default
+    coverage_budget = data.get('coverage_budget')  # None = server default
+    return {
+        'location': data['location'],
+        'radius_miles': float(data.get('radius_miles', 3)),
+        'selected_criteria': data.get('criteria'),  # None = all criteria
+        'custom_amenities': data.get('custom_amenities', []),  # Custom place types
+        'restaurant_min_rating': float(data.get('restaurant_min_rating', 0)),  # Minimum rating for restaurants
+        'deadline_seconds': float(deadline_seconds) if deadline_seconds is not None else None,
+        'full_coverage': bool(data.get('full_coverage', False)),  # True counts past the 20-result cap
+        'coverage_budget': int(coverage_budget) if coverage_budget is not None else None,
+    }
+
+
+def apply_shape(evaluation: Dict, compact: bool = False, fields: Optional[Iterable[str]] = None,
+                limit: Optional[int] = None) -> Dict:
+    """An evaluation shaped as parse_shape's options ask: compact_evaluation or shape_evaluation."""
+    if compact:
+        return compact_evaluation(evaluation, fields, limit)
+    return shape_evaluation(evaluation, fields, limit)
+
+
+def shape_comparison(comparison: Dict, shape: Dict) -> Dict:
+    """A compare_locations result with its per-location evaluations (if any) shaped."""
+    if 'evaluations' not in comparison:
+        return comparison
+    return {**comparison, 'evaluations': [apply_shape(evaluation, **shape) if evaluation is not None else None
+                                          for evaluation in comparison['evaluations']]}
+
+
+def shape_evaluation(evaluation: Dict, fields: Optional[Iterable[str]] = None,
+                     limit: Optional[int] = None) -> Dict:
+    """An evaluation with each criterion's places trimmed to fields and limit.
+
+    Counts are left as they are. Returns a new dict: evaluate_location results
+    may be shared between concurrent callers and must not be mutated.
+    """
+    if fields is None and limit is None:
+        return evaluation
+    return {**evaluation, 'amenities': {key: shape_amenity(amenity, fields, limit)
+                                        for key, amenity in evaluation['amenities'].items()}}
+
+
+def shape_amenity(amenity: Dict, fields: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> Dict:
+    """One criterion's result with its places trimmed to fields and limit."""
+    places = amenity.get('places', [])
+    if limit is not None:
+        places = places[:limit]
+    if fields is not None:
+        places = [{name: place.get(name) for name in fields} for place in places]
+    return {**amenity, 'places': places}
+
+
+def compact_evaluation(evaluation: Dict, fields: Optional[Iterable[str]] = None,
+                       limit: Optional[int] = None) -> Dict:
+    """An evaluation with places moved into one de-duplicated columnar table.
+
+    'places' maps each field to a list with one entry per distinct place;
+    each criterion's 'places' becomes a list of indexes into it. A place
+    listed under several criteria (a bar that is also a restaurant) is stored
+    once. When every URL shares a prefix it is sent once as 'url_prefix'.
+    """
+    fields = tuple(fields) if fields is not None else PLACE_FIELDS
+    columns = {name: [] for name in fields}
+    index_of = {}
+    amenities = {}
+
+    for key, amenity in evaluation['amenities'].items():
+        places = amenity.get('places', [])
+        if limit is not None:
+            places = places[:limit]
+        indexes = []
+        for place in places:
+            identity = place_key(place)
+            index = index_of.get(identity)
+            if index is None:
+                index = index_of[identity] = len(index_of)
+                for name in fields:
+                    value = place.get(name)
+                    if name in ('lat', 'lng') and value is not None:
+                        value = round(value, COMPACT_COORD_DECIMALS)
+                    columns[name].append(value)
+            indexes.append(index)
+        amenities[key] = {**amenity, 'places': indexes}
+
+    compact = {**evaluation, 'format': 'compact', 'places': columns, 'amenities': amenities}
+    if 'url' in columns:
+        prefix = _common_prefix([url for url in columns['url'] if url])
+        if prefix:
+            compact['url_prefix'] = prefix
+            columns['url'] = [url[len(prefix):] if url else url for url in columns['url']]
+    return compact
+
+
+def radius_diff(previous: Dict, current: Dict, fields: Optional[Iterable[str]] = None) -> Dict:
+    """What a client holding `previous` needs to show `current`, the same location at another radius.
+
+    Each criterion carries its new count, the places it did not have before
+    ('added', nearest first) and the place_key of each place to drop
+    ('removed'). A criterion missing from `previous` is sent in full. Climate
+    and transportation do not depend on the radius and are left out.
+    """
+    amenities = {}
+    for key, amenity in current['amenities'].items():
+        before = previous['amenities'].get(key)
+        if before is None:
+            amenities[key] = shape_amenity(amenity, fields)
+            continue
+        old = {place_key(place) for place in before['places']}
+        new = {place_key(place) for place in amenity['places']}
+        added = [place for place in amenity['places'] if place_key(place) not in old]
+        diff = {name: value for name, value in amenity.items() if name != 'places'}
+        diff['added'] = shape_amenity({'places': added}, fields)['places']
+        diff['removed'] = [place_key(place) for place in before['places'] if place_key(place) not in new]
+        amenities[key] = diff
+
+    result = {
+        'format': 'diff',
+        'location': current['location'],
+        'coordinates': current['coordinates'],
+        'radius_miles': current['radius_miles'],
+        'previous_radius_miles': previous['radius_miles'],
+        'amenities': amenities,
+    }
+    if current.get('timed_out'):
+        result['timed_out'] = current['timed_out']
+    return result
+
+
+def place_key(place: Dict) -> str:
+    """Identity of a place in an evaluation: its Maps URL, or name and coordinates without one."""
+    return place.get('url') or f"{place.get('name')}@{place.get('lat')},{place.get('lng')}"
+
+
+def _common_prefix(urls: list) -> str:
+    """Longest shared prefix of the URLs, cut back to its last '/', '?' or '='."""
+    if len(urls) < 2:
+        return ''
+    first, last = min(urls), max(urls)
+    n = 0
+    while n < min(len(first), len(last)) and first[n] == last[n]:
+        n += 1
+    prefix = first[:n]
+    cut = max(prefix.rfind('/'), prefix.rfind('?'), prefix.rfind('='))
+    return prefix[:cut + 1] if cut >= 0 else ''
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """'br' or 'gzip' if the client accepts it (brotli preferred when installed), else None."""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
@@ -0,0 +1,307 @@
+"""
+Locale Quota - upstream rate limiting and call accounting
+A token bucket per upstream endpoint (queries per second plus an optional
+daily budget) that every Google and Open-Meteo call passes through, shared by
+all workers when backed by SQLite. Batch work only spends tokens above a
+reserve kept for interactive requests, and each request can collect a report
+of the upstream calls it made.
+"""
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+import contextlib
+import contextvars
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+
+# Default per-endpoint rates follow Google's default per-method quotas
+# (600 QPM for Places, 3000 QPM for Geocoding) and Open-Meteo's 600 calls/min
+DEFAULT_QPS = {
+    'places_nearby': 10,
+    'places_text': 10,
+    'geocode': 50,
+    'autocomplete': 10,
+    'open_meteo': 10,
+}
+BILLABLE_ENDPOINTS = {'places_nearby', 'places_text', 'geocode', 'autocomplete'}
+
+
+class QuotaExceeded(Exception):
+    """An upstream call was refused by the daily budget or would wait too long."""
+
+
+class EndpointLimit:
+    """Rate (qps, 0 = unlimited), burst size and daily budget (0 = unlimited) of one endpoint."""
+
+    def __init__(self, qps: float, daily: int = 0, burst: Optional[float] = None):
+        self.qps = qps
+        self.daily = daily
+        # Google enforces quotas per minute, so a few seconds' worth of burst is safe
+        self.burst = burst if burst is not None else max(1.0, qps * 10)
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def _take(state: Dict, limit: EndpointLimit, now: float, priority: str, reserve: float,
+          max_wait: float, endpoint: str):
+    """Try to take one token from a bucket state, in place.
+
+    Returns (taken, wait_seconds). Interactive calls always take a token, going
+    into debt and waiting it off if the bucket is empty. Batch calls only take
+    tokens above the interactive reserve and otherwise report how long to wait
+    before trying again. Raises QuotaExceeded past the daily budget (batch
+    stops short of its reserve) or when the wait would exceed max_wait.
+    """
+    today = _today()
+    if state['day'] != today:
+        state['day'] = today
+        state['used'] = 0
+
+    if limit.daily:
+        cap = limit.daily if priority == INTERACTIVE else limit.daily * (1 - reserve)
+        if state['used'] >= cap:
+            raise QuotaExceeded(f"daily {priority} budget for {endpoint} exhausted ({state['used']} calls)")
+
+    if limit.qps <= 0:
+        state['used'] += 1
+        return True, 0.0
+
+    tokens = min(limit.burst, state['tokens'] + (now - state['updated_at']) * limit.qps)
+    state['updated_at'] = now
+    floor = reserve * limit.burst if priority == BATCH else 0.0
+
+    if tokens - 1 >= floor:
+        state['tokens'] = tokens - 1
+        state['used'] += 1
+        return True, 0.0
+
+    if priority == INTERACTIVE:
+        wait = (1 - tokens) / limit.qps
+        if wait > max_wait:
+            state['tokens'] = tokens
+            raise QuotaExceeded(f"{endpoint} rate limit: would wait {wait:.1f}s")
+        state['tokens'] = tokens - 1
+        state['used'] += 1
+        return True, wait
+
+    state['tokens'] = tokens
+    return False, (floor + 1 - tokens) / limit.qps
+
+
+class MemoryBuckets:
+    """Bucket state for this process only."""
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def take(self, endpoint: str, fn):
+        with self._lock:
+            state = self._states.setdefault(endpoint, {
+                'tokens': None, 'updated_at': time.time(), 'day': _today(), 'used': 0,
+            })
+            return fn(state)
+
+
+class SQLiteBuckets:
+    """Bucket state in a SQLite file, shared by every worker on the host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS quota_buckets ('
+            ' endpoint TEXT PRIMARY KEY,'
+            ' tokens REAL,'
+            ' updated_at REAL NOT NULL,'
+            ' day TEXT NOT NULL,'
+            ' used INTEGER NOT NULL)'
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode; take() manages its own write transaction
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def take(self, endpoint: str, fn):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated_at, day, used FROM quota_buckets WHERE endpoint = ?',
+                               (endpoint,)).fetchone()
+            if row is None:
+                state = {'tokens': None, 'updated_at': time.time(), 'day': _today(), 'used': 0}
+            else:
+                state = dict(zip(('tokens', 'updated_at', 'day', 'used'), row))
+            try:
+                return fn(state)
+            finally:
+                conn.execute('INSERT OR REPLACE INTO quota_buckets (endpoint, tokens, updated_at, day, used)'
+                             ' VALUES (?, ?, ?, ?, ?)',
+                             (endpoint, state['tokens'], state['updated_at'], state['day'], state['used']))
+        finally:
+            conn.execute('COMMIT')
+
+
+class QuotaManager:
+    """Token buckets per upstream endpoint, consulted before every upstream call."""
+
+    def __init__(self, limits: Dict[str, EndpointLimit], buckets=None,
+                 batch_reserve: float = 0.2, max_wait: float = 10.0):
+        self.limits = limits
+        self.buckets = buckets or MemoryBuckets()
+        self.batch_reserve = batch_reserve
+        self.max_wait = max_wait
+
+    def _reserve(self, endpoint: str, max_wait: float):
+        limit = self.limits.get(endpoint)
+        if limit is None:
+            return True, 0.0
+        priority = current_priority()
+
+        def take(state):
+            if state['tokens'] is None:
+                state['tokens'] = limit.burst
+            return _take(state, limit, time.time(), priority, self.batch_reserve, max_wait, endpoint)
+
+        try:
+            return self.buckets.take(endpoint, take)
+        except sqlite3.Error as e:
+            print(f"Quota store error ({endpoint}): {e}")
+            return True, 0.0
+
+    def _wait_cap(self, give_up: Optional[float]) -> float:
+        if give_up is None:
+            return self.max_wait
+        return min(self.max_wait, give_up - time.monotonic())
+
+    def _check_wait(self, endpoint: str, taken: bool, wait: float, give_up: Optional[float]):
+        # Interactive waits are capped inside _take; batch retries give up here
+        if not taken and give_up is not None and time.monotonic() + wait > give_up:
+            raise QuotaExceeded(f"{endpoint} rate limit: would wait past the deadline")
+
+    def acquire(self, endpoint: str, max_wait: Optional[float] = None):
+        """Block until a call to endpoint is allowed; raises QuotaExceeded.
+
+        max_wait (e.g. the time left before a deadline) caps the wait below
+        the configured one, for batch calls as well as interactive ones.
+        """
+        give_up = None if max_wait is None else time.monotonic() + max_wait
+        while True:
+            taken, wait = self._reserve(endpoint, self._wait_cap(give_up))
+            self._check_wait(endpoint, taken, wait, give_up)
+            if wait:
+                time.sleep(wait)
+            if taken:
+                return
+
+    async def acquire_async(self, endpoint: str, max_wait: Optional[float] = None):
+        """acquire() for the async client.
+
+        With SQLite buckets the reservation runs on a worker thread, since it
+        may wait on another worker's write lock.
+        """
+        give_up = None if max_wait is None else time.monotonic() + max_wait
+        while True:
+            if isinstance(self.buckets, SQLiteBuckets):
+                taken, wait = await asyncio.to_thread(self._reserve, endpoint, self._wait_cap(give_up))
+            else:
+                taken, wait = self._reserve(endpoint, self._wait_cap(give_up))
+            self._check_wait(endpoint, taken, wait, give_up)
+            if wait:
+                await asyncio.sleep(wait)
+            if taken:
+                return
+
+
+class UsageReport:
+    """Upstream calls made on behalf of one request, by endpoint."""
+
+    def __init__(self):
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str):
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def report(self) -> Dict:
+        with self._lock:
+            calls = dict(self.calls)
+        return {
+            'upstream_calls': calls,
+            'billable_calls': sum(n for endpoint, n in calls.items() if endpoint in BILLABLE_ENDPOINTS),
+        }
+
+
+# Both travel with the request's context: thread-pool tasks are submitted via
+# contextvars.copy_context() and asyncio tasks copy the context themselves
+_priority = contextvars.ContextVar('locale_quota_priority', default=INTERACTIVE)
+_usage = contextvars.ContextVar('locale_quota_usage', default=None)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+@contextlib.contextmanager
+def priority(level: str):
+    """Run upstream calls made inside the block at INTERACTIVE or BATCH priority."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@contextlib.contextmanager
+def track_usage():
+    """Collect a UsageReport of the upstream calls made inside the block."""
+    report = UsageReport()
+    token = _usage.set(report)
+    try:
+        yield report
+    finally:
+        _usage.reset(token)
+
+
+def record_call(endpoint: str):
+    report = _usage.get()
+    if report is not None:
+        report.record(endpoint)
+
+
+def create_quota_from_env() -> QuotaManager:
+    """Build the quota manager described by LOCALE_QUOTA_* environment variables.
+
+    LOCALE_QUOTA_<ENDPOINT>_QPS, _BURST and _DAILY override the rate, bucket
+    size and daily budget per endpoint (0 = unlimited). LOCALE_QUOTA_PATH
+    shares the buckets between workers through a SQLite file.
+    """
+    limits = {}
+    for endpoint, qps in DEFAULT_QPS.items():
+        prefix = f'LOCALE_QUOTA_{endpoint.upper()}'
+        limits[endpoint] = EndpointLimit(
+            qps=float(os.environ.get(f'{prefix}_QPS', qps)),
+            daily=int(os.environ.get(f'{prefix}_DAILY', '0')),
+            burst=float(os.environ[f'{prefix}_BURST']) if f'{prefix}_BURST' in os.environ else None,
+        )
+    path = os.environ.get('LOCALE_QUOTA_PATH')
+    buckets = SQLiteBuckets(path) if path else MemoryBuckets()
+    return QuotaManager(
+        limits, buckets,
+        batch_reserve=float(os.environ.get('LOCALE_QUOTA_BATCH_RESERVE', '0.2')),
+        max_wait=float(os.environ.get('LOCALE_QUOTA_MAX_WAIT', '10')),
+    )
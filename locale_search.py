@@ -0,0 +1,398 @@
+"""
+Locale Search - reverse search for areas matching amenity and climate criteria
+Tiles a bounding box into candidate cells and keeps the cells that meet every
+threshold (e.g. at least 3 coffee shops and a park within 1 mile, summer
+average below 85°F), ranked by how comfortably they clear them.
+
+Rules run one after another and each only looks at the cells that survived
+the previous ones, so put the most selective first. Climate rules are checked
+before amenity rules: one lookup per climate grid cell covers many candidates.
+For each amenity rule the surviving cells are grouped by geohash tile and
+each tile's places are fetched once, nearest first (tiles in parallel); every
+cell in the tile is then counted locally. Only cells the tile's 20 results
+neither satisfy nor reach get a search of their own, subdivided by the
+coverage engine if needed. Every Places request comes out of one budget.
+Cells whose climate is unavailable are kept, marked unknown, and ranked after
+the cells every rule was verified for.
+"""
+import os
+import re
+import math
+import contextvars
+from concurrent.futures import wait
+from typing import Dict, List, Optional
+
+from locale_backend import (CRITERIA_MAP, PLACES_MAX_RADIUS_METERS, RequestBudget, _cover_circle,
+                            _exact_search_key, _fetch_nearby_raw, _filter_places_by_type, _is_complete,
+                            _place_coords, _snapshot_search, _upstream_executor, get_climate_data,
+                            response_cache)
+from locale_climate import grid_cell
+from locale_geo import (METERS_PER_DEGREE_LAT, cell_half_diagonal_meters, covering_tile,
+                        geohash_center, haversine_miles, haversine_miles_many)
+from locale_metrics import span
+
+SEARCH_MAX_CELLS = int(os.environ.get('LOCALE_SEARCH_MAX_CELLS', '5000'))
+SEARCH_REQUEST_BUDGET = int(os.environ.get('LOCALE_SEARCH_BUDGET', '200'))
+# Largest tile half-diagonal as a fraction of a rule's within_miles: bigger
+# tiles mean fewer fetches but more results per fetch (and more saturation)
+SEARCH_TILE_FRACTION = float(os.environ.get('LOCALE_SEARCH_TILE_FRACTION', '3.0'))
+# A cell's score counts at most this many times a rule's min_count
+SCORE_CAP = 3.0
+# Largest within_miles: a cell's own search must fit in one searchNearby circle
+MAX_WITHIN_MILES = math.floor(PLACES_MAX_RADIUS_METERS / 1609.34 * 100) / 100
+
+# Climate metric -> how to read it from a get_climate_data block
+CLIMATE_METRICS = {
+    'avg_temp': lambda c: c.get('avg_temp_f'),
+    'annual_precipitation': lambda c: c.get('annual_precipitation'),
+    'sunny_days': lambda c: c.get('sunny_days'),
+    **{f'{season.lower()}_temp': (lambda c, s=season: c.get('seasonal_temps', {}).get(s))
+       for season in ('Spring', 'Summer', 'Fall', 'Winter')},
+}
+
+_NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+class AmenityRule:
+    """At least min_count places of a criterion within within_miles of the cell."""
+
+    def __init__(self, criterion: str, min_count: int = 1, within_miles: float = 1.0,
+                 min_rating: float = 0):
+        if criterion not in CRITERIA_MAP:
+            raise ValueError(f'Unknown criterion: {criterion}')
+        if min_count < 1:
+            raise ValueError(f'{criterion}: min_count must be >= 1')
+        if not 0 < within_miles <= MAX_WITHIN_MILES:
+            raise ValueError(f'{criterion}: within_miles must be more than 0 and at most {MAX_WITHIN_MILES}')
+        # Places are only filtered by rating for restaurants (see _filter_places_by_type)
+        if min_rating and 'restaurant' not in _types_list(criterion):
+            raise ValueError(f'{criterion}: min_rating only applies to restaurants')
+        self.criterion = criterion
+        self.min_count = int(min_count)
+        self.within_miles = float(within_miles)
+        self.min_rating = float(min_rating)
+
+
+class ClimateRule:
+    """A climate metric between min and max (either may be omitted)."""
+
+    def __init__(self, metric: str, min: Optional[float] = None, max: Optional[float] = None):
+        if metric not in CLIMATE_METRICS:
+            raise ValueError(f'Unknown climate metric: {metric}')
+        if min is None and max is None:
+            raise ValueError(f'{metric}: min or max is required')
+        self.metric = metric
+        self.min = min
+        self.max = max
+
+    def value(self, climate: Dict) -> Optional[float]:
+        return climate_value(self.metric, climate)
+
+    def accepts(self, value: float) -> bool:
+        return (self.min is None or value >= self.min) and (self.max is None or value <= self.max)
+
+
+def climate_value(metric: str, climate: Dict) -> Optional[float]:
+    """A CLIMATE_METRICS value from a get_climate_data block as a number ('72°F' -> 72.0), or None."""
+    raw = CLIMATE_METRICS[metric](climate)
+    if isinstance(raw, (int, float)):
+        return float(raw)
+    match = _NUMBER.search(str(raw or ''))
+    return float(match.group()) if match else None
+
+
+class _Cell:
+    __slots__ = ('lat', 'lng', 'amenities', 'climate', 'climate_unknown')
+
+    def __init__(self, lat: float, lng: float):
+        self.lat = lat
+        self.lng = lng
+        self.amenities = {}
+        self.climate = {}
+        self.climate_unknown = []  # metrics whose climate data was unavailable
+
+
+def grid_cells(bbox, cell_miles: float) -> List[_Cell]:
+    """Candidate cells: centers of a cell_miles grid over (south, west, north, east)."""
+    south, west, north, east = bbox
+    if not (-90 <= south < north <= 90 and -180 <= west < east <= 180):
+        raise ValueError('bbox must be [south, west, north, east]')
+    if cell_miles <= 0:
+        raise ValueError('cell_miles must be positive')
+
+    step_lat = cell_miles * 1609.34 / METERS_PER_DEGREE_LAT
+    rows = max(1, math.ceil((north - south) / step_lat))
+    mid_lat = math.radians((south + north) / 2)
+    step_lng = step_lat / max(0.01, math.cos(mid_lat))
+    cols = max(1, math.ceil((east - west) / step_lng))
+    if rows * cols > SEARCH_MAX_CELLS:
+        raise ValueError(f'{rows * cols} cells exceeds the limit of {SEARCH_MAX_CELLS}; '
+                         'use a smaller bbox or a larger cell_miles')
+
+    return [_Cell(min(north, south + (r + 0.5) * step_lat), min(east, west + (c + 0.5) * step_lng))
+            for r in range(rows) for c in range(cols)]
+
+
+def search_region(bbox, amenities: List[AmenityRule], climate: Optional[List[ClimateRule]] = None,
+                  cell_miles: float = 0.5, limit: int = 20, budget: Optional[int] = None,
+                  parallel: bool = True) -> Dict:
+    """
+    Find cells of a bounding box that meet every amenity and climate rule
+
+    Args:
+        bbox: (south, west, north, east) in degrees
+        amenities: AmenityRule thresholds, checked in order
+        climate: ClimateRule thresholds, checked before the amenity rules
+        cell_miles: Spacing of the candidate grid
+        limit: Most candidates to return
+        budget: Places requests the search may spend (defaults to
+            SEARCH_REQUEST_BUDGET); cells whose tiles it cannot pay for are
+            left unevaluated
+        parallel: Fetch each rule's tiles concurrently
+
+    Returns:
+        {'candidates': [...], 'stats': {...}}. Candidates are ranked by score,
+        the mean over amenity rules of count / min_count (capped at SCORE_CAP);
+        counts are the places seen, which may stop short of the true count
+        once a threshold is met. A cell is only returned if its counts were
+        actually observed, so a search cut short by the budget can miss cells
+        but never reports one that fails; stats says how many were missed.
+        Cells whose climate data is unavailable are the exception: they are
+        kept with the metric as None, listed under the candidate's
+        'climate_unknown' and ranked after every fully verified cell.
+    """
+    cells = grid_cells(bbox, cell_miles)
+    request_budget = RequestBudget(SEARCH_REQUEST_BUDGET if budget is None else budget)
+    stats = {'cells': len(cells), 'pruned': {}, 'uncertain': 0, 'unevaluated': 0, 'tiles': 0}
+
+    with span('search'):
+        for rule in climate or []:
+            if not cells:
+                break
+            with span('search', f'climate:{rule.metric}'):
+                kept = _apply_climate_rule(cells, rule, parallel)
+            stats['pruned'][f'climate:{rule.metric}'] = len(cells) - len(kept)
+            cells = kept
+
+        for rule in amenities:
+            if not cells:
+                break
+            with span('search', rule.criterion):
+                kept, rule_stats = _apply_amenity_rule(cells, rule, request_budget, parallel)
+            stats['pruned'][rule.criterion] = rule_stats['failed']
+            stats['uncertain'] += rule_stats['uncertain']
+            stats['unevaluated'] += rule_stats['unevaluated']
+            stats['tiles'] += rule_stats['tiles']
+            cells = kept
+
+    scored = sorted(((_score(cell, amenities), cell) for cell in cells),
+                    key=lambda item: (bool(item[1].climate_unknown), -item[0], _nearest_total(item[1])))
+    stats['matches'] = len(scored)
+    stats['climate_unknown'] = sum(1 for cell in cells if cell.climate_unknown)
+    stats['requests_spent'] = request_budget.spent
+    stats['complete'] = not stats['uncertain'] and not stats['unevaluated']
+
+    return {
+        'candidates': [{
+            'lat': round(cell.lat, 6),
+            'lng': round(cell.lng, 6),
+            'score': round(score, 3),
+            'amenities': cell.amenities,
+            'climate': cell.climate,
+            **({'climate_unknown': cell.climate_unknown} if cell.climate_unknown else {}),
+        } for score, cell in scored[:limit]],
+        'stats': stats,
+    }
+
+
+def _map(func, items: list, parallel: bool) -> list:
+    """func over items, on the upstream pool when parallel (request context carried along)."""
+    if not parallel or len(items) < 2:
+        return [func(item) for item in items]
+    futures = [_upstream_executor.submit(contextvars.copy_context().run, func, item) for item in items]
+    wait(futures)
+    return [future.result() for future in futures]
+
+
+def _apply_climate_rule(cells: List[_Cell], rule: ClimateRule, parallel: bool) -> List[_Cell]:
+    groups = {}
+    for cell in cells:
+        groups.setdefault(grid_cell(cell.lat, cell.lng), []).append(cell)
+
+    centers = list(groups)
+    blocks = _map(lambda center: get_climate_data(*center), centers, parallel)
+    kept = []
+    for center, block in zip(centers, blocks):
+        value = rule.value(block)
+        # 'N/A' (no data for the cell) cannot be ruled out, so it is kept as unknown
+        if value is None or rule.accepts(value):
+            for cell in groups[center]:
+                cell.climate[rule.metric] = value
+                if value is None:
+                    cell.climate_unknown.append(rule.metric)
+                kept.append(cell)
+    return kept
+
+
+def _apply_amenity_rule(cells: List[_Cell], rule: AmenityRule, budget: RequestBudget, parallel: bool):
+    types_list = _types_list(rule.criterion)
+    within_meters = rule.within_miles * 1609.34
+    # Tiles are shrunk for large within_miles so their searches stay inside the
+    # searchNearby radius limit; cells no tile fits are searched on their own
+    fraction = min(SEARCH_TILE_FRACTION, (PLACES_MAX_RADIUS_METERS - within_meters) / within_meters)
+    tiles, undecided = {}, []
+    for cell in cells:
+        tile = covering_tile(cell.lat, cell.lng, within_meters, fraction)
+        if _tile_radius(tile, within_meters) <= PLACES_MAX_RADIUS_METERS:
+            tiles.setdefault(tile, []).append(cell)
+        else:
+            undecided.append(cell)
+
+    tile_keys = list(tiles)
+    fetches = _map(lambda tile: _fetch_tile(tile, types_list, within_meters, budget), tile_keys, parallel)
+
+    kept = []
+    rule_stats = {'failed': 0, 'uncertain': 0, 'unevaluated': 0, 'tiles': 0}
+    for tile, fetched in zip(tile_keys, fetches):
+        if fetched is None:
+            rule_stats['unevaluated'] += len(tiles[tile])
+            continue
+        rule_stats['tiles'] += 1
+        tile_lat, tile_lng = geohash_center(tile)
+        places = _filter_places_by_type(fetched['places'], types_list, rule.min_rating)
+        for cell in tiles[tile]:
+            count, nearest = _count_within(places, cell, rule.within_miles)
+            if count >= rule.min_count:
+                cell.amenities[rule.criterion] = {'count': count, 'nearest_miles': nearest}
+                kept.append(cell)
+            elif _is_complete(fetched, 'DISTANCE',
+                              haversine_miles(tile_lat, tile_lng, cell.lat, cell.lng) + rule.within_miles):
+                rule_stats['failed'] += 1
+            else:
+                undecided.append(cell)
+
+    # Cells the tile's 20 nearest results did not reach (or that have no tile) get a search of their own
+    outcomes = _map(lambda cell: _count_cell(cell, rule, types_list, budget), undecided, parallel)
+    for cell, outcome in zip(undecided, outcomes):
+        if outcome is None:
+            rule_stats['unevaluated'] += 1
+            continue
+        count, nearest, complete = outcome
+        if count >= rule.min_count:
+            cell.amenities[rule.criterion] = {'count': count, 'nearest_miles': nearest}
+            kept.append(cell)
+        elif complete:
+            rule_stats['failed'] += 1
+        else:
+            rule_stats['uncertain'] += 1
+    return kept, rule_stats
+
+
+def _types_list(criterion: str) -> list:
+    types = CRITERIA_MAP[criterion]
+    return [types] if isinstance(types, str) else list(types)
+
+
+def _fetch_tile(tile: str, types_list: list, within_meters: float, budget: RequestBudget) -> Optional[dict]:
+    """One DISTANCE-ranked search reaching within_meters past every point of the tile."""
+    tile_lat, tile_lng = geohash_center(tile)
+    radius = _tile_radius(tile, within_meters)
+    snapshot = _snapshot_search(tile_lat, tile_lng, types_list, radius)
+    if snapshot is not None:
+        return snapshot
+    key = _exact_search_key(round(tile_lat, 6), round(tile_lng, 6), types_list, radius, 'DISTANCE')
+    cached = response_cache.get('places', key)
+    if cached is not None:
+        return cached
+    if not budget.try_spend():
+        return None
+    try:
+        fetched = _fetch_nearby_raw(tile_lat, tile_lng, types_list, radius, 'DISTANCE')
+    except Exception as e:
+        print(f"Places API error for search tile {tile}: {e}")
+        return None
+    response_cache.set('places', key, fetched)
+    return fetched
+
+
+def _tile_radius(tile: str, within_meters: float) -> int:
+    """Radius of a tile's search: within_meters past the tile's corners."""
+    return int(math.ceil(within_meters + cell_half_diagonal_meters(tile)))
+
+
+def _count_cell(cell: _Cell, rule: AmenityRule, types_list: list, budget: RequestBudget):
+    """(count, nearest miles, complete) from a search centered on the cell, or None past the budget.
+
+    Ranked by distance, so a saturated search still settles the cell when its
+    20 results include min_count matches; otherwise the coverage engine
+    subdivides it while the budget lasts.
+    """
+    within_meters = int(math.ceil(rule.within_miles * 1609.34))
+    if not budget.try_spend():
+        return None
+    try:
+        fetched = _fetch_nearby_raw(cell.lat, cell.lng, types_list, within_meters, 'DISTANCE')
+    except Exception as e:
+        print(f"Places API error for search cell {cell.lat:.5f},{cell.lng:.5f}: {e}")
+        return 0, None, False
+    places = fetched['places']
+    complete = _is_complete(fetched, 'DISTANCE', rule.within_miles)
+    count, nearest = _count_within(_filter_places_by_type(places, types_list, rule.min_rating),
+                                   cell, rule.within_miles)
+    if count < rule.min_count and not complete:
+        places, complete = _cover_circle(cell.lat, cell.lng, types_list, within_meters, 'DISTANCE',
+                                         budget, places)
+        count, nearest = _count_within(_filter_places_by_type(places, types_list, rule.min_rating),
+                                       cell, rule.within_miles)
+    return count, nearest, complete
+
+
+def _count_within(places: list, cell: _Cell, within_miles: float):
+    """(raw places within within_miles of the cell, distance to the nearest)."""
+    located = [_place_coords(p) for p in places if all(_place_coords(p))]
+    if not located:
+        return 0, None
+    lats, lngs = zip(*located)
+    inside = [d for d in haversine_miles_many(cell.lat, cell.lng, lats, lngs) if d <= within_miles]
+    return len(inside), round(min(inside), 2) if inside else None
+
+
+def _score(cell: _Cell, amenities: List[AmenityRule]) -> float:
+    if not amenities:
+        return 0.0
+    ratios = [min(SCORE_CAP, cell.amenities[rule.criterion]['count'] / rule.min_count) for rule in amenities]
+    return sum(ratios) / len(ratios)
+
+
+def _nearest_total(cell: _Cell) -> float:
+    return sum(a['nearest_miles'] or 0 for a in cell.amenities.values())
+
+
+def parse_search_request(data: Dict) -> Dict:
+    """Keyword arguments for search_region from a request body; raises ValueError."""
+    if not data or not isinstance(data.get('bbox'), list) or len(data['bbox']) != 4:
+        raise ValueError('bbox [south, west, north, east] is required')
+    amenity_specs = data.get('amenities') or []
+    climate_specs = data.get('climate') or []
+    if not amenity_specs and not climate_specs:
+        raise ValueError('At least one amenities or climate rule is required')
+    try:
+        return {
+            'bbox': [float(v) for v in data['bbox']],
+            'amenities': [AmenityRule(spec['criterion'], int(spec.get('min_count', 1)),
+                                      float(spec.get('within_miles', 1)),
+                                      float(spec.get('min_rating', 0)))
+                          for spec in amenity_specs],
+            'climate': [ClimateRule(spec['metric'], _optional_float(spec.get('min')),
+                                    _optional_float(spec.get('max')))
+                        for spec in climate_specs],
+            'cell_miles': float(data.get('cell_miles', 0.5)),
+            'limit': int(data.get('limit', 20)),
+            'budget': int(data['budget']) if data.get('budget') is not None else None,
+        }
+    except (KeyError, TypeError) as e:
+        raise ValueError(f'Invalid search rule: {e}')
+
+
+def _optional_float(value) -> Optional[float]:
+    return float(value) if value is not None else None
@@ -0,0 +1,320 @@
+"""
+Locale Snapshot - local store of Places results for covered areas
+Every place of a Places type inside a geohash tile, crawled once and kept in
+SQLite with an R-tree index on coordinates, so Places searches inside covered
+tiles become local radius queries. Tiles are crawled in bulk for the metros
+we serve and kept fresh by a background refresher that re-crawls only tiles
+older than the refresh age:
+
+    python locale_snapshot.py crawl --bbox 30.1,-97.95,30.5,-97.6
+    python locale_snapshot.py refresh
+    python locale_snapshot.py stats
+"""
+import os
+import sys
+import json
+import math
+import time
+import sqlite3
+import argparse
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from locale_geo import METERS_PER_DEGREE_LAT, geohash_encode, geohashes_in_bbox, haversine_miles_many
+
+SNAPSHOT_PRECISION = int(os.environ.get('LOCALE_SNAPSHOT_PRECISION', '5'))  # ~5 km tiles
+SNAPSHOT_MAX_AGE_DAYS = float(os.environ.get('LOCALE_SNAPSHOT_MAX_AGE_DAYS', '30'))
+SNAPSHOT_REFRESH_DAYS = float(os.environ.get('LOCALE_SNAPSHOT_REFRESH_DAYS', '7'))
+SNAPSHOT_REFRESH_INTERVAL = float(os.environ.get('LOCALE_SNAPSHOT_REFRESH_INTERVAL', '900'))  # 0 = off
+SNAPSHOT_REFRESH_BATCH = int(os.environ.get('LOCALE_SNAPSHOT_REFRESH_BATCH', '10'))
+# How long a worker's claim on a tile it is re-crawling keeps other workers off it
+SNAPSHOT_CLAIM_SECONDS = 600
+
+_DAY_SECONDS = 24 * 60 * 60
+
+
+class SnapshotStore:
+    """Places per (type, geohash tile) in a SQLite file, shared by every worker on the host."""
+
+    def __init__(self, path: str, precision: int = SNAPSHOT_PRECISION,
+                 max_age_days: float = SNAPSHOT_MAX_AGE_DAYS):
+        self.path = path
+        self.precision = precision
+        self.max_age_seconds = max_age_days * _DAY_SECONDS
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS snapshot_tiles ('
+            ' place_type TEXT NOT NULL,'
+            ' tile TEXT NOT NULL,'
+            ' crawled_at REAL NOT NULL,'
+            ' complete INTEGER NOT NULL,'
+            ' claimed_until REAL NOT NULL DEFAULT 0,'
+            ' PRIMARY KEY (place_type, tile))'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS snapshot_places ('
+            ' id INTEGER PRIMARY KEY,'
+            ' place_type TEXT NOT NULL,'
+            ' tile TEXT NOT NULL,'
+            ' place_id TEXT NOT NULL,'
+            ' lat REAL NOT NULL,'
+            ' lng REAL NOT NULL,'
+            ' data TEXT NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS snapshot_places_tile ON snapshot_places (place_type, tile)')
+        try:
+            conn.execute('CREATE VIRTUAL TABLE IF NOT EXISTS snapshot_rtree'
+                         ' USING rtree(id, min_lat, max_lat, min_lng, max_lng)')
+            self.rtree = True
+        except sqlite3.OperationalError:
+            # SQLite built without R-tree: fall back to a B-tree on (type, lat)
+            conn.execute('CREATE INDEX IF NOT EXISTS snapshot_places_lat ON snapshot_places (place_type, lat)')
+            self.rtree = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode; writes manage their own transactions
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def tiles_in_bbox(self, south: float, west: float, north: float, east: float) -> List[str]:
+        return geohashes_in_bbox(south, west, north, east, self.precision)
+
+    def places_in_circle(self, types_list: List[str], lat: float, lng: float,
+                         radius_meters: float) -> Optional[List[Dict]]:
+        """Raw places of any of the types within the circle, or None unless every
+        tile under it is crawled completely and fresh for every type."""
+        dlat = radius_meters / METERS_PER_DEGREE_LAT
+        dlng = dlat / max(0.01, math.cos(math.radians(lat)))
+        south, west, north, east = lat - dlat, lng - dlng, lat + dlat, lng + dlng
+        if not self._covered(types_list, self.tiles_in_bbox(south, west, north, east)):
+            return None
+
+        marks = ','.join('?' * len(types_list))
+        if self.rtree:
+            rows = self._conn().execute(
+                'SELECT p.place_id, p.lat, p.lng, p.data FROM snapshot_rtree r'
+                ' JOIN snapshot_places p ON p.id = r.id'
+                ' WHERE r.min_lat <= ? AND r.max_lat >= ? AND r.min_lng <= ? AND r.max_lng >= ?'
+                f' AND p.place_type IN ({marks})',
+                (north, south, east, west, *types_list)
+            ).fetchall()
+        else:
+            rows = self._conn().execute(
+                'SELECT place_id, lat, lng, data FROM snapshot_places'
+                f' WHERE place_type IN ({marks}) AND lat BETWEEN ? AND ? AND lng BETWEEN ? AND ?',
+                (*types_list, south, north, west, east)
+            ).fetchall()
+
+        # A place listed under two of the types (hospital and pharmacy) is returned once
+        unique = {place_id: (p_lat, p_lng, data) for place_id, p_lat, p_lng, data in rows}
+        if not unique:
+            return []
+        values = list(unique.values())
+        distances = haversine_miles_many(lat, lng, [v[0] for v in values], [v[1] for v in values])
+        radius_miles = radius_meters / 1609.34
+        return [json.loads(data) for (_, _, data), d in zip(values, distances) if d <= radius_miles]
+
+    def _covered(self, types_list: List[str], tiles: List[str]) -> bool:
+        marks_types = ','.join('?' * len(types_list))
+        marks_tiles = ','.join('?' * len(tiles))
+        (n,) = self._conn().execute(
+            'SELECT COUNT(*) FROM snapshot_tiles'
+            f' WHERE place_type IN ({marks_types}) AND tile IN ({marks_tiles})'
+            ' AND complete = 1 AND crawled_at >= ?',
+            (*types_list, *tiles, time.time() - self.max_age_seconds)
+        ).fetchone()
+        return n == len(set(types_list)) * len(set(tiles))
+
+    def register(self, place_type: str, tiles: List[str]):
+        """Add tiles to crawl for a type; new tiles count as stale until crawled."""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('INSERT OR IGNORE INTO snapshot_tiles (place_type, tile, crawled_at, complete)'
+                             ' VALUES (?, ?, 0, 0)', [(place_type, tile) for tile in tiles])
+        finally:
+            conn.execute('COMMIT')
+
+    def put_tile(self, place_type: str, tile: str, places: List[Dict], complete: bool):
+        """Replace a tile's places of one type with a fresh crawl (places outside the tile are dropped)."""
+        rows = []
+        for place in places:
+            loc = place.get('location', {})
+            p_lat, p_lng = loc.get('latitude'), loc.get('longitude')
+            if p_lat is None or p_lng is None or geohash_encode(p_lat, p_lng, self.precision) != tile:
+                continue
+            place_id = place.get('id') or f"{place.get('displayName', {}).get('text')}@{p_lat:.6f},{p_lng:.6f}"
+            rows.append((place_type, tile, place_id, p_lat, p_lng, json.dumps(place)))
+
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if self.rtree:
+                conn.execute('DELETE FROM snapshot_rtree WHERE id IN'
+                             ' (SELECT id FROM snapshot_places WHERE place_type = ? AND tile = ?)',
+                             (place_type, tile))
+            conn.execute('DELETE FROM snapshot_places WHERE place_type = ? AND tile = ?', (place_type, tile))
+            for row in rows:
+                cursor = conn.execute('INSERT INTO snapshot_places (place_type, tile, place_id, lat, lng, data)'
+                                      ' VALUES (?, ?, ?, ?, ?, ?)', row)
+                if self.rtree:
+                    conn.execute('INSERT INTO snapshot_rtree VALUES (?, ?, ?, ?, ?)',
+                                 (cursor.lastrowid, row[3], row[3], row[4], row[4]))
+            conn.execute('INSERT OR REPLACE INTO snapshot_tiles'
+                         ' (place_type, tile, crawled_at, complete, claimed_until) VALUES (?, ?, ?, ?, 0)',
+                         (place_type, tile, time.time(), int(complete)))
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def due_tiles(self, place_type: str, tiles: List[str], refresh_days: float = SNAPSHOT_REFRESH_DAYS) -> List[str]:
+        """The given tiles that are missing, incomplete or older than refresh_days for a type."""
+        cutoff = time.time() - refresh_days * _DAY_SECONDS
+        fresh = {tile for (tile,) in self._conn().execute(
+            f"SELECT tile FROM snapshot_tiles WHERE place_type = ? AND tile IN ({','.join('?' * len(tiles))})"
+            ' AND complete = 1 AND crawled_at >= ?',
+            (place_type, *tiles, cutoff))}
+        return [tile for tile in tiles if tile not in fresh]
+
+    def claim_stale(self, limit: int, refresh_days: float = SNAPSHOT_REFRESH_DAYS) -> List[Tuple[str, str]]:
+        """Claim up to limit (type, tile) pairs due for a re-crawl, oldest first.
+
+        A claim keeps other workers' refreshers off the tile for
+        SNAPSHOT_CLAIM_SECONDS; put_tile releases it.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            due = conn.execute(
+                'SELECT place_type, tile FROM snapshot_tiles WHERE crawled_at < ? AND claimed_until < ?'
+                ' ORDER BY crawled_at LIMIT ?',
+                (now - refresh_days * _DAY_SECONDS, now, limit)
+            ).fetchall()
+            conn.executemany('UPDATE snapshot_tiles SET claimed_until = ? WHERE place_type = ? AND tile = ?',
+                             [(now + SNAPSHOT_CLAIM_SECONDS, place_type, tile) for place_type, tile in due])
+        finally:
+            conn.execute('COMMIT')
+        return due
+
+    def stats(self, refresh_days: float = SNAPSHOT_REFRESH_DAYS) -> Dict:
+        conn = self._conn()
+        now = time.time()
+        tiles, complete, fresh, stale = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(complete), 0),'
+            ' COALESCE(SUM(complete = 1 AND crawled_at >= ?), 0), COALESCE(SUM(crawled_at < ?), 0)'
+            ' FROM snapshot_tiles',
+            (now - self.max_age_seconds, now - refresh_days * _DAY_SECONDS)
+        ).fetchone()
+        (places,) = conn.execute('SELECT COUNT(*) FROM snapshot_places').fetchone()
+        return {'tiles': tiles, 'complete': complete, 'servable': fresh, 'stale': stale, 'places': places}
+
+
+class SnapshotRefresher:
+    """Daemon thread that re-crawls a few stale tiles every interval."""
+
+    def __init__(self, store: SnapshotStore, crawl: Callable[[str, str], bool],
+                 interval: float = SNAPSHOT_REFRESH_INTERVAL, batch: int = SNAPSHOT_REFRESH_BATCH,
+                 refresh_days: float = SNAPSHOT_REFRESH_DAYS):
+        self.store = store
+        self.crawl = crawl
+        self.interval = interval
+        self.batch = batch
+        self.refresh_days = refresh_days
+        self._thread = None
+
+    def run_once(self) -> int:
+        """Re-crawl one batch of stale tiles; returns how many were crawled."""
+        crawled = 0
+        for place_type, tile in self.store.claim_stale(self.batch, self.refresh_days):
+            try:
+                self.crawl(place_type, tile)
+                crawled += 1
+            except Exception as e:
+                print(f"Snapshot refresh error for {place_type} {tile}: {e}")
+        return crawled
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='snapshot-refresher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                print(f"Snapshot store error: {e}")
+
+
+def create_snapshot_from_env() -> Optional[SnapshotStore]:
+    """Snapshot store at LOCALE_SNAPSHOT_PATH (unset or 'none' disables it)."""
+    path = os.environ.get('LOCALE_SNAPSHOT_PATH', 'none')
+    if path.lower() == 'none':
+        return None
+    return SnapshotStore(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Crawl and refresh the Places snapshot store.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    crawl = sub.add_parser('crawl', help='register and crawl every tile of a region')
+    crawl.add_argument('--bbox', required=True, help='south,west,north,east in degrees')
+    crawl.add_argument('--criteria', help='comma-separated criteria (defaults to all)')
+    crawl.add_argument('--budget', type=int, help='Places requests per tile and type')
+    crawl.add_argument('--refresh', action='store_true', help='re-crawl tiles that are already fresh')
+    refresh = sub.add_parser('refresh', help='re-crawl stale tiles once')
+    refresh.add_argument('--limit', type=int, default=1000, help='most tiles to re-crawl')
+    sub.add_parser('stats', help='print tile and place counts')
+    args = parser.parse_args(argv)
+
+    # Imported here so the store itself has no dependency on the backend
+    from locale_backend import CRITERIA_MAP, crawl_snapshot_tile, snapshot_store
+
+    if snapshot_store is None:
+        parser.error('LOCALE_SNAPSHOT_PATH is not set')
+
+    if args.command == 'stats':
+        print(json.dumps(snapshot_store.stats(), indent=2))
+        return
+
+    if args.command == 'refresh':
+        refresher = SnapshotRefresher(snapshot_store, crawl_snapshot_tile, batch=args.limit)
+        print(f"Re-crawled {refresher.run_once()} tile(s)", file=sys.stderr)
+        return
+
+    criteria = [c.strip() for c in args.criteria.split(',')] if args.criteria else list(CRITERIA_MAP)
+    unknown = [c for c in criteria if c not in CRITERIA_MAP]
+    if unknown:
+        parser.error(f"unknown criteria: {', '.join(unknown)}")
+    place_types = sorted({t for c in criteria
+                          for t in ([CRITERIA_MAP[c]] if isinstance(CRITERIA_MAP[c], str) else CRITERIA_MAP[c])})
+    south, west, north, east = (float(v) for v in args.bbox.split(','))
+    tiles = snapshot_store.tiles_in_bbox(south, west, north, east)
+    print(f"{len(tiles)} tile(s) x {len(place_types)} type(s)", file=sys.stderr)
+
+    crawled = incomplete = 0
+    for place_type in place_types:
+        snapshot_store.register(place_type, tiles)
+        due = tiles if args.refresh else snapshot_store.due_tiles(place_type, tiles)
+        for tile in due:
+            try:
+                complete = crawl_snapshot_tile(place_type, tile, args.budget)
+            except Exception as e:
+                print(f"Snapshot crawl error for {place_type} {tile}: {e}", file=sys.stderr)
+                continue
+            crawled += 1
+            incomplete += not complete
+    print(f"Crawled {crawled} tile(s), {incomplete} incomplete"
+          + (' (raise --budget or LOCALE_SNAPSHOT_PRECISION)' if incomplete else ''), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
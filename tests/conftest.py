@@ -0,0 +1,58 @@
+"""
+Shared fixtures: every test runs the backend against the benchmark stub
+upstream (bench/stub_upstream.py) with an in-memory response cache, so call
+counts and latencies are deterministic and no API key is needed.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'bench')]
+
+from stub_upstream import StubUpstream, serve, stub_env  # noqa: E402
+
+STUB = StubUpstream()
+_server = serve(STUB)
+
+# Settings are read at import time, so set them before any locale module is imported
+os.environ.update(stub_env(_server.url))
+os.environ.update({
+    'GOOGLE_MAPS_API_KEY': 'test',
+    'LOCALE_CACHE_BACKEND': 'memory',
+    'LOCALE_CLIMATE_STORE': os.path.join(tempfile.mkdtemp(), 'climate.sqlite3'),
+    'LOCALE_SNAPSHOT_PATH': 'none',
+})
+for _endpoint in ('PLACES_NEARBY', 'PLACES_TEXT', 'GEOCODE', 'AUTOCOMPLETE', 'OPEN_METEO'):
+    os.environ[f'LOCALE_QUOTA_{_endpoint}_QPS'] = '0'
+
+# A downtown point where every common place type saturates a 3-mile search
+DENSE_POINT = (30.2672, -97.7431)
+
+
+@pytest.fixture
+def stub():
+    """The stub upstream, reset to no latency, no errors and zeroed counters."""
+    from locale_backend import response_cache
+
+    STUB.reset()
+    STUB.latency = STUB.jitter = STUB.error_rate = 0
+    STUB.retry_after = None
+    response_cache.clear()
+    yield STUB
+    STUB.latency = STUB.jitter = STUB.error_rate = 0
+    STUB.retry_after = None
+
+
+@pytest.fixture
+def calls():
+    """calls(fn, *args, **kwargs) -> (result, {endpoint: upstream calls made})"""
+    from locale_quota import track_usage
+
+    def run(fn, *args, **kwargs):
+        with track_usage() as usage:
+            result = fn(*args, **kwargs)
+        return result, usage.report()['upstream_calls']
+    return run
@@ -0,0 +1,65 @@
+import os
+import random
+import tempfile
+
+import pytest
+
+CSV_HEADER = 'type,name,latitude_deg,longitude_deg,iata_code,scheduled_service\n'
+
+
+def _random_airports(n=400):
+    rng = random.Random(12)
+    return [{'name': f'Airport {i}', 'iata': f'A{i:02d}', 'lat': rng.uniform(-90, 90), 'lng': rng.uniform(-180, 180)}
+            for i in range(n)]
+
+
+@pytest.mark.parametrize('point', [(30.27, -97.74), (89.5, 40.0), (-89.9, 0.0), (10.0, 179.9), (-33.9, -179.95),
+                                   (64.8, -147.7)])
+def test_nearest_matches_brute_force(point):
+    from locale_airports import AirportIndex
+    from locale_geo import haversine_miles
+
+    airports = _random_airports()
+    index = AirportIndex(airports)
+    expected = sorted(airports, key=lambda a: haversine_miles(*point, a['lat'], a['lng']))[:5]
+    found = index.nearest(*point, 5)
+    assert [airport['name'] for airport, _ in found] == [a['name'] for a in expected]
+    assert [d for _, d in found] == sorted(d for _, d in found)
+
+
+def test_nearest_respects_max_miles():
+    from locale_airports import AirportIndex
+
+    index = AirportIndex([{'name': 'Near', 'iata': 'NR', 'lat': 30.3, 'lng': -97.7},
+                          {'name': 'Far', 'iata': 'FR', 'lat': 32.9, 'lng': -97.0}])
+    assert [a['name'] for a, _ in index.nearest(30.27, -97.74, 2)] == ['Near', 'Far']
+    assert [a['name'] for a, _ in index.nearest(30.27, -97.74, 2, max_miles=50)] == ['Near']
+
+
+def test_load_airports_keeps_scheduled_large_and_medium_airports():
+    from locale_airports import load_airports
+
+    path = os.path.join(tempfile.mkdtemp(), 'airports.csv')
+    with open(path, 'w') as f:
+        f.write(CSV_HEADER)
+        f.write('large_airport,Austin-Bergstrom,30.1945,-97.6699,AUS,yes\n')
+        f.write('medium_airport,Cargo Only,30.5,-97.5,,no\n')
+        f.write('small_airport,Strip,30.4,-97.6,,yes\n')
+        f.write('medium_airport,Broken,,-97.6,BRK,yes\n')
+        f.write('medium_airport,Valley,26.2,-97.6,HRL,yes\n')
+    airports = load_airports(path, {'large_airport', 'medium_airport'}, scheduled_only=True)
+    assert [(a['name'], a['iata']) for a in airports] == [('Austin-Bergstrom', 'AUS'), ('Valley', 'HRL')]
+
+
+def test_airport_lookups_use_the_index_without_upstream_calls(stub, monkeypatch):
+    import locale_backend
+    from locale_airports import AirportIndex
+
+    index = AirportIndex([{'name': 'Austin-Bergstrom', 'iata': 'AUS', 'lat': 30.1945, 'lng': -97.6699},
+                          {'name': 'Far Away', 'iata': 'FAR', 'lat': 46.9, 'lng': -96.8}])
+    monkeypatch.setattr(locale_backend, 'airport_index', index)
+
+    assert locale_backend.find_nearest_airport(30.2672, -97.7431) == {'name': 'Austin-Bergstrom',
+                                                                       'distance_mi': '6.66 mi'}
+    assert [a['iata'] for a in locale_backend.nearest_airports(30.2672, -97.7431, 2)] == ['AUS', 'FAR']
+    assert stub.stats() == {}
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import tempfile
+import threading
+
+import pytest
+
+from conftest import DENSE_POINT
+
+pytest.importorskip('httpx')
+
+
+def _run(coro_fn):
+    """Run a coroutine function, closing the async client bound to its event loop."""
+    import locale_async
+
+    async def run():
+        try:
+            return await coro_fn()
+        finally:
+            await locale_async.upstream.aclose()
+    return asyncio.run(run())
+
+
+def test_disk_cache_is_read_off_the_event_loop(stub, monkeypatch):
+    import locale_async
+    import locale_backend
+    from locale_cache import ResponseCache, SQLiteBackend
+
+    loop_threads, cache_threads = set(), set()
+
+    class RecordingBackend(SQLiteBackend):
+        def get(self, key):
+            cache_threads.add(threading.get_ident())
+            return super().get(key)
+
+    cache = ResponseCache(RecordingBackend(os.path.join(tempfile.mkdtemp(), 'cache.sqlite3')))
+    monkeypatch.setattr(locale_backend, 'response_cache', cache)
+    monkeypatch.setattr(locale_async, 'response_cache', cache)
+
+    async def count():
+        loop_threads.add(threading.get_ident())
+        return await locale_async.count_nearby_places(*DENSE_POINT, 'cafe', 4828)
+
+    assert _run(count)['count'] == 20
+    assert cache_threads and not cache_threads & loop_threads
+
+
+def test_evaluations_use_the_shared_flight(stub, monkeypatch):
+    import locale_async
+    from locale_backend import _evaluation_key, geocode_location
+    from locale_cache import SharedSingleFlight
+
+    flight = SharedSingleFlight(os.path.join(tempfile.mkdtemp(), 'flight.sqlite3'))
+    monkeypatch.setattr(locale_async, 'evaluation_flight', flight)
+    geo = geocode_location('Austin, TX')
+    # Another worker's evaluation, published through the flight file
+    flight._publish(_evaluation_key(geo, 3, None, None, 0, False, None), {'location': 'from another worker'})
+
+    result = _run(lambda: locale_async.evaluate_location('Austin, TX', 3))
+    assert result == {'location': 'from another worker'}
+    assert 'places_nearby' not in stub.stats()
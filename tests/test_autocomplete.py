@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _cache(suggestions_for):
+    from locale_cache import AutocompleteCache, MemoryBackend, ResponseCache
+
+    fetched = []
+
+    def fetch(text, session_token):
+        fetched.append(text)
+        return suggestions_for(text)
+
+    return AutocompleteCache(ResponseCache(MemoryBackend()), fetch), fetched
+
+
+def test_repeated_prefixes_cost_one_call(stub, calls):
+    from locale_backend import autocomplete_places
+
+    first, made = calls(autocomplete_places, '123 Main')
+    assert made == {'autocomplete': 1}
+    again, made = calls(autocomplete_places, '  123   MAIN ', 'session-2')
+    assert made == {}
+    assert again == first
+
+
+def test_concurrent_prefixes_share_one_call(stub):
+    from locale_backend import autocomplete_places
+
+    stub.latency = 0.2
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(autocomplete_places, ['Pike St', 'pike st', 'Pike  St', 'PIKE ST']))
+    assert stub.stats() == {'autocomplete': 1}
+    assert all(result == results[0] for result in results)
+
+
+def test_longer_input_is_narrowed_from_a_complete_shorter_prefix():
+    cache, fetched = _cache(lambda text: ['Boise, ID, USA', 'Boston, MA, USA'])
+
+    assert cache.lookup('Bo') == ['Boise, ID, USA', 'Boston, MA, USA']
+    assert cache.lookup('Bos') == ['Boston, MA, USA']
+    assert cache.lookup('bost ma') == ['Boston, MA, USA']
+    assert fetched == ['Bo']
+
+
+def test_truncated_shorter_prefix_is_not_narrowed():
+    cache, fetched = _cache(lambda text: [f'{text} {i}' for i in range(5)])
+
+    cache.lookup('Sa')
+    cache.lookup('San')
+    assert fetched == ['Sa', 'San']
+
+
+def test_input_nothing_matches_is_fetched():
+    cache, fetched = _cache(lambda text: ['Boise, ID, USA'] if text == 'Bo' else ['Bozeman, MT, USA'])
+
+    cache.lookup('Bo')
+    assert cache.lookup('Boz') == ['Bozeman, MT, USA']
+    assert fetched == ['Bo', 'Boz']
+
+
+def test_callers_cannot_change_cached_suggestions(stub):
+    from locale_backend import autocomplete_places
+
+    autocomplete_places('Elm St').append('mine')
+    assert 'mine' not in autocomplete_places('Elm St')
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+
+def test_records_stream_before_every_location_is_geocoded(monkeypatch):
+    import locale_batch
+
+    first_yielded = threading.Event()
+    slow_waited = []
+
+    def geocode_location(location):
+        if location == 'Slow':
+            slow_waited.append(first_yielded.wait(5))
+        return {'lat': 30.0 if location == 'Fast' else 31.0, 'lng': -97.0, 'formatted_address': location}
+
+    def evaluate_geocoded(geo, location, *args):
+        return {'location': location}
+
+    monkeypatch.setattr(locale_batch, 'geocode_location', geocode_location)
+    monkeypatch.setattr(locale_batch, 'evaluate_geocoded', evaluate_geocoded)
+    items = [locale_batch.normalize_item(location, i) for i, location in enumerate(['Slow', 'Fast'])]
+    records = locale_batch.run_batch(items, workers=2, rate=0)
+
+    assert next(records)['location'] == 'Fast'
+    first_yielded.set()
+    assert [record['location'] for record in records] == ['Slow']
+    assert slow_waited == [True]
+
+
+def test_items_share_geocodes_and_evaluations(monkeypatch):
+    import locale_batch
+
+    geocoded, evaluated = [], []
+
+    def geocode_location(location):
+        geocoded.append(location)
+        return {'lat': 30.0, 'lng': -97.0, 'formatted_address': location}
+
+    def evaluate_geocoded(geo, location, *args):
+        evaluated.append(location)
+        return {'location': location}
+
+    monkeypatch.setattr(locale_batch, 'geocode_location', geocode_location)
+    monkeypatch.setattr(locale_batch, 'evaluate_geocoded', evaluate_geocoded)
+    items = [locale_batch.normalize_item(location, i)
+             for i, location in enumerate(['Austin, TX', 'austin,  tx', 'Downtown Austin', ''])]
+    records = {record['location']: record for record in locale_batch.run_batch(items, workers=4, rate=0)}
+
+    assert len(geocoded) == 2
+    assert len(evaluated) == 1
+    assert records['']['error'] == 'Location is required'
+    assert all(records[location]['result'] == {'location': evaluated[0]}
+               for location in ('Austin, TX', 'austin,  tx', 'Downtown Austin'))
+
+
+@pytest.mark.parametrize('raw', [42, ['Austin, TX'], None, {'location': 7}, {'location': 'Austin', 'radius_miles': [3]}])
+def test_malformed_items_are_rejected(raw):
+    import locale_batch
+
+    with pytest.raises(ValueError):
+        locale_batch.normalize_item(raw, 1)
+
+
+def test_malformed_batch_is_a_bad_request(stub):
+    from api_server import app
+
+    response = app.test_client().post('/api/evaluate/batch', json={'locations': ['Austin, TX', 42]})
+    assert response.status_code == 400
+    assert 'Location 2' in response.get_json()['error']
+
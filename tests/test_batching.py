@@ -0,0 +1,117 @@
+import time
+
+import pytest
+
+from conftest import DENSE_POINT
+
+DENSE_CRITERIA = ['grocery_stores', 'coffee_shops', 'gyms', 'parks', 'gas_stations']
+RADIUS_METERS = 4828  # 3 miles
+
+
+def _geo(lat, lng):
+    return {'lat': lat, 'lng': lng, 'formatted_address': f'{lat},{lng}'}
+
+
+def _timed_cold_evaluation(calls, stub, point):
+    from locale_backend import evaluate_geocoded, get_climate_data
+
+    get_climate_data(*point)  # time the Places searches only
+    stub.latency = 0.2
+    start = time.monotonic()
+    result, made = calls(evaluate_geocoded, _geo(*point), 'Downtown', 3, DENSE_CRITERIA)
+    stub.latency = 0
+    return result, made, time.monotonic() - start
+
+
+def test_cold_dense_evaluation_is_one_round_trip(stub, calls, monkeypatch):
+    import locale_backend
+
+    _timed_cold_evaluation(calls, stub, (47.6062, -122.3321))  # open pooled connections
+    result, made, elapsed = _timed_cold_evaluation(calls, stub, DENSE_POINT)
+    assert all(result['amenities'][c]['count'] == 20 for c in DENSE_CRITERIA)
+    assert made['places_nearby'] == len(DENSE_CRITERIA) + 1  # plus the airport search
+
+    monkeypatch.setattr(locale_backend, 'PLACES_BATCH_SIZE', 1)
+    _, unbatched, unbatched_elapsed = _timed_cold_evaluation(calls, stub, (39.7392, -104.9903))
+    assert made == unbatched
+    assert elapsed < unbatched_elapsed + 0.15
+
+
+def test_dense_criteria_are_not_batched_once_seen(stub):
+    from locale_backend import _batch_groups, _remember_area_count
+
+    for criterion in ('grocery_stores', 'coffee_shops'):
+        _remember_area_count(*DENSE_POINT, [criterion], RADIUS_METERS, 20, False)
+    assert _batch_groups(*DENSE_POINT, {'grocery_stores': 'grocery_store', 'coffee_shops': 'cafe'},
+                         RADIUS_METERS) == [['grocery_stores'], ['coffee_shops']]
+
+
+def test_sparse_criteria_are_batched_under_the_expected_count(stub, monkeypatch):
+    import locale_backend
+
+    monkeypatch.setattr(locale_backend, 'PLACES_BATCH_MAX_EXPECTED', 12)
+    counts = {'breweries': ('brewery', 4), 'home_improvement': ('home_improvement_store', 5),
+              'hotels': ('lodging', 6)}
+    for place_type, count in counts.values():
+        locale_backend._remember_area_count(*DENSE_POINT, [place_type], RADIUS_METERS, count, True)
+    criteria_types = {criterion: place_type for criterion, (place_type, _) in counts.items()}
+
+    assert locale_backend._batch_groups(*DENSE_POINT, criteria_types, RADIUS_METERS) == \
+        [['breweries', 'home_improvement'], ['hotels']]
+    # Counts scale with the circle's area
+    assert locale_backend._batch_groups(*DENSE_POINT, criteria_types, RADIUS_METERS // 2) == \
+        [['breweries', 'home_improvement', 'hotels']]
+
+
+def test_batched_sparse_criteria_cost_one_request(stub, calls):
+    from locale_backend import _remember_area_count, count_nearby_places_batch
+
+    lat, lng = DENSE_POINT
+    for place_type in ('brewery', 'home_improvement_store'):
+        _remember_area_count(lat, lng, [place_type], 1609, 1, True)
+    result, made = calls(count_nearby_places_batch, lat, lng,
+                         {'breweries': 'brewery', 'home_improvement': 'home_improvement_store'}, 1609)
+    assert made == {'places_nearby': 1}
+    assert set(result) == {'breweries', 'home_improvement'}
+
+
+BATCHED_CRITERIA = {'grocery_stores': 'grocery_store', 'coffee_shops': 'cafe', 'gyms': 'gym'}
+
+
+def _expect_sparse(lat, lng):
+    """Make the dense criteria look sparse so they are merged, and the merged request saturates."""
+    from locale_backend import _remember_area_count, get_climate_data
+
+    for place_type in BATCHED_CRITERIA.values():
+        _remember_area_count(lat, lng, [place_type], RADIUS_METERS, 1, True)
+    get_climate_data(lat, lng)
+
+
+def test_saturated_batch_falls_back_concurrently(stub, calls):
+    from locale_backend import evaluate_geocoded
+
+    _expect_sparse(*DENSE_POINT)
+    stub.latency = 0.2
+    start = time.monotonic()
+    result, made = calls(evaluate_geocoded, _geo(*DENSE_POINT), 'Downtown', 3, list(BATCHED_CRITERIA))
+    elapsed = time.monotonic() - start
+
+    assert made['places_nearby'] == 1 + len(BATCHED_CRITERIA) + 1  # merged, fallbacks, airport
+    assert all(result['amenities'][c]['count'] == 20 for c in BATCHED_CRITERIA)
+    assert elapsed < 2 * 0.2 + 0.25  # two rounds, not one per criterion
+
+
+@pytest.mark.parametrize('parallel', [True, False])
+def test_batch_fallbacks_stop_at_the_deadline(stub, parallel):
+    from locale_backend import evaluate_geocoded
+
+    _expect_sparse(*DENSE_POINT)
+    stub.latency = 0.3
+    start = time.monotonic()
+    result = evaluate_geocoded(_geo(*DENSE_POINT), 'Downtown', 3, list(BATCHED_CRITERIA),
+                               parallel=parallel, deadline_seconds=0.5)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.5 + 0.25
+    assert set(BATCHED_CRITERIA) <= set(result['timed_out'])
+    assert all(result['amenities'][c]['timed_out'] for c in BATCHED_CRITERIA)
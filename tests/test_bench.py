@@ -0,0 +1,110 @@
+import json
+
+import pytest
+import requests
+
+from stub_upstream import StubUpstream, request_key, serve, synthesize
+
+NEARBY_BODY = {'includedTypes': ['cafe'], 'maxResultCount': 20, 'rankPreference': 'DISTANCE',
+               'locationRestriction': {'circle': {'center': {'latitude': 30.27, 'longitude': -97.74},
+                                                  'radius': 1000}}}
+
+
+@pytest.fixture
+def fixture_file(tmp_path):
+    path = tmp_path / 'recorded.jsonl'
+    entries = [
+        {'endpoint': 'geocode', 'params': {'address': 'Nowhere, ZZ'}, 'body': None,
+         'response': {'status': 'ZERO_RESULTS', 'results': []}},
+        {'endpoint': 'places_nearby', 'params': {}, 'body': NEARBY_BODY,
+         'response': {'places': [{'displayName': {'text': 'Recorded Cafe'}}]}},
+    ]
+    path.write_text('\n'.join(json.dumps(entry) for entry in entries) + '\n')
+    return str(path)
+
+
+def _serve(stub):
+    server = serve(stub)
+    return server, server.url
+
+
+def test_stub_replays_fixtures_and_synthesizes_the_rest(fixture_file):
+    stub = StubUpstream([fixture_file])
+    server, url = _serve(stub)
+    try:
+        geocode = requests.get(url + '/maps/api/geocode/json', params={'address': 'Nowhere, ZZ', 'key': 'x'}).json()
+        assert geocode['status'] == 'ZERO_RESULTS'
+        nearby = requests.post(url + '/v1/places:searchNearby', json=NEARBY_BODY).json()
+        assert nearby['places'] == [{'displayName': {'text': 'Recorded Cafe'}}]
+        synthesized = requests.get(url + '/maps/api/geocode/json', params={'address': 'Austin, TX'}).json()
+        assert synthesized['status'] == 'OK'
+        assert requests.get(url + '/__stats').json() == {'geocode': 2, 'places_nearby': 1}
+        requests.get(url + '/__reset')
+        assert stub.stats() == {}
+    finally:
+        server.shutdown()
+
+
+def test_strict_stub_refuses_unrecorded_requests(fixture_file):
+    server, url = _serve(StubUpstream([fixture_file], strict=True))
+    try:
+        assert requests.get(url + '/maps/api/geocode/json', params={'address': 'Nowhere, ZZ'}).ok
+        assert requests.get(url + '/maps/api/geocode/json', params={'address': 'Austin, TX'}).status_code == 404
+        assert requests.get(url + '/no/such/path').status_code == 404
+    finally:
+        server.shutdown()
+
+
+def test_stub_injects_failures_with_retry_after():
+    server, url = _serve(StubUpstream(error_rate=1, retry_after=3))
+    try:
+        response = requests.get(url + '/maps/api/geocode/json', params={'address': 'Austin, TX'})
+        assert response.status_code in (429, 503)
+        assert response.headers['Retry-After'] == '3'
+    finally:
+        server.shutdown()
+
+
+def test_fixture_keys_ignore_credentials_and_synthesis_is_deterministic():
+    assert request_key('geocode', {'address': 'A', 'key': '1'}, None) == \
+        request_key('geocode', {'key': '2', 'address': 'A', 'sessiontoken': 's'}, None)
+    assert synthesize('places_nearby', {}, NEARBY_BODY) == synthesize('places_nearby', {}, NEARBY_BODY)
+    assert len(synthesize('places_nearby', {}, NEARBY_BODY)['places']) <= 20
+
+
+def test_summary_percentiles_and_regressions():
+    from run_bench import percentile, regressions, summarize
+
+    assert percentile([], 95) == 0.0
+    assert percentile([1, 2, 3, 4], 50) == pytest.approx(2.5)
+    assert percentile([1, 2, 3, 4], 100) == 4
+
+    summary = summarize([0.1, 0.2, 0.3, 0.4], [4, 4, 6, 6], 2.0)
+    assert summary['throughput_per_s'] == 2.0
+    assert summary['p50_ms'] == pytest.approx(250.0)
+    assert summary['upstream_calls_per_eval'] == 5.0
+
+    baseline = {'throughput_per_s': 10.0, 'p95_ms': 100.0, 'upstream_calls_per_eval': 5.0}
+    assert regressions({'throughput_per_s': 9.0, 'p95_ms': 110.0, 'upstream_calls_per_eval': 5.0},
+                       baseline, 0.2) == []
+    found = regressions({'throughput_per_s': 7.0, 'p95_ms': 130.0, 'upstream_calls_per_eval': 4.0}, baseline, 0.2)
+    assert [line.split(':')[0] for line in found] == ['throughput_per_s', 'p95_ms']
+
+
+def test_workload_is_deterministic_and_cycles_locations():
+    from run_bench import RADII, workload
+
+    items = workload(6, ['A', 'B', 'C'], ['parks'], seed=3)
+    assert items == workload(6, ['A', 'B', 'C'], ['parks'], seed=3)
+    assert [item['location'] for item in items] == ['A', 'B', 'C', 'A', 'B', 'C']
+    assert [item['radius_miles'] for item in items] == [RADII[0]] * 3 + [RADII[1]] * 3
+
+
+def test_backend_evaluator_counts_upstream_calls(stub):
+    from run_bench import backend_evaluator, run_evaluations, workload
+
+    items = workload(4, ['Fargo, ND', 'Omaha, NE'], ['parks', 'gyms'])
+    latencies, calls, wall = run_evaluations(items, 2, backend_evaluator())
+
+    assert len(latencies) == len(calls) == 4 and wall > 0
+    assert sum(calls) == sum(stub.stats().values())
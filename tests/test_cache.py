@@ -0,0 +1,80 @@
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+
+
+def _backend():
+    from locale_cache import SQLiteBackend
+    return SQLiteBackend(os.path.join(tempfile.mkdtemp(), 'cache.sqlite3'))
+
+
+def _accessed_at(backend, key):
+    return backend._conn().execute('SELECT accessed_at FROM cache WHERE key = ?', (key,)).fetchone()[0]
+
+
+def test_sqlite_hits_do_not_write():
+    backend = _backend()
+    backend.set('k', '"v"', 3600)
+    before = _accessed_at(backend, 'k')
+    conn = backend._conn()
+    changes = conn.total_changes
+    for _ in range(10):
+        assert backend.get('k') == '"v"'
+    assert conn.total_changes == changes
+    assert _accessed_at(backend, 'k') == before
+
+
+def test_sqlite_hits_refresh_stale_access_times():
+    backend = _backend()
+    backend.set('k', '"v"', 3600)
+    backend._conn().execute('UPDATE cache SET accessed_at = accessed_at - 3600')
+    backend._conn().commit()
+    stale = _accessed_at(backend, 'k')
+    backend.get('k')
+    assert _accessed_at(backend, 'k') > stale + backend.TOUCH_INTERVAL
+
+
+def test_concurrent_misses_share_one_fetch():
+    from concurrent.futures import ThreadPoolExecutor
+    from locale_cache import MemoryBackend, ResponseCache
+
+    cache = ResponseCache(MemoryBackend())
+    fetches = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def fetch():
+        fetches.append(1)
+        started.set()
+        release.wait(5)
+        return {'places': ['a']}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(cache.get_or_fetch, 'places', ['k'], fetch)
+        started.wait(5)
+        waiters = [pool.submit(cache.get_or_fetch, 'places', ['k'], fetch) for _ in range(3)]
+        time.sleep(0.1)
+        release.set()
+        results = [first.result()] + [w.result() for w in waiters]
+
+    assert len(fetches) == 1
+    assert all(r == {'places': ['a']} for r in results)
+    # Callers that waited get their own copy
+    results[1]['places'].append('b')
+    assert results[2] == {'places': ['a']}
+
+
+def test_failed_fetches_are_not_cached():
+    from locale_cache import MemoryBackend, ResponseCache
+
+    cache = ResponseCache(MemoryBackend())
+
+    def fail():
+        raise RuntimeError('upstream down')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_fetch('places', ['k'], fail)
+    assert cache.get_or_fetch('places', ['k'], lambda: {'ok': True}) == {'ok': True}
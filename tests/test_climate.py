@@ -0,0 +1,87 @@
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Climate cells no other test fills (the store outlives each test's response cache)
+FAIRBANKS = (64.8378, -147.7164)
+BOISE = (43.615, -116.2023)
+
+
+def test_store_file_is_created_on_first_use():
+    from locale_climate import ClimateStore
+
+    path = os.path.join(tempfile.mkdtemp(), 'data', 'climate.sqlite3')
+    store = ClimateStore(path)
+    assert not os.path.exists(path)
+    assert store.get(*BOISE) is None
+    assert os.path.exists(path)
+
+
+def test_default_store_lives_in_the_data_directory(monkeypatch):
+    import locale_climate
+
+    monkeypatch.delenv('LOCALE_CLIMATE_STORE')
+    store = locale_climate.create_store_from_env()
+    assert store.path == os.path.join(os.path.dirname(os.path.abspath(locale_climate.__file__)),
+                                      'data', 'climate_normals.sqlite3')
+    monkeypatch.setenv('LOCALE_CLIMATE_STORE', 'none')
+    assert locale_climate.create_store_from_env() is None
+
+
+def test_cells_are_filled_once(stub, calls):
+    from locale_backend import climate_store, get_climate_data
+
+    first, made = calls(get_climate_data, *FAIRBANKS)
+    assert made == {'open_meteo': 1}
+    assert first['avg_temp_f'] != 'N/A'
+    cell_lat, cell_lng = climate_store.cell_for(*FAIRBANKS)
+    nearby = (cell_lat + 0.1, cell_lng - 0.1)  # another point in the same grid cell
+    assert climate_store.cell_for(*nearby) == (cell_lat, cell_lng)
+
+    again, made = calls(get_climate_data, *nearby)
+    assert made == {}
+    assert again == first
+
+
+def test_concurrent_misses_in_a_cell_share_one_fetch(stub):
+    from locale_backend import climate_store, get_climate_data
+
+    stub.latency = 0.2
+    cell_lat, cell_lng = climate_store.cell_for(*BOISE)
+    points = [(cell_lat + d, cell_lng - d) for d in (0, 0.05, 0.1, -0.1)]
+    with ThreadPoolExecutor(max_workers=len(points)) as pool:
+        results = list(pool.map(lambda point: get_climate_data(*point), points))
+    assert stub.stats() == {'open_meteo': 1}
+    assert all(result == results[0] for result in results)
+
+
+def test_stale_cells_are_refetched():
+    from locale_climate import ClimateStore
+
+    store = ClimateStore(os.path.join(tempfile.mkdtemp(), 'climate.sqlite3'), max_age_days=0)
+    store.put(*BOISE, {'avg_temp_f': '50°F'}, 10)
+    assert store.get(*BOISE) is None
+    fresh = ClimateStore(store.path)
+    assert fresh.get(*BOISE) == {'avg_temp_f': '50°F'}
+
+
+def test_store_is_usable_from_many_threads():
+    from locale_climate import ClimateStore
+
+    store = ClimateStore(os.path.join(tempfile.mkdtemp(), 'climate.sqlite3'))
+    errors = []
+
+    def put(i):
+        try:
+            store.put(40.0 + i, -100.0, {'i': i}, 10)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=put, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert [store.get(40.0 + i, -100.0) for i in range(8)] == [{'i': i} for i in range(8)]
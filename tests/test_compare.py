@@ -0,0 +1,133 @@
+import pytest
+
+CRITERIA = ['grocery_stores', 'coffee_shops', 'parks']
+
+
+def _evaluation(counts, airport='10.0 mi'):
+    return {
+        'location': 'X', 'coordinates': {'lat': 0, 'lng': 0},
+        'amenities': {key: ({'count': 0, 'places': [], 'timed_out': True} if count is None
+                            else {'count': count, 'places': []}) for key, count in counts.items()},
+        'climate': {},
+        'transportation': {'nearest_airport': 'Airport', 'airport_distance': airport},
+    }
+
+
+def test_rank_row_scores_and_ties():
+    from locale_compare import rank_row
+
+    assert rank_row([10, None, 30, 30]) == {'values': [10, None, 30, 30], 'scores': [0.0, None, 1.0, 1.0],
+                                            'ranks': [3, None, 1, 1]}
+    assert rank_row([5.0, 20.0], higher_is_better=False)['ranks'] == [1, 2]
+    assert rank_row([4, 4])['scores'] == [1.0, 1.0]
+    assert rank_row([None, None])['ranks'] == [None, None]
+
+
+def test_timed_out_counts_are_unknown_not_zero():
+    from locale_compare import comparison_table
+
+    table = comparison_table([
+        _evaluation({'parks': 8, 'gyms': 2}),
+        _evaluation({'parks': None, 'gyms': 6}, airport='N/A'),
+        None,
+    ])
+
+    assert table['criteria']['parks'] == {'values': [8, None, None], 'scores': [1.0, None, None],
+                                          'ranks': [1, None, None]}
+    assert table['criteria']['gyms']['ranks'] == [2, 1, None]
+    # The second location's overall score only averages the criteria it has
+    assert table['overall']['values'] == [0.5, 1.0, None]
+    assert table['transportation']['airport_distance']['values'] == [10.0, None, None]
+
+
+def test_locations_share_geocodes_and_evaluations(stub, calls):
+    from locale_compare import compare_locations
+
+    result, made = calls(compare_locations, ['Austin, TX', 'austin,  tx', 'Denver, CO'], 2, CRITERIA,
+                         details=True)
+
+    assert made['geocode'] == 2
+    assert result['stats'] == {'locations': 3, 'evaluations': 2, 'climate_cells': 2}
+    assert result['evaluations'][0] is result['evaluations'][1]
+    for key in CRITERIA:
+        row = result['criteria'][key]
+        assert row['values'] == [e['amenities'][key]['count'] for e in result['evaluations']]
+        assert row['ranks'][0] == row['ranks'][1]
+    assert len(result['overall']['ranks']) == 3
+
+
+def test_a_location_that_times_out_does_not_skew_the_others(stub, monkeypatch):
+    import locale_compare
+    from locale_compare import compare_locations
+
+    evaluate = locale_compare.evaluate_geocoded
+
+    def slow_for_one(geo, location, *args, **kwargs):
+        if location == 'Tacoma, WA':
+            stub.latency = 0.3
+            kwargs['deadline_seconds'] = 0.1
+        return evaluate(geo, location, *args, **kwargs)
+
+    monkeypatch.setattr(locale_compare, 'evaluate_geocoded', slow_for_one)
+    monkeypatch.setattr(locale_compare, 'ThreadPoolExecutor', _Sequential)
+    locale_compare.geocode_location('Tacoma, WA')
+    result = compare_locations(['Spokane, WA', 'Tacoma, WA'], 2, CRITERIA)
+
+    assert 'timed_out' not in result['locations'][0]
+    assert set(CRITERIA) <= set(result['locations'][1]['timed_out'])
+    for key in CRITERIA:
+        assert result['criteria'][key]['values'][1] is None
+        assert result['criteria'][key]['ranks'] == [1, None]
+    assert result['overall']['values'] == [1.0, None]
+
+
+class _Sequential:
+    """ThreadPoolExecutor stand-in running each task at submit, so stub latency changes stay ordered."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def test_compare_endpoint(stub, monkeypatch):
+    import locale_compare
+    from api_server import app
+
+    geocode = locale_compare.geocode_location
+    monkeypatch.setattr(locale_compare, 'geocode_location',
+                        lambda query: None if query == 'nowhere' else geocode(query))
+    client = app.test_client()
+    response = client.post('/api/compare', json={
+        'locations': ['Austin, TX', 'Nowhere'], 'radius_miles': 2, 'criteria': CRITERIA,
+        'details': True, 'fields': ['name'], 'limit': 1,
+    }).get_json()
+
+    assert response['locations'][1] == {'query': 'Nowhere', 'error': 'Location not found'}
+    assert response['evaluations'][1] is None
+    assert all(len(a['places']) <= 1 and set(p for place in a['places'] for p in place) <= {'name'}
+               for a in response['evaluations'][0]['amenities'].values())
+    assert response['usage']['upstream_calls']['geocode'] == 1
+
+    for body in ({'locations': []}, {'locations': ['Austin, TX', 3]},
+                 {'locations': ['Austin, TX'], 'criteria': ['moats']},
+                 {'locations': ['A'] * 11}):
+        assert client.post('/api/compare', json=body).status_code == 400
+
+
+@pytest.mark.parametrize('distance, miles', [('12.3 mi', 12.3), ('N/A', None), (None, None)])
+def test_airport_distance_parsing(distance, miles):
+    from locale_compare import _miles
+
+    assert _miles(distance) == miles
@@ -0,0 +1,53 @@
+from conftest import DENSE_POINT
+
+from stub_upstream import _places_in_circle
+
+RADIUS_METERS = 3218  # 2 miles; about 47 cafes around DENSE_POINT
+
+
+def _covered(calls, budget, place_type='cafe'):
+    from locale_backend import RequestBudget, count_nearby_places
+    result, made = calls(count_nearby_places, *DENSE_POINT, place_type, RADIUS_METERS,
+                         budget=RequestBudget(budget))
+    return result, made.get('places_nearby', 0)
+
+
+def test_full_coverage_counts_every_place(stub, calls):
+    for place_type in ('cafe', 'park'):
+        truth = len(_places_in_circle(*DENSE_POINT, RADIUS_METERS, [place_type]))
+        assert truth > 20
+        result, made = _covered(calls, 40, place_type)
+        assert result['complete']
+        assert result['count'] == truth
+        assert made <= 1 + 40
+
+
+def test_coverage_stops_at_the_budget(stub, calls):
+    truth = len(_places_in_circle(*DENSE_POINT, RADIUS_METERS, ['cafe']))
+    result, made = _covered(calls, 2)
+    assert not result['complete']
+    assert 20 < result['count'] < truth
+    assert made == 1 + 2
+
+
+def test_coverage_fetches_are_cached(stub, calls):
+    first, _ = _covered(calls, 40)
+    again, made = _covered(calls, 40)
+    assert made == 0
+    assert again['count'] == first['count']
+
+
+def test_uncovered_searches_stay_capped(stub):
+    from locale_backend import count_nearby_places
+    result = count_nearby_places(*DENSE_POINT, 'cafe', RADIUS_METERS)
+    assert result['count'] == 20
+    assert 'complete' not in result
+
+
+def test_full_coverage_evaluation_reports_completeness(stub):
+    from locale_backend import evaluate_geocoded
+    geo = {'lat': DENSE_POINT[0], 'lng': DENSE_POINT[1], 'formatted_address': 'Downtown'}
+    result = evaluate_geocoded(geo, 'Downtown', 2, ['coffee_shops', 'breweries'],
+                               full_coverage=True, coverage_budget=40)
+    assert result['amenities']['coffee_shops']['count'] > 20
+    assert all('complete' in amenity for amenity in result['amenities'].values())
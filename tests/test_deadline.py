@@ -0,0 +1,62 @@
+import time
+
+from conftest import DENSE_POINT
+
+CRITERIA = ['grocery_stores', 'coffee_shops', 'parks', 'gyms', 'gas_stations']
+
+
+def _warm_geocode(location):
+    from locale_backend import geocode_location
+    return geocode_location(location)
+
+
+def test_sequential_mode_stops_at_the_deadline(stub):
+    from locale_backend import evaluate_location
+
+    _warm_geocode('Austin, TX')
+    stub.latency = 0.3
+    start = time.monotonic()
+    result = evaluate_location('Austin, TX', 3, CRITERIA, parallel=False, deadline_seconds=0.6)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.6 + 0.25
+    assert result['timed_out']
+    assert all(result['amenities'][key]['timed_out'] for key in result['timed_out'] if key in CRITERIA)
+
+
+def test_parallel_mode_stops_at_the_deadline(stub):
+    from locale_backend import evaluate_location
+
+    _warm_geocode('Denver, CO')
+    stub.latency = 1.0
+    start = time.monotonic()
+    result = evaluate_location('Denver, CO', 3, CRITERIA, deadline_seconds=0.5)
+
+    assert time.monotonic() - start < 0.5 + 0.25
+    assert result['timed_out']
+
+
+def test_requests_are_not_sent_after_the_deadline(stub):
+    import locale_backend
+
+    token = locale_backend._upstream_deadline.set(time.monotonic() - 1)
+    try:
+        places = locale_backend.count_nearby_places(*DENSE_POINT, 'cafe', 1000)
+    finally:
+        locale_backend._upstream_deadline.reset(token)
+    assert places == {'count': 0, 'places': [], 'timed_out': True}
+    assert stub.stats() == {}
+
+
+def test_requests_cut_off_by_the_deadline_time_out(stub):
+    import locale_backend
+
+    stub.latency = 0.5
+    token = locale_backend._upstream_deadline.set(time.monotonic() + 0.2)
+    try:
+        places = locale_backend.count_nearby_places(*DENSE_POINT, 'cafe', 1000)
+        climate = locale_backend.get_climate_data(61.2181, -149.9003)  # a climate cell no other test fills
+    finally:
+        locale_backend._upstream_deadline.reset(token)
+    assert places['timed_out']
+    assert climate['timed_out']
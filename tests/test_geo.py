@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+CENTERS = [(30.2672, -97.7431), (64.8378, -147.7164), (78.2232, 15.6267), (-54.8019, -68.303), (89.9, 0.0),
+           (0.0, 179.99)]
+
+
+def _points(lat, lng, n=200, spread=1.5):
+    rng = random.Random(f'{lat},{lng}')
+    lats = [max(-90.0, min(90.0, lat + rng.uniform(-spread, spread))) for _ in range(n)]
+    lngs = [lng + rng.uniform(-spread * 4, spread * 4) for _ in range(n)]
+    return lats, lngs
+
+
+@pytest.mark.parametrize('center', CENTERS)
+def test_vectorized_distances_match_pure_python(center, monkeypatch):
+    import locale_geo
+
+    lats, lngs = _points(*center)
+    vectorized = locale_geo.haversine_miles_many(*center, lats, lngs)
+    monkeypatch.setattr(locale_geo, 'np', None)
+    pure = locale_geo.haversine_miles_many(*center, lats, lngs)
+    assert vectorized == pytest.approx(pure, rel=1e-9, abs=1e-9)
+
+
+@pytest.mark.parametrize('center', CENTERS)
+def test_vectorized_nearest_within_matches_pure_python(center, monkeypatch):
+    import locale_geo
+
+    lats, lngs = _points(*center)
+    vectorized = locale_geo.nearest_within(*center, lats, lngs, 40)
+    monkeypatch.setattr(locale_geo, 'np', None)
+    pure = locale_geo.nearest_within(*center, lats, lngs, 40)
+    assert [i for i, _ in vectorized] == [i for i, _ in pure]
+    assert [d for _, d in vectorized] == pytest.approx([d for _, d in pure], rel=1e-9, abs=1e-9)
+
+
+def test_high_latitude_distances_use_the_point_latitude():
+    from locale_geo import haversine_miles_many
+
+    # One degree of longitude at 65N is about 29.2 miles; a fixed 54.6 mi/deg overstated it by ~85%
+    [distance] = haversine_miles_many(65.0, 20.0, [65.0], [21.0])
+    many = haversine_miles_many(65.0, 20.0, [65.0] * 20, [21.0] * 20)
+    assert distance == pytest.approx(29.2, abs=0.1)
+    assert many == pytest.approx([distance] * 20)
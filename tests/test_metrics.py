@@ -0,0 +1,121 @@
+import re
+
+import pytest
+import requests
+
+CRITERIA = ['grocery_stores', 'coffee_shops']
+
+
+def _value(text: str, series: str) -> float:
+    """Value of one exposition series (name plus labels), 0 if absent."""
+    for line in text.splitlines():
+        if line.startswith(series + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+def test_histogram_buckets_are_cumulative():
+    from locale_metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    histogram = registry.histogram('test_seconds', 'Test durations', ('stage',))
+    for value in (0.003, 0.02, 0.02, 30.0):
+        histogram.observe(value, stage='geocode')
+    text = registry.render()
+
+    assert '# TYPE test_seconds histogram' in text
+    assert _value(text, 'test_seconds_bucket{stage="geocode",le="0.005"}') == 1
+    assert _value(text, 'test_seconds_bucket{stage="geocode",le="0.025"}') == 3
+    assert _value(text, 'test_seconds_bucket{stage="geocode",le="20.0"}') == 3
+    assert _value(text, 'test_seconds_bucket{stage="geocode",le="+Inf"}') == 4
+    assert _value(text, 'test_seconds_count{stage="geocode"}') == 4
+    assert _value(text, 'test_seconds_sum{stage="geocode"}') == pytest.approx(30.043)
+
+
+def test_counter_labels_are_escaped_and_collectors_rendered():
+    from locale_metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    counter = registry.counter('test_total', 'Test events', ('query',))
+    counter.inc(query='say "hi"\\n')
+    counter.inc(2, query='say "hi"\\n')
+    registry.register_collector(lambda: ['test_gauge 7'])
+    text = registry.render()
+
+    assert 'test_total{query="say \\"hi\\"\\\\n"} 3' in text
+    assert text.endswith('test_gauge 7\n')
+
+
+def test_upstream_span_counts_errors_by_status():
+    from locale_metrics import UPSTREAM_ERRORS, registry, upstream_span
+
+    response = requests.Response()
+    response.status_code = 429
+    series = 'locale_upstream_errors_total{endpoint="test_endpoint",error="429"}'
+    before = _value(registry.render(), series)
+    with pytest.raises(requests.HTTPError):
+        with upstream_span('test_endpoint'):
+            raise requests.HTTPError(response=response)
+    with pytest.raises(ValueError):
+        with upstream_span('test_endpoint'):
+            raise ValueError('bad body')
+    text = registry.render()
+
+    assert _value(text, series) == before + 1
+    assert _value(text, 'locale_upstream_errors_total{endpoint="test_endpoint",error="ValueError"}') >= 1
+    assert UPSTREAM_ERRORS.name == 'locale_upstream_errors_total'
+
+
+def test_evaluation_spans_reach_metrics_and_timings(stub):
+    from api_server import app
+
+    client = app.test_client()
+    before = client.get('/api/metrics').get_data(as_text=True)
+    response = client.post('/api/evaluate', json={
+        'location': 'Tulsa, OK', 'radius_miles': 3, 'criteria': CRITERIA, 'timings': True,
+    }).get_json()
+    metrics = client.get('/api/metrics')
+    text = metrics.get_data(as_text=True)
+
+    assert metrics.mimetype == 'text/plain'
+    nearby_calls = response['usage']['upstream_calls']['places_nearby']
+    assert response['timings']['upstream:places_nearby']['count'] == nearby_calls
+    assert 'evaluation' in response['timings']
+    series = 'locale_upstream_request_seconds_count{endpoint="places_nearby"}'
+    assert _value(text, series) - _value(before, series) == nearby_calls
+    assert _value(text, 'locale_stage_seconds_count{stage="evaluation",criterion=""}') > \
+        _value(before, 'locale_stage_seconds_count{stage="evaluation",criterion=""}')
+    assert re.search(r'^locale_cache_requests_total\{namespace="geocode",result="miss"\} [1-9]', text, re.M)
+    assert 'timings' not in client.post('/api/evaluate', json={
+        'location': 'Tulsa, OK', 'radius_miles': 3, 'criteria': CRITERIA}).get_json()
+
+
+def test_missed_deadlines_are_counted(stub):
+    from locale_backend import evaluate_location, geocode_location
+    from locale_metrics import registry
+
+    geocode_location('Boise, ID')
+    series = 'locale_evaluation_timeouts_total{section="climate"}'
+    before = _value(registry.render(), series)
+    stub.latency = 0.5
+    result = evaluate_location('Boise, ID', 3, CRITERIA, deadline_seconds=0.1)
+
+    assert 'climate' in result['timed_out']
+    assert _value(registry.render(), series) == before + 1
+
+
+def test_lookups_refused_by_the_quota_are_counted(stub, monkeypatch):
+    from locale_backend import evaluate_geocoded, quota
+    from locale_metrics import registry
+    from locale_quota import EndpointLimit, MemoryBuckets
+
+    monkeypatch.setattr(quota, 'buckets', MemoryBuckets())
+    monkeypatch.setitem(quota.limits, 'places_nearby', EndpointLimit(qps=0, daily=1))
+    quota.acquire('places_nearby')
+    series = 'locale_evaluation_timeouts_total{section="amenity"}'
+    before = _value(registry.render(), series)
+    geo = {'lat': 41.2565, 'lng': -95.9345, 'formatted_address': 'Omaha'}
+    result = evaluate_geocoded(geo, 'Omaha', 3, CRITERIA)
+
+    assert set(CRITERIA) <= set(result['timed_out'])
+    assert _value(registry.render(), series) == before + len(CRITERIA)
@@ -0,0 +1,144 @@
+import gzip
+import json
+
+import pytest
+
+CRITERIA = ['restaurants', 'bars', 'coffee_shops']
+GEO = {'lat': 30.2672, 'lng': -97.7431, 'formatted_address': 'Downtown'}
+
+
+def _evaluate(radius_miles):
+    from locale_backend import evaluate_geocoded
+    return evaluate_geocoded(GEO, 'Downtown', radius_miles, CRITERIA)
+
+
+def _expand(compact):
+    """Full per-criterion place lists rebuilt from a compact evaluation."""
+    table = compact['places']
+    prefix = compact.get('url_prefix', '')
+    rows = [dict(zip(table, values)) for values in zip(*table.values())]
+    for row in rows:
+        if row.get('url'):
+            row['url'] = prefix + row['url']
+    return {key: [rows[i] for i in amenity['places']] for key, amenity in compact['amenities'].items()}
+
+
+@pytest.mark.parametrize('data, message', [
+    ({'fields': ['name', 'phone']}, 'Unknown place field'),
+    ({'fields': 7}, 'fields must be'),
+    ({'limit': 'ten'}, 'limit must be an integer'),
+    ({'limit': -1}, 'zero or more'),
+    ({'format': 'tiny'}, "format must be 'full' or 'compact'"),
+])
+def test_bad_shape_options_are_rejected(data, message):
+    from locale_payload import parse_shape
+
+    with pytest.raises(ValueError, match=message):
+        parse_shape(data)
+
+
+def test_shape_options_are_parsed():
+    from locale_payload import parse_previous_radius, parse_shape
+
+    assert parse_shape({}) == {'compact': False, 'fields': None, 'limit': None}
+    assert parse_shape({'format': 'compact', 'fields': 'name, distance', 'limit': '3'}) == \
+        {'compact': True, 'fields': ('name', 'distance'), 'limit': 3}
+    assert parse_previous_radius({'previous_radius_miles': '2'}) == 2.0
+    with pytest.raises(ValueError, match='cannot be combined'):
+        parse_previous_radius({'previous_radius_miles': 2, 'limit': 5})
+
+
+def test_shaping_trims_places_but_keeps_counts(stub):
+    from locale_payload import apply_shape
+
+    evaluation = _evaluate(2)
+    before = json.dumps(evaluation, sort_keys=True)
+    shaped = apply_shape(evaluation, fields=('name', 'distance'), limit=2)
+
+    assert json.dumps(evaluation, sort_keys=True) == before
+    for key, amenity in shaped['amenities'].items():
+        assert amenity['count'] == evaluation['amenities'][key]['count']
+        assert amenity['places'] == [{'name': p['name'], 'distance': p['distance']}
+                                     for p in evaluation['amenities'][key]['places'][:2]]
+
+
+def test_compact_format_stores_each_place_once(stub):
+    from locale_payload import apply_shape, place_key
+
+    evaluation = _evaluate(2)
+    # A place listed under two criteria is stored once
+    evaluation['amenities']['bars']['places'].insert(0, evaluation['amenities']['restaurants']['places'][0])
+    compact = apply_shape(evaluation, compact=True)
+    expanded = _expand(compact)
+
+    keys = {place_key(p) for amenity in evaluation['amenities'].values() for p in amenity['places']}
+    assert compact['format'] == 'compact'
+    assert len(compact['places']['name']) == len(keys)
+    assert compact['url_prefix']
+    for key, amenity in evaluation['amenities'].items():
+        assert compact['amenities'][key]['count'] == amenity['count']
+        assert [(p['name'], p['url']) for p in expanded[key]] == [(p['name'], p['url']) for p in amenity['places']]
+        assert all(abs(e['lat'] - p['lat']) < 1e-5 for e, p in zip(expanded[key], amenity['places']))
+
+
+def test_radius_diff_turns_one_radius_into_the_other(stub):
+    from locale_payload import place_key, radius_diff
+
+    previous, current = _evaluate(2), _evaluate(1)
+    diff = radius_diff(previous, current)
+
+    assert diff['format'] == 'diff' and diff['previous_radius_miles'] == 2
+    for key, amenity in diff['amenities'].items():
+        kept = [p for p in previous['amenities'][key]['places'] if place_key(p) not in set(amenity['removed'])]
+        assert sorted(map(place_key, kept + amenity['added'])) == \
+            sorted(map(place_key, current['amenities'][key]['places']))
+        assert amenity['count'] == current['amenities'][key]['count']
+
+
+@pytest.mark.parametrize('header, with_brotli, expected', [
+    (None, False, None),
+    ('gzip, deflate', False, 'gzip'),
+    ('br;q=1.0, gzip;q=0.5', False, 'gzip'),
+    ('br, gzip', True, 'br'),
+    ('gzip;q=0', False, None),
+    ('*', False, 'gzip'),
+    ('identity', True, None),
+])
+def test_encoding_negotiation(monkeypatch, header, with_brotli, expected):
+    import locale_payload
+
+    monkeypatch.setattr(locale_payload, 'brotli', object() if with_brotli else None)
+    assert locale_payload.negotiate_encoding(header) == expected
+
+
+def test_large_json_responses_are_gzipped(stub):
+    from api_server import app
+    from locale_payload import COMPRESS_MIN_BYTES
+
+    client = app.test_client()
+    body = {'location': 'Austin, TX', 'radius_miles': 2, 'criteria': CRITERIA}
+    plain = client.post('/api/evaluate', json=body)
+    zipped = client.post('/api/evaluate', json=body, headers={'Accept-Encoding': 'gzip'})
+
+    assert len(plain.data) >= COMPRESS_MIN_BYTES
+    assert 'Content-Encoding' not in plain.headers
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in zipped.headers['Vary']
+    unzipped = json.loads(gzip.decompress(zipped.data))
+    assert unzipped['usage']['upstream_calls'] == {}  # the second request was a cache hit
+    assert {**unzipped, 'usage': None} == {**plain.get_json(), 'usage': None}
+    assert 'Content-Encoding' not in client.get('/api/health', headers={'Accept-Encoding': 'gzip'}).headers
+
+
+def test_compact_evaluations_over_the_api(stub):
+    from api_server import app
+
+    client = app.test_client()
+    body = {'location': 'Austin, TX', 'radius_miles': 2, 'criteria': CRITERIA}
+    full = client.post('/api/evaluate', json=body).get_json()
+    compact = client.post('/api/evaluate', json={**body, 'format': 'compact', 'fields': ['name', 'url']}).get_json()
+
+    assert set(compact['places']) == {'name', 'url'}
+    assert {key: [p['name'] for p in places] for key, places in _expand(compact).items()} == \
+        {key: [p['name'] for p in amenity['places']] for key, amenity in full['amenities'].items()}
+    assert client.post('/api/evaluate', json={**body, 'fields': ['phone']}).status_code == 400
@@ -0,0 +1,154 @@
+import asyncio
+import contextvars
+import time
+
+import pytest
+
+from conftest import DENSE_POINT
+
+
+def _state(limit, used=0):
+    from locale_quota import _today
+    return {'tokens': limit.burst, 'updated_at': 0.0, 'day': _today(), 'used': used}
+
+
+def test_interactive_calls_wait_off_an_empty_bucket():
+    from locale_quota import INTERACTIVE, EndpointLimit, QuotaExceeded, _take
+
+    limit = EndpointLimit(qps=10, burst=2)
+    state = _state(limit)
+    assert _take(state, limit, 0.0, INTERACTIVE, 0.2, 10, 'places_nearby') == (True, 0.0)
+    assert _take(state, limit, 0.0, INTERACTIVE, 0.2, 10, 'places_nearby') == (True, 0.0)
+    taken, wait = _take(state, limit, 0.0, INTERACTIVE, 0.2, 10, 'places_nearby')
+    assert taken and wait == pytest.approx(0.1)
+
+    # A wait past max_wait is refused without spending a token
+    tokens = state['tokens']
+    with pytest.raises(QuotaExceeded):
+        _take(state, limit, 0.0, INTERACTIVE, 0.2, 0.05, 'places_nearby')
+    assert state['tokens'] == tokens and state['used'] == 3
+
+
+def test_batch_calls_leave_the_interactive_reserve():
+    from locale_quota import BATCH, INTERACTIVE, EndpointLimit, _take
+
+    limit = EndpointLimit(qps=10, burst=10)
+    state = _state(limit)
+    for _ in range(8):
+        assert _take(state, limit, 0.0, BATCH, 0.2, 10, 'places_nearby') == (True, 0.0)
+    taken, wait = _take(state, limit, 0.0, BATCH, 0.2, 10, 'places_nearby')
+    assert not taken and wait == pytest.approx(0.1)
+    assert state['used'] == 8
+
+    assert _take(state, limit, 0.0, INTERACTIVE, 0.2, 10, 'places_nearby') == (True, 0.0)
+    # Tokens refill at qps: a second later batch work may go again
+    assert _take(state, limit, 1.0, BATCH, 0.2, 10, 'places_nearby') == (True, 0.0)
+
+
+def test_daily_budget_keeps_a_share_for_interactive_calls(monkeypatch):
+    import locale_quota
+    from locale_quota import BATCH, INTERACTIVE, EndpointLimit, QuotaExceeded, _take
+
+    limit = EndpointLimit(qps=0, daily=10)
+    state = _state(limit, used=8)
+    with pytest.raises(QuotaExceeded):
+        _take(state, limit, 0.0, BATCH, 0.2, 10, 'places_nearby')
+    assert _take(state, limit, 0.0, INTERACTIVE, 0.2, 10, 'places_nearby') == (True, 0.0)
+    assert _take(state, limit, 0.0, INTERACTIVE, 0.2, 10, 'places_nearby') == (True, 0.0)
+    with pytest.raises(QuotaExceeded):
+        _take(state, limit, 0.0, INTERACTIVE, 0.2, 10, 'places_nearby')
+
+    monkeypatch.setattr(locale_quota, '_today', lambda: '2099-01-01')
+    assert _take(state, limit, 0.0, BATCH, 0.2, 10, 'places_nearby') == (True, 0.0)
+    assert state['used'] == 1
+
+
+def test_buckets_are_shared_through_sqlite(tmp_path):
+    from locale_quota import EndpointLimit, QuotaExceeded, QuotaManager, SQLiteBuckets
+
+    limits = {'geocode': EndpointLimit(qps=0, daily=3)}
+    path = str(tmp_path / 'quota.sqlite3')
+    workers = [QuotaManager(limits, SQLiteBuckets(path)) for _ in range(2)]
+    workers[0].acquire('geocode')
+    workers[1].acquire('geocode')
+    workers[0].acquire('geocode')
+    with pytest.raises(QuotaExceeded):
+        workers[1].acquire('geocode')
+
+
+@pytest.mark.parametrize('level', ['interactive', 'batch'])
+def test_acquire_gives_up_rather_than_wait_past_max_wait(monkeypatch, level):
+    import locale_quota
+    from locale_quota import EndpointLimit, QuotaExceeded, QuotaManager, priority
+
+    sleeps = []
+    monkeypatch.setattr(locale_quota.time, 'sleep', sleeps.append)
+    manager = QuotaManager({'places_nearby': EndpointLimit(qps=1, burst=1)}, batch_reserve=0)
+    manager.acquire('places_nearby')
+    with priority(level), pytest.raises(QuotaExceeded):
+        manager.acquire('places_nearby', max_wait=0.5)
+    assert sleeps == []
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    """Swap the backend's quota limits for a test; returns a function setting one endpoint's limit."""
+    from locale_backend import quota
+    from locale_quota import MemoryBuckets
+
+    monkeypatch.setattr(quota, 'buckets', MemoryBuckets())
+
+    def limit(endpoint, value):
+        monkeypatch.setitem(quota.limits, endpoint, value)
+    return limit
+
+
+def test_quota_refusals_are_reported_not_counted_as_zero(stub, calls, limited):
+    from locale_backend import count_nearby_places, quota, search_by_text
+    from locale_quota import EndpointLimit
+
+    limited('places_nearby', EndpointLimit(qps=0, daily=1))
+    limited('places_text', EndpointLimit(qps=0, daily=1))
+    quota.acquire('places_nearby')
+    quota.acquire('places_text')
+
+    result, upstream = calls(count_nearby_places, *DENSE_POINT, 'cafe', 4828)
+    assert result == {'count': 0, 'places': [], 'timed_out': True}
+    result, upstream_text = calls(search_by_text, *DENSE_POINT, 'Starbucks', 4828)
+    assert result['timed_out']
+    assert upstream == upstream_text == {}
+    assert stub.stats() == {}
+
+
+def test_async_quota_refusals_are_reported(stub, limited):
+    import locale_async
+    from locale_backend import quota
+    from locale_quota import EndpointLimit
+
+    limited('places_nearby', EndpointLimit(qps=0, daily=1))
+    quota.acquire('places_nearby')
+    result = asyncio.run(locale_async.count_nearby_places(*DENSE_POINT, 'cafe', 4828))
+    assert result == {'count': 0, 'places': [], 'timed_out': True}
+
+
+def test_no_token_is_spent_after_the_deadline(stub, calls, limited):
+    import locale_backend
+    from locale_quota import EndpointLimit
+
+    limited('places_nearby', EndpointLimit(qps=1, burst=1))
+
+    def search(deadline):
+        locale_backend._upstream_deadline.set(deadline)
+        return calls(locale_backend.count_nearby_places, *DENSE_POINT, 'cafe', 4828)
+
+    result, upstream = contextvars.copy_context().run(search, time.monotonic() - 1)
+    assert result['timed_out'] and upstream == {}
+    assert locale_backend.quota.buckets._states == {}
+
+    # The one token is spent; the next call would wait a second but has 0.2s left
+    locale_backend.quota.acquire('places_nearby')
+    start = time.monotonic()
+    result, upstream = contextvars.copy_context().run(search, time.monotonic() + 0.2)
+    assert time.monotonic() - start < 0.1
+    assert result['timed_out'] and upstream == {}
+    assert stub.stats() == {}
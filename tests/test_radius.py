@@ -0,0 +1,38 @@
+import pytest
+
+from conftest import DENSE_POINT
+
+
+def _nearby_calls(calls, point, place_type, radii_miles):
+    from locale_backend import count_nearby_places
+    return [calls(count_nearby_places, *point, place_type, int(miles * 1609.34))[1].get('places_nearby', 0)
+            for miles in radii_miles]
+
+
+def _text_search_calls(calls, point, query, radii_miles):
+    from locale_backend import search_by_text
+    return [calls(search_by_text, *point, query, int(miles * 1609.34))[1].get('places_text', 0)
+            for miles in radii_miles]
+
+
+@pytest.mark.parametrize('place_type', ['cafe', 'grocery_store'])
+def test_dense_radius_change_costs_no_more_than_without_superset(stub, calls, monkeypatch, place_type):
+    import locale_backend
+    radii = [3, 5, 2, 4]
+    widened = _nearby_calls(calls, DENSE_POINT, place_type, radii)
+    stub.reset()
+    locale_backend.response_cache.clear()
+    monkeypatch.setattr(locale_backend, 'RADIUS_SUPERSET_MILES', 0)
+    baseline = _nearby_calls(calls, DENSE_POINT, place_type, radii)
+    assert widened[0] == baseline[0] == 1
+    assert sum(widened) <= sum(baseline)
+
+
+def test_sparse_radius_change_is_covered_by_superset(stub, calls):
+    # The first fetch is at 1 mile; it is not saturated, so 2 miles is fetched
+    # at the superset radius and covers the later radii
+    assert _nearby_calls(calls, DENSE_POINT, 'brewery', [1, 2, 1.5, 3]) == [1, 1, 0, 0]
+
+
+def test_text_search_reuses_larger_fetch(stub, calls):
+    assert _text_search_calls(calls, DENSE_POINT, 'Starbucks', [3, 5, 2, 4]) == [1, 1, 0, 0]
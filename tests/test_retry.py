@@ -0,0 +1,43 @@
+import time
+
+import pytest
+import requests
+
+
+def test_long_retry_after_fails_fast(stub):
+    from locale_backend import upstream, PLACES_API_BASE
+
+    stub.error_rate = 1
+    stub.retry_after = 3600
+    start = time.monotonic()
+    with pytest.raises(requests.HTTPError) as raised:
+        upstream.post_json(PLACES_API_BASE, {'includedTypes': ['cafe']})
+    assert raised.value.response.status_code in (429, 503)
+    assert time.monotonic() - start < 1
+    assert sum(stub.stats().values()) == 1
+
+
+def test_short_retry_after_is_honored(stub, monkeypatch):
+    import locale_backend
+
+    monkeypatch.setattr(locale_backend, 'UPSTREAM_RETRY_MAX_DELAY', 1)
+    stub.error_rate = 1
+    stub.retry_after = 1
+    with pytest.raises(requests.HTTPError):
+        locale_backend.upstream.post_json(locale_backend.PLACES_API_BASE, {'includedTypes': ['cafe']})
+    assert sum(stub.stats().values()) == 1 + locale_backend.UPSTREAM_RETRIES
+
+
+def test_retry_after_is_capped_by_the_deadline(stub):
+    import locale_backend
+
+    stub.error_rate = 1
+    stub.retry_after = 2
+    token = locale_backend._upstream_deadline.set(time.monotonic() + 1)
+    try:
+        start = time.monotonic()
+        with pytest.raises(requests.HTTPError):
+            locale_backend.upstream.post_json(locale_backend.PLACES_API_BASE, {'includedTypes': ['cafe']})
+        assert time.monotonic() - start < 0.5
+    finally:
+        locale_backend._upstream_deadline.reset(token)
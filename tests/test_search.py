@@ -0,0 +1,76 @@
+import math
+
+import pytest
+
+from conftest import DENSE_POINT
+
+BBOX = [DENSE_POINT[0] - 0.01, DENSE_POINT[1] - 0.01, DENSE_POINT[0] + 0.01, DENSE_POINT[1] + 0.01]
+
+
+def test_within_miles_past_the_search_limit_is_rejected():
+    from locale_search import MAX_WITHIN_MILES, parse_search_request
+
+    with pytest.raises(ValueError, match=f'at most {MAX_WITHIN_MILES}'):
+        parse_search_request({'bbox': BBOX, 'amenities': [{'criterion': 'parks', 'within_miles': 40}]})
+
+
+def test_large_within_miles_is_searched_at_full_radius(stub, monkeypatch):
+    import locale_search
+    from locale_geo import geohash_center, geohash_encode
+
+    searches = []
+    fetch = locale_search._fetch_nearby_raw
+
+    def recording_fetch(lat, lng, types_list, radius_meters, rank_preference):
+        searches.append((lat, lng, radius_meters))
+        return fetch(lat, lng, types_list, radius_meters, rank_preference)
+
+    def reaches(lat, lng, radius_meters):
+        """Whether a search is a cell's own, or a tile's reaching within_miles past its corners."""
+        if radius_meters == math.ceil(within_miles * 1609.34):
+            return True
+        tiles = [geohash_encode(lat, lng, precision) for precision in range(1, 10)]
+        return any(geohash_center(tile) == (lat, lng) and
+                   radius_meters == locale_search._tile_radius(tile, within_miles * 1609.34) for tile in tiles)
+
+    monkeypatch.setattr(locale_search, '_fetch_nearby_raw', recording_fetch)
+    within_miles = locale_search.MAX_WITHIN_MILES - 1
+    args = locale_search.parse_search_request(
+        {'bbox': BBOX, 'cell_miles': 0.5, 'budget': 20,
+         'amenities': [{'criterion': 'breweries', 'within_miles': within_miles}]})
+    locale_search.search_region(**args, parallel=False)
+
+    assert searches
+    assert all(radius <= locale_search.PLACES_MAX_RADIUS_METERS for _, _, radius in searches)
+    assert all(reaches(*search) for search in searches)
+
+
+def test_cells_without_climate_data_are_kept_as_unknown(stub, monkeypatch):
+    import locale_backend
+    import locale_search
+
+    monkeypatch.setattr(locale_search, 'get_climate_data', lambda lat, lng: locale_backend._climate_unavailable())
+    result = locale_search.search_region(BBOX, [], [locale_search.ClimateRule('summer_temp', max=85)],
+                                         cell_miles=0.5, parallel=False)
+
+    assert result['stats']['matches'] == result['stats']['cells']
+    assert result['stats']['climate_unknown'] == result['stats']['cells']
+    assert all(candidate['climate_unknown'] == ['summer_temp'] and candidate['climate']['summer_temp'] is None
+               for candidate in result['candidates'])
+
+
+def test_min_rating_is_only_accepted_for_restaurants():
+    from locale_search import AmenityRule, parse_search_request
+
+    assert AmenityRule('restaurants', min_rating=4.5).min_rating == 4.5
+    with pytest.raises(ValueError, match='min_rating only applies to restaurants'):
+        parse_search_request({'bbox': BBOX, 'amenities': [{'criterion': 'parks', 'min_rating': 4}]})
+
+
+def test_search_rejects_min_rating_for_other_criteria_with_400(stub):
+    from api_server import app
+
+    response = app.test_client().post('/api/search', json={
+        'bbox': BBOX, 'amenities': [{'criterion': 'coffee_shops', 'min_rating': 4}]})
+    assert response.status_code == 400
+    assert 'min_rating' in response.get_json()['error']
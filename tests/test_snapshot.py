@@ -0,0 +1,142 @@
+import time
+
+import pytest
+
+from conftest import DENSE_POINT
+
+from stub_upstream import _places_in_circle
+
+RADIUS_METERS = 3000  # about 40 restaurants around DENSE_POINT
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A fresh snapshot store installed in the backend."""
+    import locale_backend
+    from locale_snapshot import SnapshotStore
+
+    snapshot = SnapshotStore(str(tmp_path / 'snapshot.sqlite3'))
+    monkeypatch.setattr(locale_backend, 'snapshot_store', snapshot)
+    return snapshot
+
+
+def _crawl(store, place_type, lat, lng, radius_meters):
+    from locale_backend import crawl_snapshot_tile
+    from locale_geo import METERS_PER_DEGREE_LAT
+
+    d = radius_meters / METERS_PER_DEGREE_LAT * 2
+    tiles = store.tiles_in_bbox(lat - d, lng - d, lat + d, lng + d)
+    store.register(place_type, tiles)
+    assert all(crawl_snapshot_tile(place_type, tile) for tile in tiles)
+
+
+def _ids(places):
+    return sorted(p['id'] for p in places)
+
+
+def test_covered_searches_are_answered_locally(stub, calls, store):
+    from locale_backend import count_nearby_places
+
+    _crawl(store, 'restaurant', *DENSE_POINT, RADIUS_METERS)
+    truth = _places_in_circle(*DENSE_POINT, RADIUS_METERS, ['restaurant'])
+    assert len(truth) > 20
+
+    result, made = calls(count_nearby_places, *DENSE_POINT, 'restaurant', RADIUS_METERS, 0)
+    assert made == {}
+    assert result['count'] == len(truth)
+
+
+def test_popularity_searches_skip_the_snapshot(stub, calls, store, monkeypatch):
+    import locale_backend
+    from locale_backend import count_nearby_places, response_cache
+
+    _crawl(store, 'restaurant', *DENSE_POINT, RADIUS_METERS)
+    result, made = calls(count_nearby_places, *DENSE_POINT, 'restaurant', RADIUS_METERS, 4.0)
+    assert made['places_nearby'] >= 1
+
+    response_cache.clear()
+    monkeypatch.setattr(locale_backend, 'snapshot_store', None)
+    assert count_nearby_places(*DENSE_POINT, 'restaurant', RADIUS_METERS, 4.0) == result
+    assert result['count'] <= 20
+
+
+def test_rtree_and_btree_queries_agree(stub, store):
+    from locale_snapshot import SnapshotStore
+
+    _crawl(store, 'cafe', *DENSE_POINT, 1500)
+    _crawl(store, 'park', *DENSE_POINT, 1500)
+    btree = SnapshotStore(store.path)
+    btree.rtree = False
+    for types in (['cafe'], ['cafe', 'park']):
+        found = store.places_in_circle(types, *DENSE_POINT, 1500)
+        assert _ids(found) == _ids(btree.places_in_circle(types, *DENSE_POINT, 1500))
+        assert _ids(found) == _ids(place for _, place in _places_in_circle(*DENSE_POINT, 1500, types))
+
+
+def test_uncovered_incomplete_and_stale_tiles_are_not_served(store, monkeypatch):
+    import locale_snapshot
+    from locale_geo import geohash_center
+
+    tile = store.tiles_in_bbox(*DENSE_POINT, *DENSE_POINT)[0]
+    lat, lng = geohash_center(tile)
+    inside = {'id': 'a', 'location': {'latitude': lat, 'longitude': lng}}
+    outside = {'id': 'b', 'location': {'latitude': lat + 1, 'longitude': lng}}
+
+    assert store.places_in_circle(['cafe'], lat, lng, 100) is None
+    store.put_tile('cafe', tile, [inside, outside], complete=False)
+    assert store.places_in_circle(['cafe'], lat, lng, 100) is None
+    store.put_tile('cafe', tile, [inside, outside], complete=True)
+    assert _ids(store.places_in_circle(['cafe'], lat, lng, 100)) == ['a']
+    assert store.stats()['places'] == 1
+
+    later = time.time() + (store.max_age_seconds + 1)
+    monkeypatch.setattr(locale_snapshot.time, 'time', lambda: later)
+    assert store.places_in_circle(['cafe'], lat, lng, 100) is None
+
+
+def test_refresher_recrawls_claimed_stale_tiles(store, monkeypatch):
+    import locale_snapshot
+    from locale_snapshot import SnapshotRefresher
+
+    tiles = store.tiles_in_bbox(DENSE_POINT[0] - 0.05, DENSE_POINT[1] - 0.05, DENSE_POINT[0] + 0.05,
+                                DENSE_POINT[1] + 0.05)
+    store.register('park', tiles)
+    crawled = []
+
+    def crawl(place_type, tile):
+        crawled.append(tile)
+        store.put_tile(place_type, tile, [], complete=True)
+
+    refresher = SnapshotRefresher(store, crawl, batch=2)
+    assert refresher.run_once() == 2
+    assert refresher.run_once() == min(2, len(tiles) - 2)
+    assert len(set(crawled)) == len(crawled)
+    assert store.due_tiles('park', crawled) == []
+
+    # Claimed tiles are skipped by other workers until the claim lapses
+    store.register('gym', tiles)
+    claimed = store.claim_stale(1000)
+    assert ('gym', tiles[0]) in claimed
+    assert store.claim_stale(1000) == []
+    later = time.time() + locale_snapshot.SNAPSHOT_CLAIM_SECONDS + 1
+    monkeypatch.setattr(locale_snapshot.time, 'time', lambda: later)
+    assert sorted(store.claim_stale(1000)) == sorted(claimed)
+
+
+def test_refresher_starts_from_the_servers_not_on_import(store, monkeypatch):
+    import locale_backend
+    import locale_snapshot
+
+    started = []
+    monkeypatch.setattr(locale_snapshot.SnapshotRefresher, 'start', lambda self: started.append(self))
+    monkeypatch.setattr(locale_backend, '_snapshot_refresher', None)
+    monkeypatch.setattr(locale_backend, 'SNAPSHOT_REFRESH_INTERVAL', 900)
+
+    locale_backend.start_snapshot_refresher()
+    locale_backend.start_snapshot_refresher()
+    assert len(started) == 1 and started[0].store is store
+
+    monkeypatch.setattr(locale_backend, '_snapshot_refresher', None)
+    monkeypatch.setattr(locale_backend, 'SNAPSHOT_REFRESH_INTERVAL', 0)
+    locale_backend.start_snapshot_refresher()
+    assert len(started) == 1
@@ -0,0 +1,69 @@
+import json
+import time
+
+CRITERIA = ['grocery_stores', 'coffee_shops', 'parks']
+
+
+def _events(body: str):
+    """(event, payload) pairs from a text/event-stream body."""
+    events = []
+    for block in body.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.splitlines())
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+def test_stream_emits_every_section_once(stub):
+    from api_server import app
+
+    response = app.test_client().post('/api/evaluate/stream', json={
+        'location': 'Austin, TX', 'radius_miles': 3, 'criteria': CRITERIA, 'fields': ['name'], 'limit': 2,
+    })
+    assert response.mimetype == 'text/event-stream'
+    events = _events(response.get_data(as_text=True))
+
+    assert events[0][0] == 'location'
+    assert events[-1][0] == 'done'
+    assert events[-1][1]['timed_out'] == []
+    assert events[-1][1]['usage']['upstream_calls']['places_nearby'] >= 1
+    amenities = {payload['key']: payload['data'] for event, payload in events if event == 'amenity'}
+    assert set(amenities) == set(CRITERIA)
+    assert all(len(data['places']) <= 2 and all(set(p) == {'name'} for p in data['places'])
+               for data in amenities.values())
+    assert [event for event, _ in events].count('climate') == 1
+    assert [event for event, _ in events].count('transportation') == 1
+
+
+def test_location_is_sent_before_the_lookups_finish(stub):
+    from locale_backend import geocode_location, iter_evaluation
+
+    geocode_location('Denver, CO')
+    stub.latency = 0.3
+    start = time.monotonic()
+    events = iter_evaluation('Denver, CO', 3, CRITERIA)
+    event, _ = next(events)
+    first = time.monotonic() - start
+    rest = [event for event, _ in events]
+
+    assert event == 'location'
+    assert first < 0.1
+    assert rest[-1] == 'done'
+    assert time.monotonic() - start >= 0.3
+
+
+def test_stream_matches_evaluation(stub):
+    from locale_backend import evaluate_location, iter_evaluation
+
+    streamed = {payload['key']: payload['data']['count']
+                for event, payload in iter_evaluation('Raleigh, NC', 3, CRITERIA) if event == 'amenity'}
+    evaluated = evaluate_location('Raleigh, NC', 3, CRITERIA)
+    assert streamed == {key: data['count'] for key, data in evaluated['amenities'].items()}
+
+
+def test_unknown_location_streams_one_error(stub, monkeypatch):
+    import locale_backend
+    from api_server import app
+
+    monkeypatch.setattr(locale_backend, 'geocode_location', lambda location: None)
+    response = app.test_client().post('/api/evaluate/stream', json={'location': 'Nowhere'})
+    assert _events(response.get_data(as_text=True)) == [('error', {'error': 'Location not found'})]
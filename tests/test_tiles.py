@@ -0,0 +1,49 @@
+import pytest
+
+from conftest import DENSE_POINT
+
+RADIUS_METERS = 4828  # 3 miles
+
+
+@pytest.fixture
+def no_superset(monkeypatch):
+    import locale_backend
+    monkeypatch.setattr(locale_backend, 'RADIUS_SUPERSET_MILES', 0)
+
+
+def _points_in_one_tile(place_type):
+    """Three points around the center of the tile DENSE_POINT's searches are shared through."""
+    from locale_backend import _tile_search
+    key, lat, lng, _ = _tile_search(*DENSE_POINT, [place_type], RADIUS_METERS, 'DISTANCE')
+    points = [(lat, lng), (lat + 0.001, lng + 0.001), (lat - 0.001, lng - 0.002)]
+    assert all(_tile_search(*point, [place_type], RADIUS_METERS, 'DISTANCE')[0] == key for point in points)
+    return points
+
+
+def _nearby_calls(calls, points, place_type):
+    from locale_backend import count_nearby_places
+    return [calls(count_nearby_places, *point, place_type, RADIUS_METERS)[1].get('places_nearby', 0)
+            for point in points]
+
+
+def test_saturated_dense_point_costs_one_call(stub, calls, no_superset):
+    assert _nearby_calls(calls, [DENSE_POINT], 'cafe') == [1]
+
+
+def test_dense_tiles_go_straight_to_exact_searches(stub, calls, no_superset):
+    assert _nearby_calls(calls, _points_in_one_tile('cafe'), 'cafe') == [1, 1, 1]
+
+
+def test_sparse_tiles_are_shared(stub, calls, no_superset):
+    assert _nearby_calls(calls, _points_in_one_tile('brewery'), 'brewery') == [1, 1, 0]
+
+
+def test_tiled_counts_match_exact_counts(stub, no_superset, monkeypatch):
+    import locale_backend
+    points = _points_in_one_tile('brewery')
+    tiled = [locale_backend.count_nearby_places(*point, 'brewery', RADIUS_METERS)['count'] for point in points]
+    stub.reset()
+    locale_backend.response_cache.clear()
+    monkeypatch.setattr(locale_backend, 'PLACES_TILE_CACHE', False)
+    exact = [locale_backend.count_nearby_places(*point, 'brewery', RADIUS_METERS)['count'] for point in points]
+    assert tiled == exact